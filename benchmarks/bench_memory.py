@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# bench_memory.py
+# Measures how much memory each level takes after loading a file, and
+# compares LevelInfo against the older dict-backed version of it.
+#
+# Usage: python benchmarks/bench_memory.py [num_worlds] [levels_per_world]
+
+
+################################################################
+################################################################
+
+
+import dataclasses
+import gc
+import os.path
+import sys
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from level_info import LevelInfo, LevelInfoFile
+from synthetic import make_file
+
+
+@dataclasses.dataclass
+class LegacyLevelInfo():
+    """The old LevelInfo, which has a __dict__, kept here for comparison"""
+    name: str = ''
+    file_world: int = 0
+    file_level: int = 0
+    display_world: int = 0
+    display_level: int = 0
+    in_star_coins_menu: bool = True
+    has_normal_exit: bool = False
+    has_secret_exit: bool = False
+    is_right_side: bool = False
+
+
+def traced_size(func: Callable[[], object]) -> int:
+    """Return the memory (as traced by tracemalloc) still taken up by
+    whatever func() returns"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def copy_levels(file: LevelInfoFile, cls: type) -> list:
+    """Copy every level in a file into a new list of cls objects. The
+    names are shared with the original levels, so only the level
+    objects themselves are counted."""
+    return [cls(*(getattr(level, f.name) for f in dataclasses.fields(LevelInfo)))
+            for world in file.worlds for level in world.levels]
+
+
+def main() -> None:
+    num_worlds = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    levels_per_world = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    data = make_file(num_worlds, levels_per_world).save()
+    file = LevelInfoFile.from_data(data)
+    num_levels = num_worlds * levels_per_world
+
+    slots = '__slots__' if not hasattr(file.worlds[0].levels[0], '__dict__') else '__dict__'
+    print(f'{num_worlds} worlds x {levels_per_world} levels, Python {sys.version.split()[0]} (LevelInfo uses {slots}):')
+
+    size = traced_size(lambda: LevelInfoFile.from_data(data))
+    print(f'  whole file after from_data()   {size / num_levels:7.1f} bytes per level')
+
+    legacy = traced_size(lambda: copy_levels(file, LegacyLevelInfo))
+    current = traced_size(lambda: copy_levels(file, LevelInfo))
+    print(f'  level objects, dict-backed     {legacy / num_levels:7.1f} bytes per level')
+    print(f'  level objects, current         {current / num_levels:7.1f} bytes per level')
+    print(f'  reduction                      {legacy / current:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# bench_save.py
+# Compares LevelInfoFile.save() against the older serializer, which
+# built a separate buffer for each world, in both time and peak memory.
+#
+# Usage: python benchmarks/bench_save.py [num_worlds] [levels_per_world]
+
+
+################################################################
+################################################################
+
+
+import os.path
+import struct
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from level_info import LEVEL_ENTRY_STRUCT, TEXT_ENCODE_TABLE, LevelInfoFile
+from synthetic import make_file
+
+
+def save_legacy(self: LevelInfoFile) -> bytes:
+    """The old LevelInfoFile.save(), kept here for comparison"""
+    result = bytearray()
+    text_start = self.get_comments_offset() + len(self.comments) + 1
+
+    # First things first - add "NWRp"
+    result.extend(b'NWRp')
+
+    # Add the number-of-worlds value (we'll only worry about the last 2 bytes)
+    result.extend(struct.pack('>I', len(self.worlds)))
+
+    # Add blank spaces for each world value
+    result.extend(b'\0\0\0\0' * len(self.worlds))
+
+    # Add worlds and world-offsets at the same time
+    current_offs = len(result)
+    current_text_offs = text_start
+    text = bytearray()
+    for i, world in enumerate(self.worlds):
+        # Set the world-offset start value to current_offs
+        struct.pack_into('>I', result, 8 + i * 4, current_offs)
+
+        # Create a place to store some world info
+        world_data = bytearray()
+
+        # Add the number-of-levels value
+        num = len(world.levels)
+        if world.has_left: num += 1
+        if world.has_right: num += 1
+        world_data.extend(struct.pack('>I', num))
+
+        # Add data to world_data for each world half
+        for exists, name in zip((world.has_left, world.has_right), ('left', 'right')):
+            if not exists: continue
+            w_name = getattr(world, f'name_{name}')
+            world_data.extend(LEVEL_ENTRY_STRUCT.pack(
+                98, 98,  # filename: 98-98
+                world.world_number, (101 if name == 'right' else 100),  # display name: WN-100
+                len(w_name),
+                (0x400 if name == 'right' else 0),
+                current_text_offs))
+
+            current_text_offs += len(w_name) + 1
+            text.extend(w_name.encode('ascii') + b'\0')
+
+        # Add data to world_data for each level
+        for level in world.levels:
+            world_data.extend(LEVEL_ENTRY_STRUCT.pack(
+                (level.file_world - 1) & 0xff, (level.file_level - 1) & 0xff,
+                level.display_world, level.display_level,
+                len(level.name),
+                level.flags,
+                current_text_offs))
+
+            current_text_offs += len(level.name) + 1
+            text.extend(level.name.encode('ascii') + b'\0')
+
+        # Add world_data to result
+        result.extend(world_data)
+        current_offs += len(world_data)
+
+    # Add the comments
+    result.extend(self.comments.encode('ascii') + b'\0')
+
+    # Add text
+    result.extend(text.translate(TEXT_ENCODE_TABLE))
+
+    return bytes(result)
+
+
+def measure(name: str, func, repeat: int = 5) -> None:
+    """Print the best time and the peak traced allocation of func()"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'  {name:<8} {min(times) * 1000:9.2f} ms   peak {peak / 1024:9.1f} KiB')
+
+
+def main() -> None:
+    num_worlds = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    levels_per_world = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    file = make_file(num_worlds, levels_per_world)
+
+    data = file.save()
+    assert save_legacy(file) == data
+
+    print(f'Saving {num_worlds} worlds x {levels_per_world} levels ({len(data)} bytes):')
+    measure('legacy', lambda: save_legacy(file))
+    measure('current', file.save)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# bench_text_codec.py
+# Compares the old per-byte text encoding/decoding loops against the
+# translation tables used by level_info.py.
+#
+# Usage: python benchmarks/bench_text_codec.py [num_entries]
+
+
+################################################################
+################################################################
+
+
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from level_info import TEXT_DECODE_TABLE, TEXT_ENCODE_TABLE
+
+
+def make_pool(num_entries: int) -> tuple:
+    """Create an encoded string pool, and the (offset, length) of each entry"""
+    text = bytearray()
+    spans = []
+    for i in range(num_entries):
+        name = f'Level {i} - Some Level Name'.encode('ascii')
+        spans.append((len(text), len(name)))
+        text.extend(name + b'\0')
+    return bytes(text.translate(TEXT_ENCODE_TABLE)), spans, bytes(text)
+
+
+def decode_per_byte(pool: bytes, spans: list) -> list:
+    """The old decoding method: one generator per name"""
+    return [bytes((c + 0x30) & 0xff for c in pool[offs : offs + length]).decode('ascii')
+            for offs, length in spans]
+
+
+def decode_table(pool: bytes, spans: list) -> list:
+    """The new decoding method: translate the pool once, then slice it"""
+    decoded = pool.translate(TEXT_DECODE_TABLE)
+    return [decoded[offs : offs + length].decode('ascii') for offs, length in spans]
+
+
+def encode_per_byte(text: bytes) -> bytes:
+    """The old encoding method"""
+    return bytes([(c - 0x30) & 0xff for c in text])
+
+
+def encode_table(text: bytes) -> bytes:
+    """The new encoding method"""
+    return text.translate(TEXT_ENCODE_TABLE)
+
+
+def bench(name: str, func, number: int) -> float:
+    """Time a function and print the result; return seconds per call"""
+    per_call = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f'  {name:<12} {per_call * 1000:9.3f} ms')
+    return per_call
+
+
+def main() -> None:
+    num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    pool, spans, text = make_pool(num_entries)
+
+    assert decode_per_byte(pool, spans) == decode_table(pool, spans)
+    assert encode_per_byte(text) == encode_table(text)
+
+    print(f'Decoding {num_entries} names ({len(pool)} bytes):')
+    old = bench('per-byte', lambda: decode_per_byte(pool, spans), 3)
+    new = bench('table', lambda: decode_table(pool, spans), 3)
+    print(f'  speedup      {old / new:9.1f}x')
+
+    print(f'Encoding {num_entries} names ({len(text)} bytes):')
+    old = bench('per-byte', lambda: encode_per_byte(text), 3)
+    new = bench('table', lambda: encode_table(text), 3)
+    print(f'  speedup      {old / new:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# run_benchmarks.py
+# Times the main codec, index and GUI code paths on synthetic files of
+# increasing size, and compares the results against a saved baseline.
+# The GUI benchmarks use Qt's offscreen platform, so no display is
+# needed, and are skipped if PyQt isn't installed.
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py --baseline
+#
+# compares against benchmarks/baseline.json, the saved baseline, and
+# exits with an error if anything got slower than it by more than
+# --threshold (default: 20%). Timings depend on the machine, so for
+# comparisons that mean something, make a baseline of your own before
+# changing anything:
+#
+#   python benchmarks/run_benchmarks.py --output my_baseline.json
+#   (make some changes)
+#   python benchmarks/run_benchmarks.py --baseline my_baseline.json
+#
+# To update the saved baseline, run with
+# "--output benchmarks/baseline.json" and commit the result.
+
+
+################################################################
+################################################################
+
+
+import argparse
+import json
+import os
+import os.path
+import platform
+import sys
+import time
+import timeit
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from level_info import LevelInfoFile
+from level_info_index import ObjectIndex
+from level_info_lint import Validator
+from level_info_search import SearchIndex
+from synthetic import make_file
+
+
+# (number of worlds, levels per world) of each synthetic file
+SIZES = [(1, 100), (10, 100), (100, 100), (1000, 100)]
+
+# Version of the results file format
+RESULTS_VERSION = 1
+
+# The saved baseline, used by --baseline if no file is given
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# A benchmark: (name, function to time)
+Benchmark = Tuple[str, Callable[[], object]]
+
+
+def codec_benchmarks(file: LevelInfoFile) -> Iterator[Benchmark]:
+    """Yield benchmarks for level_info.py"""
+    data = file.save()
+    yield 'from_data', lambda: LevelInfoFile.from_data(data)
+    yield 'save', file.save
+    yield 'get_comments_offset', file.get_comments_offset
+    yield 'round_trip', lambda: LevelInfoFile.from_data(data).save()
+
+
+def index_benchmarks(file: LevelInfoFile) -> Iterator[Benchmark]:
+    """Yield benchmarks for the indexes that LoadThread builds"""
+    yield 'ObjectIndex', lambda: ObjectIndex(file)
+    object_index = ObjectIndex(file)
+    yield 'SearchIndex', lambda: SearchIndex(object_index)
+    yield 'Validator', lambda: Validator(object_index)
+
+
+def gui_benchmarks(file: LevelInfoFile) -> Iterator[Benchmark]:
+    """Yield benchmarks for LevelInfoViewer, if PyQt is installed"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from level_info_editor import QtWidgets, LevelInfoViewer
+    except ImportError as e:
+        print(f'Skipping the GUI benchmarks: {e}', file=sys.stderr)
+        return
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    view = LevelInfoViewer()
+
+    # Like after loading a file, the indexes are built beforehand (see
+    # index_benchmarks())
+    object_index = ObjectIndex(file)
+    indexes = object_index, SearchIndex(object_index), Validator(object_index)
+    def set_file():
+        view.set_file(file, *indexes)
+        app.processEvents()
+    yield 'set_file', set_file
+
+    def update_names():
+        view.update_names()
+        app.processEvents()
+    yield 'update_names', update_names
+
+    # Switch between the first and last worlds, so the level list
+    # really changes each time
+    rows = [0, max(len(file.worlds) - 1, 0)]
+    def handle_world_select():
+        rows.reverse()
+        view.world_picker.set_current_row(rows[0])
+        view.handle_world_select()
+        app.processEvents()
+    yield 'handle_world_select', handle_world_select
+
+    # Rename a level back and forth, and update the problem list as the
+    # editor does after each edit (the renames are merged into one undo
+    # step, so the undo stack doesn't grow)
+    view.handle_tab_change(view.tab.indexOf(view.problems_box))
+    level = file.worlds[0].levels[0]
+    names = [level.name + ' (edited)', level.name]
+    def edit():
+        names.reverse()
+        view.edit([(level, 'name', names[0])], can_merge=True)
+        view.update_problems()
+        app.processEvents()
+    yield 'edit', edit
+
+
+def time_call(func: Callable[[], object], repeat: int) -> float:
+    """Return the fastest time for one call of a function, in seconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(sizes: List[Tuple[int, int]], gui: bool, name_filter: Optional[str], repeat: int) -> Dict[str, float]:
+    """Run the benchmarks, printing the results as they finish"""
+    results = {}
+    for num_worlds, levels_per_world in sizes:
+        file = make_file(num_worlds, levels_per_world)
+
+        benchmarks = list(codec_benchmarks(file))
+        benchmarks.extend(index_benchmarks(file))
+        if gui:
+            benchmarks.extend(gui_benchmarks(file))
+
+        for name, func in benchmarks:
+            name = f'{name}[{num_worlds}x{levels_per_world}]'
+            if name_filter is not None and name_filter not in name:
+                continue
+            results[name] = time_call(func, repeat)
+            print(f'{name:<36} {results[name] * 1000:11.3f} ms', flush=True)
+
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Print how the results compare to a baseline, and return the names
+    of the benchmarks that got slower by more than the threshold"""
+    regressions = []
+    print()
+    print(f'{"":<36} {"baseline":>11}    {"now":>11}    change')
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        change = seconds / baseline[name] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<36} {baseline[name] * 1000:11.3f} ms {seconds * 1000:11.3f} ms {change:+8.1%}{flag}')
+    return regressions
+
+
+def load_results(path: str) -> Dict[str, float]:
+    """Load a results file written by --output"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError(f'{path} is not a results file from this version of run_benchmarks.py')
+    return data['results']
+
+
+def save_results(path: str, results: Dict[str, float]) -> None:
+    """Save results to a file that can be used as a baseline later"""
+    data = {
+        'version': RESULTS_VERSION,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark Level Info Editor on synthetic files')
+    parser.add_argument('--output', metavar='FILE',
+        help='save the results to this file (as JSON)')
+    parser.add_argument('--baseline', nargs='?', const=BASELINE_PATH, metavar='FILE',
+        help='compare the results against a file saved with --output (default: benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type=float, default=0.2, metavar='FRACTION',
+        help='how much slower than the baseline counts as a regression (default: 0.2)')
+    parser.add_argument('--max-levels', type=int, metavar='N',
+        help='skip files with more than this many levels')
+    parser.add_argument('--filter', metavar='TEXT',
+        help='only run benchmarks whose names contain this text')
+    parser.add_argument('--no-gui', action='store_true',
+        help='skip the GUI benchmarks')
+    parser.add_argument('--repeat', type=int, default=5, metavar='N',
+        help='number of timing runs to take the fastest of (default: 5)')
+    args = parser.parse_args()
+
+    # Load the baseline first, so a bad path doesn't waste a whole run
+    baseline = load_results(args.baseline) if args.baseline is not None else None
+
+    sizes = [(w, l) for w, l in SIZES if args.max_levels is None or w * l <= args.max_levels]
+    results = run(sizes, not args.no_gui, args.filter, args.repeat)
+
+    if args.output is not None:
+        save_results(args.output, results)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} benchmark(s) got slower by more than {args.threshold:.0%}')
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# synthetic.py
+# Generates synthetic LevelInfo files for the benchmarks.
+
+
+################################################################
+################################################################
+
+
+import os.path
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from level_info import LevelInfo, WorldInfo, LevelInfoFile
+
+
+def make_file(num_worlds: int, levels_per_world: int, seed: int = 0) -> LevelInfoFile:
+    """Create a LevelInfoFile full of random (but valid) data"""
+    rng = random.Random(seed)
+    file = LevelInfoFile(comments='Synthetic file for benchmarking')
+
+    for w in range(num_worlds):
+        world = WorldInfo(
+            world_number=(w % 255) + 1,
+            has_left=True,
+            has_right=bool(w % 2),
+            name_left=f'World {w + 1}',
+            name_right=(f'World {w + 1} Part 2' if w % 2 else ''))
+
+        for l in range(levels_per_world):
+            level = LevelInfo(
+                name=f'Level {w + 1}-{l + 1}' + ' Extra' * rng.randrange(4),
+                file_world=rng.randrange(1, 256),
+                file_level=rng.randrange(1, 256),
+                display_world=rng.randrange(256),
+                display_level=rng.randrange(100))
+            level.flags = rng.choice((0x0000, 0x0002, 0x0012, 0x0032, 0x0412))
+            world.levels.append(level)
+
+        file.worlds.append(world)
+
+    return file
@@ -94,8 +94,9 @@ print('>> Populating excludes and includes...')
 print('>>')
 
 # Excludes
+# (multiprocessing and socket are needed for the batch mode's process pool)
 excludes = ['calendar', 'datetime', 'difflib', 'doctest',
-    'multiprocessing', 'optpath', 'os2emxpath', 'pdb', 'socket', 'ssl',
+    'optpath', 'os2emxpath', 'pdb', 'ssl',
     'unittest',
     'FixTk', 'tcl', 'tk', '_tkinter', 'tkinter', 'Tkinter']
 
@@ -21,7 +21,7 @@ EXTRA_IMPORT_PATHS = []
 USE_PYQT = True
 USE_NSMBLIB = False
 
-EXCLUDE_HASHLIB = True
+EXCLUDE_HASHLIB = False  # needed for the crash recovery journal
 EXCLUDE_INSPECT = False  # needed for dataclasses
 
 # macOS only
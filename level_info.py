@@ -0,0 +1,864 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# level_info.py
+# Reads and writes LevelInfo.bin. This module doesn't depend on Qt, so
+# it can be imported by command-line tools and scripts without loading
+# the GUI.
+
+
+################################################################
+################################################################
+
+
+import bisect
+import collections
+import collections.abc
+import dataclasses
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+# Anything from_data() can read from
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Called with (bytes written, total bytes) while writing files
+ProgressCallback = Callable[[int, int], None]
+
+# Called with (world index, number of worlds, world) as each world is
+# decoded while loading a file
+WorldCallback = Callable[[int, int, 'WorldInfo'], None]
+
+
+# Options for the LevelInfo and WorldInfo dataclasses. On Python 3.10
+# and newer, their instances use __slots__ instead of a __dict__, which
+# makes huge files take much less memory.
+COMPACT_DATACLASS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+# Text in LevelInfo.bin is stored with 0x30 subtracted from each byte.
+# These translation tables convert a whole buffer at once with
+# bytes.translate(), which is much faster than a per-byte loop.
+TEXT_DECODE_TABLE = bytes((c + 0x30) & 0xff for c in range(256))
+TEXT_ENCODE_TABLE = bytes((c - 0x30) & 0xff for c in range(256))
+
+# Each world's data is a level count followed by one of these per level
+# (and per world half). The fields are: file world and level (minus
+# one), display world and level, text length, flags and text offset.
+LEVEL_ENTRY_STRUCT = struct.Struct('>5BxHI')
+
+
+def read_world_entries(view: memoryview, world_offset: int) -> List[tuple]:
+    """Unpack the LEVEL_ENTRY_STRUCT entries of the world at world_offset"""
+    num_levels, = struct.unpack_from('>I', view, world_offset)
+
+    entries_start = world_offset + 4
+    entries_end = entries_start + num_levels * LEVEL_ENTRY_STRUCT.size
+    if entries_end > len(view):
+        raise struct.error('level entries extend past the end of the file')
+
+    return list(LEVEL_ENTRY_STRUCT.iter_unpack(view[entries_start : entries_end]))
+
+
+class LevelEntry(NamedTuple):
+    """A raw LEVEL_ENTRY_STRUCT entry, as yielded by
+    LevelInfoFile.iter_entries(). The file numbers are stored minus one,
+    exactly as they are in the file."""
+    world_index: int
+    file_name_w: int
+    file_name_l: int
+    display_name_w: int
+    display_name_l: int
+    text_len: int
+    flags: int
+    text_offs: int
+    text: str
+
+    @property
+    def is_world_header(self) -> bool:
+        """Whether this is a world half header rather than a level"""
+        return self.display_name_l >= 100
+
+
+def find_null(view: memoryview, start: int, chunk_size: int = 256) -> int:
+    """Find the first null byte at or after start, without copying more
+    of the view than necessary. Returns len(view) if there isn't one."""
+    for chunk_start in range(start, len(view), chunk_size):
+        index = bytes(view[chunk_start : chunk_start + chunk_size]).find(b'\0')
+        if index != -1:
+            return chunk_start + index
+    return len(view)
+
+
+def get_move_start(rows: List[int], destination: int) -> int:
+    """Return the row that the first of some rows ends up at after
+    move_items()"""
+    return destination - bisect.bisect_left(rows, destination)
+
+
+def move_items(items: list, rows: List[int], destination: int) -> None:
+    """Move the items at some rows (sorted, without duplicates) so that
+    they're together, in their current order, before the item that's at
+    destination now. Only the moved items are handled one by one; the
+    rest of the list is copied in slices."""
+    moving = [items[row] for row in rows]
+    rest = []
+    start = 0
+    for row in rows:
+        rest += items[start:row]
+        start = row + 1
+    rest += items[start:]
+
+    start = get_move_start(rows, destination)
+    rest[start:start] = moving
+    items[:] = rest
+
+
+def unmove_items(items: list, rows: List[int], destination: int) -> None:
+    """Undo move_items(), putting the moved items back at their rows"""
+    start = get_move_start(rows, destination)
+    moving = items[start : start + len(rows)]
+    rest = items[:start] + items[start + len(rows):]
+
+    result = []
+    start = 0
+    for i, row in enumerate(rows):
+        # i of the items before this one are moved ones
+        result += rest[start : row - i]
+        result.append(moving[i])
+        start = row - i
+    result += rest[start:]
+    items[:] = result
+
+
+def get_moved_row(row: int, rows: List[int], destination: int) -> int:
+    """Return the row that the item at a row ends up at after
+    move_items()"""
+    i = bisect.bisect_left(rows, row)
+    start = get_move_start(rows, destination)
+    if i < len(rows) and rows[i] == row:
+        return start + i
+    row -= i
+    return row if row < start else row + len(rows)
+
+
+def get_unmoved_row(row: int, rows: List[int], destination: int) -> int:
+    """Return the row that the item at a row ends up at after
+    unmove_items()"""
+    start = get_move_start(rows, destination)
+    if start <= row < start + len(rows):
+        return rows[row - start]
+    if row >= start:
+        row -= len(rows)
+
+    # It goes in the row-th row that isn't one of the moved ones
+    for moved_row in rows:
+        if moved_row > row: break
+        row += 1
+    return row
+
+
+def write_file_atomic(path: str, data: Buffer, progress: Optional[ProgressCallback] = None,
+                      chunk_size: int = 0x100000) -> None:
+    """Write data to a file without ever leaving it half-written. The
+    data goes to a temporary file in the same folder, which is flushed
+    to disk and then renamed over the original."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(
+        prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+
+    try:
+        with os.fdopen(fd, 'wb') as f, memoryview(data) as view:
+            for start in range(0, len(view), chunk_size):
+                f.write(view[start : start + chunk_size])
+                if progress is not None:
+                    progress(min(start + chunk_size, len(view)), len(view))
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep the original file's permissions
+        try:
+            shutil.copymode(path, temp_path)
+        except OSError:
+            pass
+
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make sure the rename itself is on disk (not possible on Windows)
+    if hasattr(os, 'O_DIRECTORY'):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+@dataclasses.dataclass(**COMPACT_DATACLASS)
+class LevelInfo():
+    """Represents a level"""
+    name: str = ''
+    file_world: int = 0
+    file_level: int = 0
+    display_world: int = 0
+    display_level: int = 0
+    in_star_coins_menu: bool = True
+    has_normal_exit: bool = False
+    has_secret_exit: bool = False
+    is_right_side: bool = False
+
+    @property
+    def flags(self) -> int:
+        flags = 0
+        if self.in_star_coins_menu: flags |= 0x0002
+        if self.has_normal_exit:    flags |= 0x0010
+        if self.has_secret_exit:    flags |= 0x0020
+        if self.is_right_side:      flags |= 0x0400
+        return flags
+    @flags.setter
+    def flags(self, value: int) -> None:
+        self.in_star_coins_menu = bool(value & 0x0002)
+        self.has_normal_exit    = bool(value & 0x0010)
+        self.has_secret_exit    = bool(value & 0x0020)
+        self.is_right_side      = bool(value & 0x0400)
+
+
+@dataclasses.dataclass(**COMPACT_DATACLASS)
+class WorldInfo():
+    """Represents a world"""
+    world_number: Optional[int] = None
+    has_left: bool = False
+    has_right: bool = False
+    name_left: str = ''
+    name_right: str = ''
+    levels: List[LevelInfo] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def from_entries(cls, entries: List[tuple], text_pool: bytes, text_pool_offs: int) -> 'WorldInfo':
+        """Create a WorldInfo from unpacked LEVEL_ENTRY_STRUCT tuples.
+        text_pool is decoded text starting at file offset text_pool_offs."""
+        world = cls()
+
+        for (
+            file_name_w, file_name_l,
+            display_name_w, display_name_l,
+            text_len, flags, text_offs,
+        ) in entries:
+            text_offs -= text_pool_offs
+            text = text_pool[text_offs : text_offs + text_len].decode('ascii')
+
+            # Add header info or levels
+            if display_name_l >= 100:
+                # It's a world header
+                world.world_number = display_name_w
+                if display_name_l == 100:
+                    world.has_left = True
+                    world.name_left = text
+                else:
+                    world.has_right = True
+                    world.name_right = text
+            else:
+                # It's a real level
+                world.levels.append(LevelInfo(
+                    name=text,
+                    file_world=(file_name_w + 1),
+                    file_level=(file_name_l + 1),
+                    display_world=display_name_w,
+                    display_level=display_name_l))
+                world.levels[-1].flags = flags
+
+        return world
+
+
+@dataclasses.dataclass
+class LevelInfoFile():
+    """Represents LevelInfo.bin"""
+    worlds: List[WorldInfo] = dataclasses.field(default_factory=list)
+    comments: str = ''
+
+    @classmethod
+    def from_data(cls, data: Buffer, world_loaded: Optional[WorldCallback] = None) -> 'LevelInfoFile':
+        """Create a LevelInfoFile from file data. This accepts any
+        bytes-like object, including memoryview and mmap.mmap, and
+        doesn't copy any of it other than the level names. world_loaded
+        is called with each world as soon as it's decoded."""
+        with memoryview(data) as view:
+            return cls._from_view(view, world_loaded)
+
+    @classmethod
+    def from_path(cls, path: str, world_loaded: Optional[WorldCallback] = None) -> 'LevelInfoFile':
+        """Create a LevelInfoFile by memory-mapping a file"""
+        with open(path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be memory-mapped
+                return cls.from_data(f.read(), world_loaded)
+
+        with mm:
+            return cls.from_data(mm, world_loaded)
+
+    @classmethod
+    def _from_view(cls, view: memoryview, world_loaded: Optional[WorldCallback] = None) -> 'LevelInfoFile':
+        """Implementation of from_data()"""
+
+        # Check for the file header
+        if view[:4] != b'NWRp':
+            return
+
+        magic, num_worlds = struct.unpack_from('>4sI', view, 0)
+        world_offsets = struct.unpack_from(f'>{num_worlds}I', view, 0x08)
+
+        # Read the raw level entries for every world
+        min_text_offs = 0xFFFFFFFF
+        max_text_end = 0
+        world_entries = []
+        for world_offset in world_offsets:
+            entries = read_world_entries(view, world_offset)
+            for entry in entries:
+                min_text_offs = min(min_text_offs, entry[6])
+                max_text_end = max(max_text_end, entry[6] + entry[4])
+            world_entries.append(entries)
+
+        # Decode the whole string pool at once; each entry's text is
+        # sliced out of it below. Only the bytes actually referenced by
+        # the entries are copied, so trailing data isn't.
+        text_pool = bytes(view[min_text_offs : max_text_end]).translate(TEXT_DECODE_TABLE)
+
+        # Load the worlds
+        worlds = []
+        for entries in world_entries:
+            worlds.append(WorldInfo.from_entries(entries, text_pool, min_text_offs))
+            if world_loaded is not None:
+                world_loaded(len(worlds) - 1, len(world_entries), worlds[-1])
+
+        # Create instance
+        self = cls(worlds)
+
+        # Get the comments
+        self.comments = str(view[self.get_comments_offset() : min_text_offs - 1], 'ascii')
+
+        return self
+
+    @staticmethod
+    def iter_entries(data: Buffer) -> Iterator[LevelEntry]:
+        """Yield every entry in file data as a LevelEntry, one at a time,
+        without building any WorldInfo or LevelInfo objects. Memory use
+        doesn't depend on the number of entries. Yields nothing if the
+        data isn't a LevelInfo.bin file."""
+        with memoryview(data) as view:
+            if view[:4] != b'NWRp':
+                return
+
+            num_worlds, = struct.unpack_from('>I', view, 4)
+            for world_index in range(num_worlds):
+                world_offset, = struct.unpack_from('>I', view, 8 + world_index * 4)
+                num_levels, = struct.unpack_from('>I', view, world_offset)
+
+                entries_start = world_offset + 4
+                entries_end = entries_start + num_levels * LEVEL_ENTRY_STRUCT.size
+                if entries_end > len(view):
+                    raise struct.error('level entries extend past the end of the file')
+
+                for entry in LEVEL_ENTRY_STRUCT.iter_unpack(view[entries_start : entries_end]):
+                    text_offs, text_len = entry[6], entry[4]
+                    text = bytes(view[text_offs : text_offs + text_len]).translate(TEXT_DECODE_TABLE)
+                    yield LevelEntry(world_index, *entry, text.decode('ascii'))
+
+    def get_comments_offset(self) -> int:
+        """Calculate the offset of the comments data"""
+        # I'm trying to make this as easy-to-read as possible.
+        offset = 0
+
+        offset += 4  # "NWRp" text
+        offset += 4  # Number-of-worlds bytes
+        for world in self.worlds:
+            offset += 4  # Offset to the world data in the file header
+            offset += 4  # Number-of-levels bytes
+
+            if world.has_left: offset += 12  # Data for that takes 12 bytes
+            if world.has_right: offset += 12  # Same as above
+            for level in world.levels:
+                offset += 12  # Each level is 12 bytes
+
+        return offset
+
+    def save(self) -> bytes:
+        """Return LevelInfo.bin file data"""
+
+        # Sizing pass: count the entries in each world and collect all
+        # of the text, in the same order the entries will be written
+        world_entry_counts = []
+        names = []
+        for world in self.worlds:
+            if world.has_left: names.append(world.name_left)
+            if world.has_right: names.append(world.name_right)
+            names.extend(level.name for level in world.levels)
+            world_entry_counts.append(len(world.levels) + world.has_left + world.has_right)
+
+        # Encode all of the text at once. Each string is null-terminated,
+        # so join them with nulls and add one more at the end.
+        names.append('')
+        text = '\0'.join(names).encode('ascii').translate(TEXT_ENCODE_TABLE)
+        comments = self.comments.encode('ascii') + b'\0'
+
+        # Work out where everything goes
+        world_table_size = 8 + 4 * len(self.worlds)  # "NWRp", number of worlds, world offsets
+        comments_offs = world_table_size + sum(4 + n * LEVEL_ENTRY_STRUCT.size for n in world_entry_counts)
+        text_start = comments_offs + len(comments)
+
+        # Fill in a preallocated buffer
+        result = bytearray(text_start + len(text))
+        struct.pack_into('>4sI', result, 0, b'NWRp', len(self.worlds))
+
+        current_offs = world_table_size
+        current_text_offs = text_start
+        for i, (world, num_entries) in enumerate(zip(self.worlds, world_entry_counts)):
+            # World offset and number-of-levels value
+            struct.pack_into('>I', result, 8 + i * 4, current_offs)
+            struct.pack_into('>I', result, current_offs, num_entries)
+            current_offs += 4
+
+            # Entries for each world half
+            for exists, name, is_right in ((world.has_left, world.name_left, False),
+                                           (world.has_right, world.name_right, True)):
+                if not exists: continue
+                LEVEL_ENTRY_STRUCT.pack_into(result, current_offs,
+                    98, 98,  # filename: 98-98
+                    world.world_number, (101 if is_right else 100),  # display name: WN-100
+                    len(name),
+                    (0x400 if is_right else 0),
+                    current_text_offs)
+                current_offs += LEVEL_ENTRY_STRUCT.size
+                current_text_offs += len(name) + 1
+
+            # Entries for each level
+            for level in world.levels:
+                LEVEL_ENTRY_STRUCT.pack_into(result, current_offs,
+                    (level.file_world - 1) & 0xff, (level.file_level - 1) & 0xff,
+                    level.display_world, level.display_level,
+                    len(level.name),
+                    level.flags,
+                    current_text_offs)
+                current_offs += LEVEL_ENTRY_STRUCT.size
+                current_text_offs += len(level.name) + 1
+
+        # Add the comments and text
+        result[comments_offs : text_start] = comments
+        result[text_start:] = text
+        del names, text  # free these before making the final copy
+
+        return bytes(result)
+
+
+class LazyWorldList(collections.abc.MutableSequence):
+    """A list of WorldInfos that decodes each world from the file data
+    the first time it's accessed"""
+    def __init__(self, view: memoryview, world_offsets: Iterable[int]):
+        self.view = view
+        self.world_offsets = list(world_offsets)
+        self.worlds = [None] * len(self.world_offsets)
+
+    def is_loaded(self, index: int) -> bool:
+        """Check if the world at this index has been decoded yet"""
+        return self.worlds[index] is not None
+
+    def load(self, index: int) -> WorldInfo:
+        """Decode the world at this index"""
+        entries = read_world_entries(self.view, self.world_offsets[index])
+
+        # Only decode the part of the string pool this world uses
+        if entries:
+            text_start = min(e[6] for e in entries)
+            text_end = max(e[6] + e[4] for e in entries)
+        else:
+            text_start = text_end = 0
+        text_pool = bytes(self.view[text_start : text_end]).translate(TEXT_DECODE_TABLE)
+
+        world = WorldInfo.from_entries(entries, text_pool, text_start)
+        self.worlds[index] = world
+        return world
+
+    def __len__(self) -> int:
+        return len(self.worlds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        world = self.worlds[index]
+        if world is None:
+            world = self.load(index % len(self))
+        return world
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            value = list(value)
+            self.worlds[index] = value
+            self.world_offsets[index] = [None] * len(value)
+        else:
+            self.worlds[index] = value
+            self.world_offsets[index] = None
+
+    def __delitem__(self, index) -> None:
+        del self.worlds[index]
+        del self.world_offsets[index]
+
+    def insert(self, index: int, value: WorldInfo) -> None:
+        self.worlds.insert(index, value)
+        self.world_offsets.insert(index, None)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, collections.abc.Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        loaded = sum(1 for w in self.worlds if w is not None)
+        return f'<LazyWorldList: {loaded}/{len(self)} worlds loaded>'
+
+
+class LazyLevelInfoFile(LevelInfoFile):
+    """A LevelInfoFile that only reads the header and world offsets up
+    front, and decodes each world the first time it's accessed. The data
+    passed to from_data() must stay valid for as long as this is used.
+
+    Comments are read up to their null terminator, which is the same as
+    what LevelInfoFile.from_data() finds for any file this program saves."""
+
+    @classmethod
+    def from_data(cls, data: Buffer) -> 'LazyLevelInfoFile':
+        """Create a LazyLevelInfoFile from file data"""
+        view = memoryview(data)
+
+        # Check for the file header
+        if view[:4] != b'NWRp':
+            return
+
+        magic, num_worlds = struct.unpack_from('>4sI', view, 0)
+        world_offsets = struct.unpack_from(f'>{num_worlds}I', view, 0x08)
+
+        # The comments come right after the last world's entries
+        comments_offs = 8
+        for world_offset in world_offsets:
+            num_levels, = struct.unpack_from('>I', view, world_offset)
+            comments_offs += 4 + 4 + num_levels * LEVEL_ENTRY_STRUCT.size
+
+        comments_end = find_null(view, comments_offs)
+
+        self = cls(LazyWorldList(view, world_offsets))
+        self.comments = str(view[comments_offs : comments_end], 'ascii')
+        return self
+
+    @classmethod
+    def from_path(cls, path: str) -> 'LazyLevelInfoFile':
+        """Create a LazyLevelInfoFile from a file on disk"""
+        # A memory map would have to stay open for as long as this
+        # object exists, so just read the file instead
+        with open(path, 'rb') as f:
+            return cls.from_data(f.read())
+
+
+def get_loader() -> Callable[[Buffer], Optional[LevelInfoFile]]:
+    """Return the function load_file() uses: level_info_numpy.from_data()
+    if NumPy is installed, and LevelInfoFile.from_data() if it isn't.
+    Importing NumPy takes a while the first time, so code that times
+    loading should call this before it starts the clock."""
+    try:
+        import level_info_numpy
+    except ImportError:
+        return LevelInfoFile.from_data
+    return level_info_numpy.from_data
+
+
+def load_file(data: Buffer) -> Optional[LevelInfoFile]:
+    """Create a LevelInfoFile from file data, using level_info_numpy if
+    NumPy is installed, and LevelInfoFile.from_data() if it isn't"""
+    return get_loader()(data)
+
+
+def load_path(path: str) -> Optional[LevelInfoFile]:
+    """Like load_file(), but for a file on disk"""
+    try:
+        import level_info_numpy
+    except ImportError:
+        return LevelInfoFile.from_path(path)
+
+    # NumPy's arrays would keep a memory map from being closed if
+    # decoding fails partway through, so just read the file instead
+    with open(path, 'rb') as f:
+        return level_info_numpy.from_data(f.read())
+
+
+class LevelInfoPatcher():
+    """Saves a LevelInfoFile back to the file it was loaded from, only
+    rewriting the bytes of entries that have changed when possible.
+
+    Call mark_dirty() with each LevelInfo or WorldInfo after editing it.
+    If no worlds or levels were added, removed or reordered, and no
+    string changed length, save() overwrites just the affected 12-byte
+    entries and text in place. Otherwise, it rewrites the whole file."""
+
+    def __init__(self, file: LevelInfoFile, path: str, data: Optional[Buffer] = None):
+        """data should be the current contents of the file at path. If
+        it's not given, the first save rewrites the whole file."""
+        self.file = file
+        self.path = path
+        self.dirty = {}
+        self.snapshot = []
+        self.file_stat = None
+
+        if data is not None:
+            self.read_layout(data)
+
+    @classmethod
+    def from_path(cls, file: LevelInfoFile, path: str) -> 'LevelInfoPatcher':
+        """Create a LevelInfoPatcher for the file at path, which file
+        was loaded from"""
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return cls(file, path, mm)
+
+    def read_layout(self, data: Buffer) -> None:
+        """Record where each world's and level's data is in the file"""
+        # (entry offset, text offset, text length) for each level, and
+        # lists of them for each world's headers, keyed by object id
+        self.level_locations = {}
+        self.header_locations = {}
+
+        # The file structure at the time the layout was read, so that
+        # structural changes can be detected
+        self.snapshot = []
+
+        text_offs_counts = collections.Counter()
+
+        with memoryview(data) as view:
+            num_worlds, = struct.unpack_from('>I', view, 4)
+            if num_worlds != len(self.file.worlds):
+                raise ValueError('file data does not match the LevelInfoFile')
+
+            min_text_offs = 0xFFFFFFFF
+            for world_index, world in enumerate(self.file.worlds):
+                world_offset, = struct.unpack_from('>I', view, 8 + world_index * 4)
+                entries = read_world_entries(view, world_offset)
+
+                headers = {False: [], True: []}
+                levels = iter(world.levels)
+                for i, entry in enumerate(entries):
+                    location = (world_offset + 4 + i * LEVEL_ENTRY_STRUCT.size, entry[6], entry[4])
+                    text_offs_counts[entry[6]] += 1
+                    min_text_offs = min(min_text_offs, entry[6])
+
+                    if entry[3] >= 100:
+                        headers[entry[3] != 100].append(location)
+                    else:
+                        level = next(levels, None)
+                        if level is None:
+                            raise ValueError('file data does not match the LevelInfoFile')
+                        self.level_locations[id(level)] = location
+
+                if next(levels, None) is not None:
+                    raise ValueError('file data does not match the LevelInfoFile')
+
+                self.header_locations[id(world)] = headers
+                self.snapshot.append((world, world.has_left, world.has_right, list(world.levels)))
+
+            # Text that's shared between several entries can't be patched
+            self.shared_text = {offs for offs, count in text_offs_counts.items() if count > 1}
+
+            self.comments = self.file.comments
+            self.comments_offs = self.file.get_comments_offset()
+            self.comments_len = min_text_offs - 1 - self.comments_offs
+
+        self.dirty.clear()
+        self.file_stat = self.get_file_stat()
+
+    def get_file_stat(self) -> Optional[Tuple[int, int]]:
+        """Return the size and modification time of the file on disk"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def mark_dirty(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Note that a level or world has been edited"""
+        self.dirty[id(obj)] = obj
+
+    def structure_unchanged(self) -> bool:
+        """Check if the worlds and levels are still the same objects, in
+        the same order, with the same world halves as in the layout"""
+        if len(self.file.worlds) != len(self.snapshot):
+            return False
+
+        for world, (old_world, has_left, has_right, levels) in zip(self.file.worlds, self.snapshot):
+            if world is not old_world:
+                return False
+            if world.has_left != has_left or world.has_right != has_right:
+                return False
+            if len(world.levels) != len(levels):
+                return False
+            if not all(a is b for a, b in zip(world.levels, levels)):
+                return False
+
+        return True
+
+    def entry_patches(self, location: tuple, file_w: int, file_l: int, display_w: int, display_l: int,
+                      flags: int, name: str) -> Optional[List[Tuple[int, bytes]]]:
+        """Return patches for one entry, or None if its text can't be
+        rewritten in place"""
+        entry_offs, text_offs, text_len = location
+        if len(name) != text_len or text_offs in self.shared_text:
+            return None
+
+        return [
+            (entry_offs, LEVEL_ENTRY_STRUCT.pack(
+                file_w, file_l, display_w, display_l, text_len, flags, text_offs)),
+            (text_offs, name.encode('ascii').translate(TEXT_ENCODE_TABLE)),
+        ]
+
+    def get_patches(self) -> Optional[List[Tuple[int, bytes]]]:
+        """Return a list of (offset, data) patches that would bring the
+        file on disk up to date, or None if it has to be rebuilt"""
+        if self.file_stat is None or self.get_file_stat() != self.file_stat:
+            # Never saved, or changed by something else since we last
+            # saved it
+            return None
+        if not self.structure_unchanged():
+            return None
+
+        patches = []
+
+        if self.file.comments != self.comments:
+            comments = self.file.comments.encode('ascii')
+            if len(comments) != self.comments_len:
+                return None
+            patches.append((self.comments_offs, comments))
+
+        for obj in self.dirty.values():
+            if isinstance(obj, LevelInfo):
+                location = self.level_locations.get(id(obj))
+                if location is None:
+                    return None
+                new_patches = self.entry_patches(location,
+                    (obj.file_world - 1) & 0xff, (obj.file_level - 1) & 0xff,
+                    obj.display_world, obj.display_level,
+                    obj.flags, obj.name)
+                if new_patches is None:
+                    return None
+                patches.extend(new_patches)
+
+            else:
+                headers = self.header_locations.get(id(obj))
+                if headers is None:
+                    return None
+                for is_right, locations in headers.items():
+                    name = obj.name_right if is_right else obj.name_left
+                    for location in locations:
+                        new_patches = self.entry_patches(location,
+                            98, 98,  # filename: 98-98
+                            obj.world_number, (101 if is_right else 100),  # display name: WN-100
+                            (0x400 if is_right else 0), name)
+                        if new_patches is None:
+                            return None
+                        patches.extend(new_patches)
+
+        return patches
+
+    def prepare_save(self) -> 'PendingSave':
+        """Decide what needs to be written to save the file, and update
+        the layout as if it had been. This is the only part of saving
+        that reads the LevelInfoFile, so the file can be edited again
+        while the PendingSave is being written. Call finish_save()
+        afterwards."""
+        patches = self.get_patches()
+
+        if patches is None:
+            data = self.file.save()
+            self.read_layout(data)
+            return PendingSave(self.path, data=data)
+
+        self.comments = self.file.comments
+        self.dirty.clear()
+        return PendingSave(self.path, patches=patches)
+
+    def finish_save(self, success: bool) -> None:
+        """Update the saved file information after writing a
+        PendingSave. If the write failed, the next save rewrites the
+        whole file."""
+        self.file_stat = self.get_file_stat() if success else None
+
+    def save(self) -> bool:
+        """Save the file, in place if possible. Returns True if it was
+        patched, or False if it had to be completely rewritten."""
+        pending = self.prepare_save()
+        try:
+            pending.write()
+        except BaseException:
+            self.finish_save(False)
+            raise
+        self.finish_save(True)
+        return pending.data is None
+
+
+@dataclasses.dataclass
+class PendingSave():
+    """Data that LevelInfoPatcher.prepare_save() decided to write: either
+    a whole new file, or a list of (offset, data) patches"""
+    path: str
+    data: Optional[bytes] = None
+    patches: List[Tuple[int, bytes]] = dataclasses.field(default_factory=list)
+
+    def write(self, progress: Optional[ProgressCallback] = None) -> None:
+        """Write the data to disk"""
+        if self.data is not None:
+            # Never truncate the original before the new data is safely
+            # on disk
+            write_file_atomic(self.path, self.data, progress)
+            return
+
+        total = sum(len(patch) for offset, patch in self.patches)
+        done = 0
+        with open(self.path, 'r+b') as f:
+            for offset, patch in self.patches:
+                f.seek(offset)
+                f.write(patch)
+                done += len(patch)
+                if progress is not None:
+                    progress(done, total)
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,375 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# level_info_cli.py
+# Command-line interface for Level Info Editor. This can be run directly,
+# or through level_info_editor.py by passing a command name as the first
+# argument.
+
+
+################################################################
+################################################################
+
+
+import argparse
+import concurrent.futures
+import dataclasses
+import glob
+import os.path
+import struct
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import level_info
+import level_info_diff
+import level_info_lint
+import level_info_profile
+from level_info import LevelInfoFile, write_file_atomic
+
+
+# Names of the commands handled by main(). level_info_editor.py checks
+# its first argument against this to decide whether to start the GUI.
+COMMANDS = ('batch', 'lint', 'diff', 'merge')
+
+
+@dataclasses.dataclass
+class BatchResult():
+    """Result of processing one file in batch mode"""
+    path: str
+    input_size: int = 0
+    output_size: int = 0
+    parse_time: float = 0.0
+    save_time: float = 0.0
+    round_trip_ok: bool = False
+    error: Optional[str] = None
+
+
+def expand_patterns(patterns: List[str]) -> List[str]:
+    """Expand glob patterns into a sorted list of unique file paths"""
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches and os.path.isfile(pattern):
+            matches = [pattern]
+        paths.update(m for m in matches if os.path.isfile(m))
+    return sorted(paths)
+
+
+def process_file(path: str, output_path: Optional[str] = None) -> BatchResult:
+    """Parse and re-serialize one file, optionally writing the result"""
+    result = BatchResult(path)
+
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        result.error = str(e)
+        return result
+    result.input_size = len(data)
+
+    # The first call imports NumPy, which shouldn't count as parse time
+    level_info.get_loader()
+
+    start = time.perf_counter()
+    try:
+        file = level_info.load_file(data)
+    except Exception as e:
+        result.error = f'parse error: {e}'
+        return result
+    result.parse_time = time.perf_counter() - start
+
+    if file is None:
+        result.error = 'not a LevelInfo.bin file'
+        return result
+
+    start = time.perf_counter()
+    try:
+        new_data = file.save()
+    except Exception as e:
+        result.error = f'save error: {e}'
+        return result
+    result.save_time = time.perf_counter() - start
+
+    result.output_size = len(new_data)
+    result.round_trip_ok = (new_data == data)
+
+    if output_path is not None:
+        try:
+            write_file_atomic(output_path, new_data)
+        except OSError as e:
+            result.error = str(e)
+
+    return result
+
+
+def process_chunk(tasks: List[Tuple[str, Optional[str]]]) -> List[BatchResult]:
+    """Run process_file() on a list of (path, output_path) pairs"""
+    return [process_file(path, output_path) for path, output_path in tasks]
+
+
+def iter_results(tasks: List[Tuple[str, Optional[str]]], jobs: int, chunk_size: int) -> Iterator[BatchResult]:
+    """Process (path, output_path) pairs, yielding results as they finish.
+    If jobs is more than 1, the work is split into chunks and spread over
+    a process pool, so results may arrive out of order."""
+    if jobs <= 1:
+        for path, output_path in tasks:
+            yield process_file(path, output_path)
+        return
+
+    chunks = [tasks[i : i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(process_chunk, chunk) for chunk in chunks]
+        for future in concurrent.futures.as_completed(futures):
+            yield from future.result()
+
+
+def format_result(result: BatchResult) -> str:
+    """Return a one-line description of a BatchResult"""
+    if result.error is not None:
+        return f'ERROR     {result.path}: {result.error}'
+
+    status = 'OK' if result.round_trip_ok else 'MISMATCH'
+    return (f'{status:<9} {result.path}: '
+            f'{result.input_size} -> {result.output_size} bytes, '
+            f'parse {result.parse_time * 1000:.2f} ms, '
+            f'save {result.save_time * 1000:.2f} ms')
+
+
+def get_output_path(path: str, base_dir: str, args: argparse.Namespace) -> Optional[str]:
+    """Decide where (if anywhere) to write the re-serialized file"""
+    if args.output_dir is not None:
+        # Mirror the input directory structure, so that files with the
+        # same name in different folders don't overwrite each other
+        output_path = os.path.join(args.output_dir, os.path.relpath(path, base_dir))
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return output_path
+    elif args.write:
+        return path
+    return None
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    """Handle the "batch" command"""
+    paths = expand_patterns(args.patterns)
+    if not paths:
+        print('No files matched', file=sys.stderr)
+        return 1
+
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+
+    tasks = [(path, get_output_path(os.path.abspath(path), base_dir, args)) for path in paths]
+    jobs = args.jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    results = []
+    for result in iter_results(tasks, jobs, args.chunk_size):
+        print(format_result(result), flush=True)
+        results.append(result)
+    elapsed = time.perf_counter() - start
+
+    print(f'Processed in {elapsed * 1000:.2f} ms using {min(jobs, len(tasks))} process(es)')
+
+    return summarize(results, args.check)
+
+
+def summarize(results: List[BatchResult], check: bool) -> int:
+    """Print a summary of batch results, and return an exit code"""
+    num_errors = sum(1 for r in results if r.error is not None)
+    num_mismatches = sum(1 for r in results if r.error is None and not r.round_trip_ok)
+    total_in = sum(r.input_size for r in results)
+    total_time = sum(r.parse_time + r.save_time for r in results)
+
+    print(f'{len(results)} files, {total_in} bytes, '
+          f'{num_errors} errors, {num_mismatches} round-trip mismatches, '
+          f'{total_time * 1000:.2f} ms spent parsing and saving')
+
+    if num_errors or (check and num_mismatches):
+        return 1
+    return 0
+
+
+def run_lint(args: argparse.Namespace) -> int:
+    """Handle the "lint" command"""
+    paths = expand_patterns(args.patterns)
+    if not paths:
+        print('No files matched', file=sys.stderr)
+        return 1
+
+    num_errors = num_warnings = 0
+    for path in paths:
+        try:
+            file = level_info.load_path(path)
+        except Exception as e:
+            file = None
+            message = f'error: could not be read: {e}'
+        else:
+            message = 'error: not a LevelInfo.bin file'
+        if file is None:
+            print(f'{path}: {message}')
+            num_errors += 1
+            continue
+
+        for problem in level_info_lint.validate(file, args.max_worlds):
+            print(f'{path}: {problem}')
+            if problem.severity == level_info_lint.ERROR:
+                num_errors += 1
+            else:
+                num_warnings += 1
+
+    print(f'{len(paths)} files, {num_errors} errors, {num_warnings} warnings')
+
+    if num_errors or (args.strict and num_warnings):
+        return 1
+    return 0
+
+
+def read_file(path: str) -> Optional[LevelInfoFile]:
+    """Load a file for the "diff" and "merge" commands, printing an
+    error message if that fails"""
+    try:
+        file = level_info.load_path(path)
+    except Exception as e:
+        print(f'{path}: could not be read: {e}', file=sys.stderr)
+        return None
+    if file is None:
+        print(f'{path}: not a LevelInfo.bin file', file=sys.stderr)
+    return file
+
+
+def run_diff(args: argparse.Namespace) -> int:
+    """Handle the "diff" command. Like diff(1), this exits with 1 if the
+    files are different, and 2 if something went wrong."""
+    old = read_file(args.old)
+    new = read_file(args.new) if old is not None else None
+    if new is None:
+        return 2
+
+    changes = level_info_diff.diff(old, new)
+    for change in changes:
+        print(change)
+    return 1 if changes else 0
+
+
+def run_merge(args: argparse.Namespace) -> int:
+    """Handle the "merge" command. Like "git merge-file", this exits with
+    1 if there were conflicts, and 2 if something went wrong."""
+    files = []
+    for path in (args.base, args.ours, args.theirs):
+        file = read_file(path)
+        if file is None:
+            return 2
+        files.append(file)
+
+    result, conflicts = level_info_diff.merge(*files)
+    for conflict in conflicts:
+        print(f'CONFLICT: {conflict}')
+
+    output_path = args.ours if args.output is None else args.output
+    try:
+        write_file_atomic(output_path, result.save())
+    except (OSError, ValueError, struct.error) as e:
+        print(f'{output_path}: could not be saved: {e}', file=sys.stderr)
+        return 2
+
+    return 1 if conflicts else 0
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for integers >= 0"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f'must be 0 or more: {value}')
+    return number
+
+
+def positive_int(value: str) -> int:
+    """argparse type for integers >= 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be 1 or more: {value}')
+    return number
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """Create the command-line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog='level_info_editor',
+        description='Command-line tools for LevelInfo.bin files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser('batch',
+        help='parse and re-serialize many files')
+    batch.add_argument('patterns', nargs='+', metavar='GLOB',
+        help='files to process ("**" matches any number of directories)')
+    batch.add_argument('--write', action='store_true',
+        help='overwrite each file with its re-serialized data')
+    batch.add_argument('--output-dir', metavar='DIR',
+        help='write re-serialized files to this directory instead')
+    batch.add_argument('--check', action='store_true',
+        help='exit with an error if any file fails to round-trip exactly')
+    batch.add_argument('-j', '--jobs', type=non_negative_int, default=1, metavar='N',
+        help='number of worker processes to use (0 = one per CPU; default: 1)')
+    batch.add_argument('--chunk-size', type=positive_int, default=16, metavar='N',
+        help='number of files to send to a worker process at a time (default: 16)')
+    batch.set_defaults(func=run_batch)
+
+    lint = subparsers.add_parser('lint',
+        help='check files for problems')
+    lint.add_argument('patterns', nargs='+', metavar='GLOB',
+        help='files to check ("**" matches any number of directories)')
+    lint.add_argument('--strict', action='store_true',
+        help='exit with an error if there are any warnings, not just errors')
+    lint.add_argument('--max-worlds', type=positive_int, default=level_info_lint.MAX_WORLDS, metavar='N',
+        help=f'warn about files with more worlds than this (default: {level_info_lint.MAX_WORLDS})')
+    lint.set_defaults(func=run_lint)
+
+    diff = subparsers.add_parser('diff',
+        help='list the differences between two files')
+    diff.add_argument('old', help='the original file')
+    diff.add_argument('new', help='the changed file')
+    diff.set_defaults(func=run_diff)
+
+    merge = subparsers.add_parser('merge',
+        help='merge the changes made in two copies of a file')
+    merge.add_argument('base', help='the file both copies were made from')
+    merge.add_argument('ours', help='our copy; the result is written here unless --output is used')
+    merge.add_argument('theirs', help='their copy')
+    merge.add_argument('-o', '--output', metavar='FILE',
+        help='write the result to this file instead')
+    merge.set_defaults(func=run_merge)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command-line interface"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    level_info_profile.start_from_args(argv)
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,437 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# level_info_diff.py
+# Compares LevelInfoFiles by content rather than by bytes, and merges
+# two edited copies of a file with the copy they both started from.
+# Like level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+import collections
+import copy
+import dataclasses
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from level_info import LevelInfo, WorldInfo, LevelInfoFile
+
+
+# Kinds of Change
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+MOVED = 'moved'
+REORDERED = 'reordered'
+
+# Worlds are matched up by world number, and levels by filename (both
+# within their world). The second part counts earlier worlds or levels
+# with the same number, so that duplicates still get a key of their own.
+WorldKey = Tuple[Optional[int], int]
+LevelKey = Tuple[Tuple[int, int], int]
+
+# Fields compared between matched worlds and levels. The ones that are
+# part of the key can't differ (except when merging, where an item can be
+# matched up with a renumbered version of itself), and world levels are
+# compared one by one.
+WORLD_KEY_FIELDS = ('world_number',)
+LEVEL_KEY_FIELDS = ('file_world', 'file_level')
+WORLD_FIELDS = ('has_left', 'name_left', 'has_right', 'name_right')
+LEVEL_FIELDS = tuple(f.name for f in dataclasses.fields(LevelInfo) if f.name not in LEVEL_KEY_FIELDS)
+
+# Stand-in for the base version of something both sides added
+MISSING = object()
+
+
+def get_keys(items: list, get_id: Callable[[Any], Any]) -> list:
+    """Return a key for each world or level in a list"""
+    counts = collections.Counter()
+    keys = []
+    for item in items:
+        item_id = get_id(item)
+        keys.append((item_id, counts[item_id]))
+        counts[item_id] += 1
+    return keys
+
+
+def get_world_keys(worlds: List[WorldInfo]) -> List[WorldKey]:
+    """Return a key for each world in a list"""
+    return get_keys(worlds, lambda world: world.world_number)
+
+
+def get_level_keys(levels: List[LevelInfo]) -> List[LevelKey]:
+    """Return a key for each level in a list"""
+    return get_keys(levels, lambda level: (level.file_world, level.file_level))
+
+
+def get_world_signature(world: WorldInfo) -> tuple:
+    """Return everything about a world except its world number"""
+    return (tuple(getattr(world, field) for field in WORLD_FIELDS),
+            tuple(get_level_signature(level) + (level.file_world, level.file_level) for level in world.levels))
+
+
+def get_level_signature(level: LevelInfo) -> tuple:
+    """Return everything about a level except its filename"""
+    return tuple(getattr(level, field) for field in LEVEL_FIELDS)
+
+
+def describe_world(key: WorldKey) -> str:
+    """Describe a world key, such as 'world 3'"""
+    number, count = key
+    text = 'unnumbered world' if number is None else f'world {number}'
+    return text if not count else f'{text} (#{count + 1})'
+
+
+def describe_level(world_key: WorldKey, key: LevelKey) -> str:
+    """Describe a level key, such as 'world 3, level 03-05'"""
+    (file_world, file_level), count = key
+    text = f'{describe_world(world_key)}, level {file_world:02}-{file_level:02}'
+    return text if not count else f'{text} (#{count + 1})'
+
+
+def order_changed(old_keys: list, new_keys: list) -> bool:
+    """Check if the keys that are in both lists are in a different order"""
+    old_set = set(old_keys)
+    new_set = set(new_keys)
+    return [k for k in old_keys if k in new_set] != [k for k in new_keys if k in old_set]
+
+
+@dataclasses.dataclass
+class Change():
+    """One difference between two files"""
+    kind: str
+    location: str  # such as 'world 3, level 03-05'
+    field: str = ''
+    old: Any = None
+    new: Any = None
+    obj: Union[LevelInfoFile, WorldInfo, LevelInfo, None] = None  # in the new file, if it's there
+
+    def __str__(self) -> str:
+        if self.kind == CHANGED:
+            return f'{self.location}: {self.field} changed from {self.old!r} to {self.new!r}'
+        if self.kind == MOVED:
+            return f'{self.location}: moved to {self.new}'
+        return f'{self.location}: {self.kind}'
+
+
+def diff_fields(old: Any, new: Any, fields: Tuple[str, ...], location: str) -> List[Change]:
+    """Compare some fields of two worlds or levels"""
+    changes = []
+    for field in fields:
+        old_value = getattr(old, field)
+        new_value = getattr(new, field)
+        if old_value != new_value:
+            changes.append(Change(CHANGED, location, field, old_value, new_value, new))
+    return changes
+
+
+def diff(old: LevelInfoFile, new: LevelInfoFile) -> List[Change]:
+    """Return the changes that turn one file into another, in the order
+    of the new file (followed by removals). This takes time
+    proportional to the number of levels in the two files."""
+    changes = []
+
+    if old.comments != new.comments:
+        changes.append(Change(CHANGED, 'comments', 'comments', old.comments, new.comments, new))
+
+    old_keys = get_world_keys(old.worlds)
+    new_keys = get_world_keys(new.worlds)
+    old_worlds = dict(zip(old_keys, old.worlds))
+    new_worlds = dict(zip(new_keys, new.worlds))
+
+    if order_changed(old_keys, new_keys):
+        changes.append(Change(REORDERED, 'worlds', obj=new))
+
+    # Levels are matched within their world, but a level that's removed
+    # from one world and added to another was probably moved
+    added_levels = {}  # level key -> (world key, LevelInfo), in the new file
+    removed_levels = {}  # the same, in the old file
+    world_changes = {}  # world key -> changes to that world and its levels
+
+    for world_key, new_world in new_worlds.items():
+        old_world = old_worlds.get(world_key)
+        location = describe_world(world_key)
+
+        if old_world is None:
+            world_changes[world_key] = [Change(ADDED, location, obj=new_world)]
+            continue
+
+        world_changes[world_key] = diff_fields(old_world, new_world, WORLD_FIELDS, location)
+
+        old_level_keys = get_level_keys(old_world.levels)
+        new_level_keys = get_level_keys(new_world.levels)
+        old_levels = dict(zip(old_level_keys, old_world.levels))
+        new_levels = dict(zip(new_level_keys, new_world.levels))
+
+        if order_changed(old_level_keys, new_level_keys):
+            world_changes[world_key].append(Change(REORDERED, f'{location}, levels', obj=new_world))
+
+        for level_key, new_level in new_levels.items():
+            old_level = old_levels.get(level_key)
+            if old_level is None:
+                added_levels.setdefault(level_key, (world_key, new_level))
+            else:
+                world_changes[world_key].extend(
+                    diff_fields(old_level, new_level, LEVEL_FIELDS, describe_level(world_key, level_key)))
+
+        for level_key, old_level in old_levels.items():
+            if level_key not in new_levels:
+                removed_levels.setdefault(level_key, (world_key, old_level))
+
+    # Levels in added and removed worlds can be moves, too
+    for world_key, new_world in new_worlds.items():
+        if world_key not in old_worlds:
+            for level_key, level in zip(get_level_keys(new_world.levels), new_world.levels):
+                added_levels.setdefault(level_key, (world_key, level))
+    for world_key, old_world in old_worlds.items():
+        if world_key not in new_worlds:
+            for level_key, level in zip(get_level_keys(old_world.levels), old_world.levels):
+                removed_levels.setdefault(level_key, (world_key, level))
+
+    for level_key, (world_key, new_level) in added_levels.items():
+        location = describe_level(world_key, level_key)
+        moved_from = removed_levels.pop(level_key, None)
+        if moved_from is None:
+            if world_key in old_worlds:
+                world_changes[world_key].append(Change(ADDED, location, obj=new_level))
+            continue
+
+        old_world_key, old_level = moved_from
+        old_location = describe_level(old_world_key, level_key)
+        world_changes[world_key].append(Change(MOVED, old_location, old=describe_world(old_world_key),
+            new=describe_world(world_key), obj=new_level))
+        world_changes[world_key].extend(diff_fields(old_level, new_level, LEVEL_FIELDS, location))
+
+    for world_key in new_worlds:
+        changes.extend(world_changes[world_key])
+
+    for world_key, old_world in old_worlds.items():
+        if world_key not in new_worlds:
+            changes.append(Change(REMOVED, describe_world(world_key)))
+    for level_key, (world_key, old_level) in removed_levels.items():
+        if world_key in new_worlds:
+            changes.append(Change(REMOVED, describe_level(world_key, level_key)))
+
+    return changes
+
+
+@dataclasses.dataclass
+class Conflict():
+    """Something that was changed differently by both sides of a merge.
+    The merged file keeps "our" version."""
+    location: str
+    message: str
+    ours: Any = None
+    theirs: Any = None
+    obj: Union[LevelInfoFile, WorldInfo, LevelInfo, None] = None  # in the merged file
+
+    def __str__(self) -> str:
+        return f'{self.location}: {self.message}'
+
+
+class Merger():
+    """Three-way merge of two files that were both edited from the same
+    base file. Use merge() instead of this directly."""
+
+    def __init__(self):
+        self.conflicts = []
+
+    def merge_fields(self, base: Any, ours: Any, theirs: Any, result: Any, fields: Tuple[str, ...],
+                     location: str) -> None:
+        """Merge some fields of a world or level into result"""
+        for field in fields:
+            base_value = MISSING if base is MISSING else getattr(base, field)
+            our_value = getattr(ours, field)
+            their_value = getattr(theirs, field)
+
+            if our_value == their_value or their_value == base_value:
+                value = our_value
+            elif our_value == base_value:
+                value = their_value
+            else:
+                value = our_value
+                self.conflicts.append(Conflict(location,
+                    f'{field} was changed to {our_value!r} here and {their_value!r} there',
+                    our_value, their_value, result))
+            setattr(result, field, value)
+
+    @staticmethod
+    def match_renumbered(base_keys: list, base_items: dict, keys: list, items: dict,
+                         get_signature: Callable[[Any], tuple]) -> Tuple[list, dict, list]:
+        """Find items that one side renumbered (changed the key of), by
+        matching up the items it removed with the ones it added: first
+        by everything but their keys, and then by position between the
+        items it kept. Returns the side's keys and items with those
+        items under their base keys instead, and the added keys that
+        couldn't be matched."""
+        removed = [key for key in base_keys if key not in items]
+        added = [key for key in keys if key not in base_items]
+        if not (removed and added):
+            return keys, items, added
+
+        renumbered = {}  # added key -> base key
+
+        # Items that are the same apart from their keys, if that's clear
+        removed_signatures = collections.defaultdict(list)
+        for key in removed:
+            removed_signatures[get_signature(base_items[key])].append(key)
+        added_signatures = collections.defaultdict(list)
+        for key in added:
+            added_signatures[get_signature(items[key])].append(key)
+        for signature, added_keys in added_signatures.items():
+            removed_keys = removed_signatures.get(signature, ())
+            if len(added_keys) == 1 and len(removed_keys) == 1:
+                renumbered[added_keys[0]] = removed_keys[0]
+
+        # Then, items in the same place, between the same kept items
+        def group_by_position(all_keys: list, candidates: set) -> dict:
+            groups = collections.defaultdict(list)  # previous kept key -> keys
+            previous = None
+            for key in all_keys:
+                if key in candidates:
+                    groups[previous].append(key)
+                elif key in base_items and key in items:
+                    previous = key
+            return groups
+
+        matched = set(renumbered.values())
+        removed_groups = group_by_position(base_keys, {key for key in removed if key not in matched})
+        added_groups = group_by_position(keys, {key for key in added if key not in renumbered})
+        for previous, added_keys in added_groups.items():
+            removed_keys = removed_groups.get(previous, ())
+            if len(added_keys) == len(removed_keys):
+                renumbered.update(zip(added_keys, removed_keys))
+
+        keys = [renumbered.get(key, key) for key in keys]
+        items = {renumbered.get(key, key): item for key, item in items.items()}
+        return keys, items, [key for key in added if key not in renumbered]
+
+    def merge_lists(self, base: list, ours: list, theirs: list, get_keys: Callable[[list], list],
+                    get_signature: Callable[[Any], tuple], merge_item: Callable[[Any, Any, Any, Any], Any],
+                    describe: Callable[[Any], str]) -> list:
+        """Merge three versions of a list of worlds or levels, matching
+        them up by key. merge_item(key, base, ours, theirs) merges one
+        item that both sides kept, with base being MISSING if both sides
+        added it. Items that one side renumbered are matched up with
+        their base versions (see match_renumbered())."""
+        base_keys = get_keys(base)
+        our_keys = get_keys(ours)
+        their_keys = get_keys(theirs)
+        base_items = dict(zip(base_keys, base))
+        our_keys, our_items, our_added = self.match_renumbered(
+            base_keys, base_items, our_keys, dict(zip(our_keys, ours)), get_signature)
+        their_keys, their_items, their_added = self.match_renumbered(
+            base_keys, base_items, their_keys, dict(zip(their_keys, theirs)), get_signature)
+
+        merged = {}  # key -> merged item
+        for key in {**our_items, **their_items}:
+            base_item = base_items.get(key, MISSING)
+            our_item = our_items.get(key, MISSING)
+            their_item = their_items.get(key, MISSING)
+
+            if our_item is not MISSING and their_item is not MISSING:
+                merged[key] = merge_item(key, base_item, our_item, their_item)
+
+            elif base_item is MISSING:
+                # Added by one side
+                merged[key] = copy.deepcopy(our_item if their_item is MISSING else their_item)
+
+            else:
+                # Removed by one side. That's fine unless the other side
+                # changed it, in which case the changed version is kept.
+                kept_item = our_item if their_item is MISSING else their_item
+                if kept_item != base_item:
+                    side = 'there' if their_item is MISSING else 'here'
+                    merged[key] = copy.deepcopy(kept_item)
+                    message = f'was removed {side}, but changed on the other side, so it was kept'
+
+                    # If that side also added something it can't be
+                    # matched up with, it may be in the file twice
+                    added = their_added if their_item is MISSING else our_added
+                    if added:
+                        message += f' (it may have become {", ".join(describe(k) for k in added)})'
+                    self.conflicts.append(Conflict(describe(key), message, our_item, their_item, merged[key]))
+
+        # Use their order if only they reordered the list, and our
+        # order otherwise. Items only the other side has go after
+        # whatever comes before them on that side.
+        if order_changed(base_keys, their_keys) and not order_changed(base_keys, our_keys):
+            main_keys, other_keys = their_keys, our_keys
+        else:
+            main_keys, other_keys = our_keys, their_keys
+        main_set = set(main_keys)
+
+        following = collections.defaultdict(list)  # key (or None for the start) -> keys to add after it
+        anchor = None
+        for key in other_keys:
+            if key in main_set:
+                if key in merged:
+                    anchor = key
+            elif key in merged:
+                following[anchor].append(key)
+
+        result = [merged[key] for key in following[None]]
+        for key in main_keys:
+            if key in merged:
+                result.append(merged[key])
+                result.extend(merged[k] for k in following.get(key, ()))
+        return result
+
+    def merge_level(self, world_key: WorldKey, key: LevelKey, base: Any, ours: LevelInfo,
+                    theirs: LevelInfo) -> LevelInfo:
+        """Merge three versions of a level"""
+        result = copy.copy(ours)
+        self.merge_fields(base, ours, theirs, result, LEVEL_KEY_FIELDS + LEVEL_FIELDS, describe_level(world_key, key))
+        return result
+
+    def merge_world(self, key: WorldKey, base: Any, ours: WorldInfo, theirs: WorldInfo) -> WorldInfo:
+        """Merge three versions of a world, including its levels"""
+        result = WorldInfo()
+        self.merge_fields(base, ours, theirs, result, WORLD_KEY_FIELDS + WORLD_FIELDS, describe_world(key))
+        result.levels = self.merge_lists(
+            [] if base is MISSING else base.levels, ours.levels, theirs.levels,
+            get_level_keys, get_level_signature,
+            lambda *args: self.merge_level(key, *args),
+            lambda level_key: describe_level(key, level_key))
+        return result
+
+    def merge_files(self, base: LevelInfoFile, ours: LevelInfoFile, theirs: LevelInfoFile) -> LevelInfoFile:
+        """Merge three versions of a file"""
+        result = LevelInfoFile()
+        self.merge_fields(base, ours, theirs, result, ('comments',), 'comments')
+        result.worlds = self.merge_lists(base.worlds, ours.worlds, theirs.worlds,
+            get_world_keys, get_world_signature, self.merge_world, describe_world)
+        return result
+
+
+def merge(base: LevelInfoFile, ours: LevelInfoFile, theirs: LevelInfoFile) -> Tuple[LevelInfoFile, List[Conflict]]:
+    """Merge the changes made in two copies of a file since the base
+    version, and return the merged file and any conflicts. Wherever both
+    sides changed the same thing differently, "ours" wins. This takes
+    time proportional to the number of levels in the three files, and
+    doesn't modify them."""
+    merger = Merger()
+    result = merger.merge_files(base, ours, theirs)
+    return result, merger.conflicts
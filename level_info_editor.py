@@ -32,213 +32,33 @@
 
 VERSION = '1.6'
 
-import dataclasses
-import struct
+import time
+STARTUP_TIME = time.perf_counter()  # for --startup-benchmark
+
+import itertools
+import os.path
 import sys
-from typing import List, Optional
+import tempfile
+from typing import List, Optional, Tuple
 
 try:
     from PyQt6 import QtCore, QtGui, QtWidgets
 except ImportError:
     from PyQt5 import QtCore, QtGui, QtWidgets
 
+# QUndoStack and QUndoCommand are in QtGui in Qt 6, and QtWidgets in Qt 5
+QtUndo = QtGui if hasattr(QtGui, 'QUndoStack') else QtWidgets
 
-@dataclasses.dataclass
-class LevelInfo():
-    """Represents a level"""
-    name: str = ''
-    file_world: int = 0
-    file_level: int = 0
-    display_world: int = 0
-    display_level: int = 0
-    in_star_coins_menu: bool = True
-    has_normal_exit: bool = False
-    has_secret_exit: bool = False
-    is_right_side: bool = False
-
-    @property
-    def flags(self) -> int:
-        flags = 0
-        if self.in_star_coins_menu: flags |= 0x0002
-        if self.has_normal_exit:    flags |= 0x0010
-        if self.has_secret_exit:    flags |= 0x0020
-        if self.is_right_side:      flags |= 0x0400
-        return flags
-    @flags.setter
-    def flags(self, value: int) -> None:
-        self.in_star_coins_menu = bool(value & 0x0002)
-        self.has_normal_exit    = bool(value & 0x0010)
-        self.has_secret_exit    = bool(value & 0x0020)
-        self.is_right_side      = bool(value & 0x0400)
-
-
-@dataclasses.dataclass
-class WorldInfo():
-    """Represents a world"""
-    world_number: Optional[int] = None
-    has_left: bool = False
-    has_right: bool = False
-    name_left: str = ''
-    name_right: str = ''
-    levels: List[LevelInfo] = dataclasses.field(default_factory=list)
-
-
-@dataclasses.dataclass
-class LevelInfoFile():
-    """Represents LevelInfo.bin"""
-    worlds: List[WorldInfo] = dataclasses.field(default_factory=list)
-    comments: str = ''
-
-    @classmethod
-    def from_data(cls, data: bytes) -> 'LevelInfoFile':
-        """Create a LevelInfoFile from file data"""
-
-        # Check for the file header
-        if not data.startswith(b'NWRp'):
-            return
+import level_info_diff
+import level_info_journal
+import level_info_profile
+from level_info import (LevelInfo, WorldInfo, LevelInfoFile, LevelInfoPatcher, get_move_start, get_moved_row,
+                        get_unmoved_row, move_items, unmove_items)
+from level_info_index import ObjectIndex
+from level_info_lint import ERROR, WARNING, Problem, Validator
+from level_info_search import SearchIndex
 
-        magic, num_worlds = struct.unpack_from('>4sI', data, 0)
-        world_offsets = struct.unpack_from(f'>{num_worlds}I', data, 0x08)
-
-        # Load the worlds
-        min_text_offs = 0xFFFFFFFF
-        worlds = []
-        LEVEL_ENTRY_STRUCT = struct.Struct('>5BxHI')
-        for world_i, world_offset in enumerate(world_offsets):
-            num_levels, = struct.unpack_from(f'>I', data, world_offset)
-
-            # Make a world and add levels/headers to it
-            world = WorldInfo()
-
-            for level_offs in range(world_offset + 4, world_offset + 4 + num_levels * 12, 12):
-                (
-                    file_name_w, file_name_l,
-                    display_name_w, display_name_l,
-                    text_len, flags, text_offs,
-                ) = LEVEL_ENTRY_STRUCT.unpack_from(data, level_offs)
-
-                min_text_offs = min(min_text_offs, text_offs)
-                text_enc = data[text_offs : text_offs + text_len]
-                text = bytes((c + 0x30) & 0xff for c in text_enc).decode('ascii')
-
-                # Add header info or levels
-                if display_name_l >= 100:
-                    # It's a world header
-                    world.world_number = display_name_w
-                    if display_name_l == 100:
-                        world.has_left = True
-                        world.name_left = text
-                    else:
-                        world.has_right = True
-                        world.name_right = text
-                else:
-                    # It's a real level
-                    world.levels.append(LevelInfo(
-                        name=text,
-                        file_world=(file_name_w + 1),
-                        file_level=(file_name_l + 1),
-                        display_world=display_name_w,
-                        display_level=display_name_l))
-                    world.levels[-1].flags = flags
-
-            # Add it to worlds
-            worlds.append(world)
-
-        # Create instance
-        self = cls(worlds)
-
-        # Get the comments
-        self.comments = data[self.get_comments_offset() : min_text_offs - 1].decode('ascii')
-
-        return self
-
-    def get_comments_offset(self) -> int:
-        """Calculate the offset of the comments data"""
-        # I'm trying to make this as easy-to-read as possible.
-        offset = 0
-
-        offset += 4  # "NWRp" text
-        offset += 4  # Number-of-worlds bytes
-        for world in self.worlds:
-            offset += 4  # Offset to the world data in the file header
-            offset += 4  # Number-of-levels bytes
-
-            if world.has_left: offset += 12  # Data for that takes 12 bytes
-            if world.has_right: offset += 12  # Same as above
-            for level in world.levels:
-                offset += 12  # Each level is 12 bytes
-
-        return offset
-
-    def save(self) -> bytes:
-        """Return LevelInfo.bin file data"""
-        result = bytearray()
-        text_start = self.get_comments_offset() + len(self.comments) + 1
-
-        # First things first - add "NWRp"
-        result.extend(b'NWRp')
-
-        # Add the number-of-worlds value (we'll only worry about the last 2 bytes)
-        result.extend(struct.pack('>I', len(self.worlds)))
-
-        # Add blank spaces for each world value
-        result.extend(b'\0\0\0\0' * len(self.worlds))
-
-        # Add worlds and world-offsets at the same time
-        current_offs = len(result)
-        current_text_offs = text_start
-        text = bytearray()
-        LEVEL_ENTRY_STRUCT = struct.Struct('>5BxHI')
-        for i, world in enumerate(self.worlds):
-            # Set the world-offset start value to current_offs
-            struct.pack_into('>I', result, 8 + i * 4, current_offs)
-
-            # Create a place to store some world info
-            world_data = bytearray()
-
-            # Add the number-of-levels value
-            num = len(world.levels)
-            if world.has_left: num += 1
-            if world.has_right: num += 1
-            world_data.extend(struct.pack('>I', num))
-
-            # Add data to world_data for each world half
-            for exists, name in zip((world.has_left, world.has_right), ('left', 'right')):
-                if not exists: continue
-                w_name = getattr(world, f'name_{name}')
-                world_data.extend(LEVEL_ENTRY_STRUCT.pack(
-                    98, 98,  # filename: 98-98
-                    world.world_number, (101 if name == 'right' else 100),  # display name: WN-100
-                    len(w_name),
-                    (0x400 if name == 'right' else 0),
-                    current_text_offs))
-
-                current_text_offs += len(w_name) + 1
-                text.extend(w_name.encode('ascii') + b'\0')
-
-            # Add data to world_data for each level
-            for level in world.levels:
-                world_data.extend(LEVEL_ENTRY_STRUCT.pack(
-                    (level.file_world - 1) & 0xff, (level.file_level - 1) & 0xff,
-                    level.display_world, level.display_level,
-                    len(level.name),
-                    level.flags,
-                    current_text_offs))
-
-                current_text_offs += len(level.name) + 1
-                text.extend(level.name.encode('ascii') + b'\0')
-
-            # Add world_data to result
-            result.extend(world_data)
-            current_offs += len(world_data)
-
-        # Add the comments
-        result.extend(self.comments.encode('ascii') + b'\0')
-
-        # Add text
-        result.extend([(c - 0x30) & 0xff for c in text])
-
-        return bytes(result)
+IMPORTS_DONE_TIME = time.perf_counter()  # for --startup-benchmark
 
 
 ########################################################################
@@ -247,40 +67,487 @@ class LevelInfoFile():
 ########################################################################
 
 
+def world_label(world: WorldInfo) -> str:
+    """Return the text to show for a world in the world picker"""
+    text = 'World '
+    if world.world_number is None:
+        text += '?'
+    else:
+        text += str(world.world_number)
+
+        half_names = []
+        if world.has_left: half_names.append(world.name_left.strip())
+        if world.has_right: half_names.append(world.name_right.strip())
+        while '' in half_names:
+            half_names.remove('')
+
+        if half_names:
+            text += f' ({", ".join(half_names)})'
+
+    return text
+
+
+def level_label(level: LevelInfo) -> str:
+    """Return the text to show for a level in the level picker"""
+    return level.name
+
+
+class ObjectListModel(QtCore.QAbstractListModel):
+    """List model that shows a Python list of objects (such as
+    LevelInfoFile.worlds), and edits it in place. Supports reordering
+    the objects by drag-and-drop."""
+    def __init__(self, mime_type: str, label_func):
+        super().__init__()
+        self.mime_type = mime_type
+        self.label_func = label_func
+        self.items = []
+
+    def set_items(self, items: list) -> None:
+        """Change the list to show"""
+        self.beginResetModel()
+        self.items = items
+        self.endResetModel()
+
+    def item(self, row: int) -> object:
+        """Return the object at a row"""
+        return self.items[row]
+
+    def insert(self, row: int, obj: object) -> None:
+        """Insert an object into the list"""
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.items.insert(row, obj)
+        self.endInsertRows()
+
+    def append(self, obj: object) -> int:
+        """Add an object to the end of the list, and return its row"""
+        row = len(self.items)
+        self.insert(row, obj)
+        return row
+
+    def refresh(self) -> None:
+        """Update the labels of all rows"""
+        if self.items:
+            self.dataChanged.emit(self.index(0), self.index(len(self.items) - 1))
+
+    def row_of(self, obj: object, hint: int = -1) -> int:
+        """Return the row of an object, or -1 if it's not in the list.
+        If hint is its row, this doesn't have to search for it."""
+        if 0 <= hint < len(self.items) and self.items[hint] is obj:
+            return hint
+        for row, item in enumerate(self.items):
+            if item is obj:
+                return row
+        return -1
+
+    def refresh_object(self, obj: object, hint: int = -1) -> None:
+        """Update the label of one object's row"""
+        row = self.row_of(obj, hint)
+        if row != -1:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.isValid(): return 0
+        return len(self.items)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> object:
+        if not index.isValid(): return None
+
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.label_func(self.items[index.row()])
+        elif role == QtCore.Qt.ItemDataRole.UserRole:
+            return self.items[index.row()]
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        # Items can be dropped between other items, but not onto them
+        if not index.isValid():
+            return QtCore.Qt.ItemFlag.ItemIsDropEnabled
+        return (QtCore.Qt.ItemFlag.ItemIsSelectable
+                | QtCore.Qt.ItemFlag.ItemIsEnabled
+                | QtCore.Qt.ItemFlag.ItemIsDragEnabled)
+
+    def removeRows(self, row: int, count: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        if parent.isValid() or count < 1 or row < 0 or row + count > len(self.items):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self.items[row : row + count]
+        self.endRemoveRows()
+        return True
+
+
+    # Drag-and-drop
+
+    def supportedDropActions(self) -> QtCore.Qt.DropAction:
+        return QtCore.Qt.DropAction.MoveAction
+
+    def supportedDragActions(self) -> QtCore.Qt.DropAction:
+        # Copy is included only so that DNDPicker.dropEvent() can report
+        # its moves as copies (see there)
+        return QtCore.Qt.DropAction.MoveAction | QtCore.Qt.DropAction.CopyAction
+
+    def mimeTypes(self) -> List[str]:
+        return [self.mime_type]
+
+    def mimeData(self, indexes: List[QtCore.QModelIndex]) -> QtCore.QMimeData:
+        # Only used to start drags; DNDPicker.dropEvent() does the move
+        rows = sorted({index.row() for index in indexes})
+        mime_data = QtCore.QMimeData()
+        mime_data.setData(self.mime_type, QtCore.QByteArray(','.join(str(r) for r in rows).encode('ascii')))
+        return mime_data
+
+    def moveRows(self, source_parent: QtCore.QModelIndex, source_row: int, count: int,
+                 destination_parent: QtCore.QModelIndex, destination_child: int) -> bool:
+        if source_parent.isValid() or destination_parent.isValid():
+            return False
+        if not self.beginMoveRows(source_parent, source_row, source_row + count - 1,
+                                  destination_parent, destination_child):
+            return False
+
+        moving = self.items[source_row : source_row + count]
+        del self.items[source_row : source_row + count]
+        if destination_child > source_row:
+            destination_child -= count
+        self.items[destination_child:destination_child] = moving
+
+        self.endMoveRows()
+        return True
+
+    def move_rows(self, rows: List[int], destination: int) -> bool:
+        """Move some rows (sorted, without duplicates) so that they're
+        together, in their current order, before the row that's at
+        destination now (see level_info.move_items()). Returns False if
+        that wouldn't change anything."""
+        if not rows: return False
+
+        # A contiguous block can be moved with a single moveRows()
+        if rows[-1] - rows[0] + 1 == len(rows):
+            if rows[0] <= destination <= rows[-1] + 1:
+                return False
+            return self.moveRows(QtCore.QModelIndex(), rows[0], len(rows), QtCore.QModelIndex(), destination)
+
+        # Otherwise, reorder everything in one layout change
+        self.change_layout(move_items, get_moved_row, rows, destination)
+        return True
+
+    def unmove_rows(self, rows: List[int], destination: int) -> None:
+        """Undo move_rows()"""
+        start = get_move_start(rows, destination)
+        if rows[-1] - rows[0] + 1 == len(rows):
+            # (moveRows() counts the destination from before the move)
+            if start != rows[0]:
+                self.moveRows(QtCore.QModelIndex(), start, len(rows), QtCore.QModelIndex(),
+                              rows[0] if rows[0] < start else rows[0] + len(rows))
+            return
+
+        self.change_layout(unmove_items, get_unmoved_row, rows, destination)
+
+    def change_layout(self, move, get_row, rows: List[int], destination: int) -> None:
+        """Reorder the list with move(items, rows, destination), in one
+        layout change. get_row(row, rows, destination) gives the new row
+        of each of the rows that the views keep track of."""
+        self.layoutAboutToBeChanged.emit()
+
+        old_indexes = self.persistentIndexList()
+        move(self.items, rows, destination)
+        self.changePersistentIndexList(old_indexes,
+            [self.index(get_row(index.row(), rows, destination)) for index in old_indexes])
+
+        self.layoutChanged.emit()
+
+
 # Drag-and-Drop Picker
-class DNDPicker(QtWidgets.QListWidget):
-    """A list widget which calls a function when an item's been moved"""
-    def __init__(self, handler):
+class DNDPicker(QtWidgets.QListView):
+    """A list view whose items can be reordered by drag-and-drop"""
+    move_requested = QtCore.pyqtSignal(list, int)  # rows, destination
+
+    def __init__(self, model: ObjectListModel):
         super().__init__()
-        self.handler = handler
-        self.setDragDropMode(QtWidgets.QListWidget.DragDropMode.InternalMove)
+        self.setModel(model)
+        self.setDragDropMode(QtWidgets.QAbstractItemView.DragDropMode.InternalMove)
+        self.setDefaultDropAction(QtCore.Qt.DropAction.MoveAction)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+
+        # All rows are the same height, so Qt only has to lay out the
+        # ones that are visible
+        self.setUniformItemSizes(True)
 
     def dropEvent(self, event: QtGui.QDropEvent) -> None:
-        QtWidgets.QListWidget.dropEvent(self, event)
-        self.handler()
+        """Move the selected rows to where they were dropped"""
+        if event.source() is not self:
+            event.ignore()
+            return
+
+        # PyQt6 has position(); PyQt5 has pos()
+        pos = event.position().toPoint() if hasattr(event, 'position') else event.pos()
+
+        index = self.indexAt(pos)
+        if index.isValid():
+            destination = index.row()
+            if pos.y() >= self.visualRect(index).center().y():
+                destination += 1
+        else:
+            destination = self.model().rowCount()
+
+        # The handler moves the rows (see MoveCommand)
+        rows = [index.row() for index in self.selectionModel().selectedRows()]
+        self.move_requested.emit(rows, destination)
+
+        # The rows have already been moved. Reporting this as a copy
+        # stops QAbstractItemView from removing the "originals".
+        event.setDropAction(QtCore.Qt.DropAction.CopyAction)
+        event.accept()
+
+    def current_row(self) -> int:
+        """Return the current row, or -1 if there isn't one"""
+        index = self.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def current_object(self) -> Optional[object]:
+        """Return the object in the current row, or None"""
+        row = self.current_row()
+        return None if row == -1 else self.model().item(row)
+
+    def set_current_row(self, row: int) -> None:
+        """Select a row and scroll to it"""
+        index = self.model().index(row)
+        self.setCurrentIndex(index)
+        self.scrollTo(index)
+
+
+# Default maximum number of steps that can be undone
+UNDO_LIMIT = 1000
+
+# Undo command ID shared by all EditFieldsCommands, so that Qt offers
+# them to each other's mergeWith()
+EDIT_FIELDS_COMMAND_ID = 1
+
+# Names of editable attributes, for the Undo and Redo menu items
+FIELD_NAMES = {
+    'world_number': 'World Number',
+    'has_left': 'Has a 1st Half',
+    'name_left': '1st Half Name',
+    'has_right': 'Has a 2nd Half',
+    'name_right': '2nd Half Name',
+    'name': 'Level Name',
+    'file_world': 'Filename',
+    'file_level': 'Filename',
+    'display_world': 'Display Name',
+    'display_level': 'Display Name',
+    'in_star_coins_menu': 'Star Coins Menu',
+    'has_normal_exit': 'Normal Exit',
+    'has_secret_exit': 'Secret Exit',
+    'is_right_side': 'World Half',
+    'comments': 'Comments',
+}
+
+
+class EditFieldsCommand(QtUndo.QUndoCommand):
+    """Undo command that sets attributes of worlds, levels or the file.
+    Only the changed values are kept, as (object, attr, old, new)
+    tuples, so an edit costs the same no matter how big the file is."""
+    def __init__(self, viewer: 'LevelInfoViewer', changes: List[Tuple[object, str, object]], text: str,
+                 can_merge: bool):
+        super().__init__(text)
+        self.viewer = viewer
+        self.changes = [(obj, attr, getattr(obj, attr), value) for obj, attr, value in changes]
+        self.can_merge = can_merge
+        self.done_before = False
+
+    def id(self) -> int:
+        return EDIT_FIELDS_COMMAND_ID if self.can_merge else -1
+
+    def mergeWith(self, other: QtUndo.QUndoCommand) -> bool:
+        """Combine consecutive edits of the same fields of the same
+        objects (such as keystrokes in one text box) into one step"""
+        if not (self.can_merge and other.can_merge) or len(self.changes) != len(other.changes):
+            return False
+        for (obj, attr, _, _), (other_obj, other_attr, _, _) in zip(self.changes, other.changes):
+            if obj is not other_obj or attr != other_attr:
+                return False
+
+        self.changes = [(obj, attr, old, new) for (obj, attr, old, _), (_, _, _, new) in zip(self.changes, other.changes)]
+
+        # Typing something and then deleting it again isn't an edit
+        if all(old == new for _, _, old, new in self.changes):
+            self.setObsolete(True)
+        return True
+
+    def redo(self) -> None:
+        for obj, attr, _, new in self.changes:
+            setattr(obj, attr, new)
+
+        # The first time, the change came from the editors, so they
+        # already show it
+        self.viewer.handle_fields_changed([(obj, attr, new) for obj, attr, _, new in self.changes], self.done_before)
+        self.done_before = True
+
+    def undo(self) -> None:
+        for obj, attr, old, _ in reversed(self.changes):
+            setattr(obj, attr, old)
+
+        # Edits made after undoing start a new step
+        self.can_merge = False
+        self.viewer.handle_fields_changed([(obj, attr, old) for obj, attr, old, _ in reversed(self.changes)], True)
+
+
+class ListEditCommand(QtUndo.QUndoCommand):
+    """Undo command that inserts objects into a list of worlds or
+    levels, or removes them. The objects themselves are kept (not
+    copies), so undoing gives back the same ones."""
+    def __init__(self, viewer: 'LevelInfoViewer', items: list, rows: List[Tuple[int, object]], insert: bool,
+                 text: str):
+        super().__init__(text)
+        self.viewer = viewer
+        self.items = items
+        self.rows = sorted(rows, key=lambda row: row[0])  # (row, object) pairs
+        self.insert = insert
+
+    def redo(self) -> None:
+        if self.insert:
+            self.viewer.insert_objects(self.items, self.rows)
+        else:
+            self.viewer.remove_objects(self.items, self.rows)
+
+    def undo(self) -> None:
+        if self.insert:
+            self.viewer.remove_objects(self.items, self.rows)
+        else:
+            self.viewer.insert_objects(self.items, self.rows)
+
+
+class MoveCommand(QtUndo.QUndoCommand):
+    """Undo command that moves rows of a list of worlds or levels. Only
+    the rows and the destination are kept, and undoing moves the rows
+    back, so a move costs the same no matter how long the list is."""
+    def __init__(self, viewer: 'LevelInfoViewer', items: list, rows: List[int], destination: int, text: str):
+        super().__init__(text)
+        self.viewer = viewer
+        self.items = items
+        self.rows = sorted(set(rows))
+        self.destination = destination
+
+    def redo(self) -> None:
+        if not self.viewer.move_rows(self.items, self.rows, self.destination):
+            # Nothing moved, so don't add this to the undo stack
+            self.setObsolete(True)
+
+    def undo(self) -> None:
+        self.viewer.unmove_rows(self.items, self.rows, self.destination)
+
+
+# Maximum number of search results to list
+MAX_SEARCH_RESULTS = 200
+
+# Maximum number of problems to list
+MAX_PROBLEMS = 500
+
+
+class ProblemListModel(QtCore.QAbstractListModel):
+    """List model that shows the first problems found by a Validator,
+    and a row saying how many more there are. set_problems() compares
+    the new rows with the current ones, and only tells the view about
+    the rows that changed."""
+    def __init__(self, error_icon: QtGui.QIcon, warning_icon: QtGui.QIcon):
+        super().__init__()
+        self.icons = {ERROR: error_icon, WARNING: warning_icon}
+        self.rows = []  # (text, severity, object); the "more" row has no severity
+
+    @staticmethod
+    def same_row(a: tuple, b: tuple) -> bool:
+        """Check if two rows show the same thing"""
+        return a[0] == b[0] and a[1] == b[1] and a[2] is b[2]
+
+    def set_problems(self, problems: List[Problem], count: int) -> None:
+        """Show some problems (in file order) out of count in total"""
+        rows = []
+        for problem in problems:
+            text = f'{problem.location[0].upper()}{problem.location[1:]}: {problem.message}' if problem.location else problem.message
+            rows.append((text, problem.severity, problem.obj))
+        if count > len(problems):
+            rows.append((f'({count - len(problems)} more)', None, None))
+
+        # Skip the rows at the start and the end that haven't changed
+        old_rows = self.rows
+        start = 0
+        old_end, new_end = len(old_rows), len(rows)
+        while start < min(old_end, new_end) and self.same_row(old_rows[start], rows[start]):
+            start += 1
+        while old_end > start and new_end > start and self.same_row(old_rows[old_end - 1], rows[new_end - 1]):
+            old_end -= 1
+            new_end -= 1
+
+        # Change the rows in between in place, and insert or remove the
+        # difference after them
+        middle_end = min(old_end, new_end)
+        if middle_end > start:
+            old_rows[start:middle_end] = rows[start:middle_end]
+            self.dataChanged.emit(self.index(start), self.index(middle_end - 1))
+        if new_end > old_end:
+            self.beginInsertRows(QtCore.QModelIndex(), old_end, new_end - 1)
+            old_rows[old_end:old_end] = rows[old_end:new_end]
+            self.endInsertRows()
+        elif old_end > new_end:
+            self.beginRemoveRows(QtCore.QModelIndex(), new_end, old_end - 1)
+            del old_rows[new_end:old_end]
+            self.endRemoveRows()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.isValid(): return 0
+        return len(self.rows)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> object:
+        if not index.isValid(): return None
+
+        text, severity, obj = self.rows[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return text
+        elif role == QtCore.Qt.ItemDataRole.DecorationRole:
+            return self.icons.get(severity)
+        elif role == QtCore.Qt.ItemDataRole.UserRole:
+            return obj
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        if not index.isValid() or self.rows[index.row()][1] is None:
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        return QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled
 
 
 class LevelInfoViewer(QtWidgets.QWidget):
     """Widget that views level info"""
-    def __init__(self):
+    object_changed = QtCore.pyqtSignal(object)
+    file_edited = QtCore.pyqtSignal(list)  # journal records (see level_info_journal.py)
+
+    def __init__(self, undo_limit: int = UNDO_LIMIT):
         super().__init__()
         self.file = LevelInfoFile()
+        self.object_index = ObjectIndex(self.file)
+        self.search_index = None  # built when it's first needed (see get_search_index())
+        self.validator = Validator(self.object_index)
+
+        # Every edit goes through this (see EditFieldsCommand and the
+        # other commands). The limit has to be set while it's empty.
+        self.undo_stack = QtUndo.QUndoStack(self)
+        self.undo_stack.setUndoLimit(undo_limit)
 
         # Create the Worlds widgets
         worlds_box = QtWidgets.QGroupBox('Worlds')
-        self.world_picker = DNDPicker(self.handle_world_drag_drop)
+        self.world_model = ObjectListModel('application/x-level-info-editor-worlds', world_label)
+        self.world_picker = DNDPicker(self.world_model)
         self.add_world_button = QtWidgets.QPushButton('Add')
         self.remove_world_button = QtWidgets.QPushButton('Remove')
 
         # Add some tooltips
         self.add_world_button.setToolTip('<b>Add:</b><br>Adds a world to the file.')
-        self.remove_world_button.setToolTip('<b>Remove:</b><br>Removes the currently selected world from the file.')
+        self.remove_world_button.setToolTip('<b>Remove:</b><br>Removes the currently selected worlds from the file.')
 
         # Disable some
         self.remove_world_button.setEnabled(False)
 
         # Connect them to handlers
-        self.world_picker.currentItemChanged.connect(self.handle_world_select)
+        self.world_picker.selectionModel().currentChanged.connect(self.handle_world_select)
+        self.world_picker.move_requested.connect(self.handle_world_move)
         self.add_world_button.clicked.connect(self.handle_add_world)
         self.remove_world_button.clicked.connect(self.handle_remove_world)
 
@@ -291,279 +558,599 @@ class LevelInfoViewer(QtWidgets.QWidget):
         L.addWidget(self.remove_world_button, 1, 1)
 
 
+        # Create the Search widgets
+        search_box = QtWidgets.QGroupBox('Search')
+        self.search_edit = QtWidgets.QLineEdit()
+        self.search_edit.setPlaceholderText('Name, 07-12, is:secret...')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_results = QtWidgets.QListWidget()
+        self.search_results.hide()
+
+        self.search_edit.setToolTip('<b>Search:</b><br>Finds levels and worlds in every world. Search for:'
+            '<br><b>text</b> - names containing the text'
+            '<br><b>07-12</b> - levels with that filename or display name'
+            '<br><b>07-12.arc</b> or <b>file:7-12</b> - levels with that filename'
+            '<br><b>display:7-12</b> - levels with that display name'
+            '<br><b>is:secret</b> or <b>not:secret</b> - levels with or without a secret exit'
+            ' (also <b>normal</b>, <b>starcoins</b> and <b>right</b>)'
+            '<br>Use several terms to find levels that match all of them. Press Enter to go to the first result.')
+
+        self.search_edit.textChanged.connect(self.update_search)
+        self.search_edit.returnPressed.connect(self.handle_search_return)
+        self.search_results.itemActivated.connect(self.handle_search_result)
+        self.search_results.itemClicked.connect(self.handle_search_result)
+
+        L = QtWidgets.QVBoxLayout(search_box)
+        L.addWidget(self.search_edit)
+        L.addWidget(self.search_results)
+
+
         # Create the World Options widget
         self.world_editor = WorldOptionsEditor()
-        self.world_editor.data_changed.connect(self.handle_world_data_change)
+        self.world_editor.edit_requested.connect(self.handle_edit_request)
 
 
         # Create the Levels widgets
         levels_box = QtWidgets.QWidget()
-        self.level_picker = DNDPicker(self.handle_level_drag_drop)
+        self.level_model = ObjectListModel('application/x-level-info-editor-levels', level_label)
+        self.level_picker = DNDPicker(self.level_model)
         self.level_editor = LevelEditor()
         self.add_level_button = QtWidgets.QPushButton('Add')
         self.remove_level_button = QtWidgets.QPushButton('Remove')
+        self.renumber_button = QtWidgets.QPushButton('Renumber')
+        renumber_menu = QtWidgets.QMenu(self.renumber_button)
+        renumber_files_action = renumber_menu.addAction('Filenames')
+        renumber_display_action = renumber_menu.addAction('Display Names')
+        self.renumber_button.setMenu(renumber_menu)
 
         # Add some tooltips
         self.add_level_button.setToolTip('<b>Add:</b><br>Adds a level to the currently selected world.')
-        self.remove_level_button.setToolTip('<b>Remove:</b><br>Removes the currently selected level from the world.')
+        self.remove_level_button.setToolTip('<b>Remove:</b><br>Removes the currently selected levels from the world.')
+        self.renumber_button.setToolTip('<b>Renumber:</b><br>Numbers the filenames or display names of the selected levels 1, 2, 3... in order. If only one level is selected, every level in the world is renumbered.')
 
         # Disable some
         self.add_level_button.setEnabled(False)
         self.remove_level_button.setEnabled(False)
+        self.renumber_button.setEnabled(False)
 
         # Connect them to handlers
-        self.level_picker.currentItemChanged.connect(self.handle_level_select)
-        self.level_editor.data_changed.connect(self.handle_level_data_change)
+        self.level_picker.selectionModel().selectionChanged.connect(self.handle_level_select)
+        self.level_picker.move_requested.connect(self.handle_level_move)
+        self.level_editor.edit_requested.connect(self.handle_edit_request)
         self.level_editor.nav_request.connect(self.handle_level_nav_request)
         self.add_level_button.clicked.connect(self.handle_add_level)
         self.remove_level_button.clicked.connect(self.handle_remove_level)
+        renumber_files_action.triggered.connect(lambda: self.renumber_levels('file_level'))
+        renumber_display_action.triggered.connect(lambda: self.renumber_levels('display_level'))
 
         # Make a layout
         L = QtWidgets.QGridLayout(levels_box)
-        L.addWidget(self.level_picker, 0, 0, 1, 2)
+        L.addWidget(self.level_picker, 0, 0, 1, 3)
         L.addWidget(self.add_level_button, 1, 0)
         L.addWidget(self.remove_level_button, 1, 1)
-        L.addWidget(self.level_editor, 2, 0, 1, 2)
+        L.addWidget(self.renumber_button, 1, 2)
+        L.addWidget(self.level_editor, 2, 0, 1, 3)
 
 
-        # Create the Comments editor and layout
-        comments_box = QtWidgets.QWidget()
+        # The Comments and Problems tabs are filled in the first time
+        # they're shown, so they don't slow down startup (see
+        # handle_tab_change())
+        self.comments_box = QtWidgets.QWidget()
+        self.comments_editor = None
+        self.problems_box = QtWidgets.QWidget()
+        self.problems_list = None
+        self.problems_model = None
+
+
+        # Create the tab widget
+        self.tab = QtWidgets.QTabWidget()
+        self.tab.addTab(self.world_editor, 'World Options')
+        self.tab.addTab(levels_box, 'Levels')
+        self.tab.addTab(self.comments_box, 'Comments')
+        self.tab.addTab(self.problems_box, 'Problems')
+        self.tab.currentChanged.connect(self.handle_tab_change)
+
+        # Make a main layout
+        left_layout = QtWidgets.QVBoxLayout()
+        left_layout.addWidget(search_box)
+        left_layout.addWidget(worlds_box, 1)
+        L = QtWidgets.QHBoxLayout(self)
+        L.addLayout(left_layout)
+        L.addWidget(self.tab)
+
+        # Set up label updates
+        self.pending_label_updates = {}
+        self.label_timer = QtCore.QTimer(self)
+        self.label_timer.setSingleShot(True)
+        self.label_timer.setInterval(25)
+        self.label_timer.timeout.connect(self.update_pending_labels)
+
+        # Set up problem list updates (see update_results())
+        self.problems_timer = QtCore.QTimer(self)
+        self.problems_timer.setSingleShot(True)
+        self.problems_timer.setInterval(250)
+        self.problems_timer.timeout.connect(self.update_problems)
+
+    def handle_tab_change(self, index: int) -> None:
+        """Handle a tab being shown, by creating its contents if that
+        hasn't been done yet"""
+        page = self.tab.widget(index)
+        if page is self.comments_box and self.comments_editor is None:
+            self.create_comments_tab()
+        elif page is self.problems_box and self.problems_list is None:
+            self.create_problems_tab()
+
+    def create_comments_tab(self) -> None:
+        """Create the Comments editor and layout"""
         label = QtWidgets.QLabel('You can add comments to the file here:')
-        self.comments_editor = QtWidgets.QPlainTextEdit()
+        self.comments_editor = QtWidgets.QPlainTextEdit(self.file.comments)
 
         self.comments_editor.textChanged.connect(self.handle_comments_changed)
 
-        L = QtWidgets.QVBoxLayout(comments_box)
+        L = QtWidgets.QVBoxLayout(self.comments_box)
         L.addWidget(label)
         L.addWidget(self.comments_editor)
 
+    def create_problems_tab(self) -> None:
+        """Create the Problems list and layout"""
+        label = QtWidgets.QLabel('Problems that stop the file from being saved, or that the game may not handle well:')
+        label.setWordWrap(True)
+        self.problems_model = ProblemListModel(
+            self.style().standardIcon(QtWidgets.QStyle.StandardPixmap.SP_MessageBoxCritical),
+            self.style().standardIcon(QtWidgets.QStyle.StandardPixmap.SP_MessageBoxWarning))
+        self.problems_list = QtWidgets.QListView()
+        self.problems_list.setModel(self.problems_model)
+        self.problems_list.setUniformItemSizes(True)
+
+        self.problems_list.activated.connect(self.handle_problem_picked)
+        self.problems_list.clicked.connect(self.handle_problem_picked)
+
+        L = QtWidgets.QVBoxLayout(self.problems_box)
+        L.addWidget(label)
+        L.addWidget(self.problems_list)
 
-        # Create the tab widget
-        tab = QtWidgets.QTabWidget()
-        tab.addTab(self.world_editor, 'World Options')
-        tab.addTab(levels_box, 'Levels')
-        tab.addTab(comments_box, 'Comments')
+        self.update_problems()
 
-        # Make a main layout
-        L = QtWidgets.QHBoxLayout(self)
-        L.addWidget(worlds_box)
-        L.addWidget(tab)
-
-    def set_file(self, file: LevelInfoFile) -> None:
-        """Change the file to view"""
+    def set_file(self, file: LevelInfoFile, object_index: Optional[ObjectIndex] = None,
+                 search_index: Optional[SearchIndex] = None, validator: Optional[Validator] = None) -> None:
+        """Change the file to view. Indexes that were already made for
+        it (for example, by LoadThread) can be passed in; otherwise, the
+        search index is built the first time something is searched for."""
         self.file = file
+        self.object_index = object_index if object_index is not None else ObjectIndex(file)
+        self.search_index = search_index
+        self.validator = validator if validator is not None else Validator(self.object_index)
 
-        self.world_picker.clear()
-        self.level_picker.clear()
-
-        # Add worlds
-        for world in self.file.worlds:
-            item = QtWidgets.QListWidgetItem()  # self.update_names() will add the name
-            item.setData(QtCore.Qt.ItemDataRole.UserRole, world)
-            self.world_picker.addItem(item)
+        # Show the worlds (resetting the models doesn't emit any
+        # selection signals, so update the editors manually)
+        self.world_model.set_items(self.file.worlds)
+        self.handle_world_select()
 
         # Add comments
-        self.comments_editor.setPlainText(self.file.comments)
+        if self.comments_editor is not None:
+            self.comments_editor.setPlainText(self.file.comments)
 
-        # Update world names
-        self.update_names()
+        # Edits of the previous file can't be undone anymore
+        self.undo_stack.clear()
 
-    def update_names(self) -> None:
-        """Update item names in all three item-picker widgets"""
-        for item in self.world_picker.findItems('', QtCore.Qt.MatchFlag.MatchContains):
-            world = item.data(QtCore.Qt.ItemDataRole.UserRole)
+        self.update_search()
+        self.update_problems()
 
-            text = 'World '
-            if world.world_number is None:
-                text += '?'
-            else:
-                text += str(world.world_number)
-
-                half_names = []
-                if world.has_left: half_names.append(world.name_left.strip())
-                if world.has_right: half_names.append(world.name_right.strip())
-                while '' in half_names:
-                    half_names.remove('')
+    def begin_loading(self) -> None:
+        """Empty the world list, so that worlds can be added to it with
+        add_loaded_world() as a file is loaded. The file isn't replaced
+        until set_file() is called, and cancel_loading() shows it
+        again."""
+        self.world_model.set_items([])
+        self.handle_world_select()
 
-                if half_names:
-                    text += f' ({", ".join(half_names)})'
+    def add_loaded_world(self, world: WorldInfo) -> None:
+        """Show a world from the file being loaded"""
+        self.world_model.append(world)
 
-            item.setText(text)
+    def cancel_loading(self) -> None:
+        """Show the current file again, after begin_loading()"""
+        self.world_model.set_items(self.file.worlds)
+        self.handle_world_select()
 
-        for item in self.level_picker.findItems('', QtCore.Qt.MatchFlag.MatchContains):
-            level = item.data(QtCore.Qt.ItemDataRole.UserRole)
-            item.setText(level.name)
+    def update_names(self) -> None:
+        """Update item names in both item-picker widgets"""
+        # The models generate labels on demand, so this only has to tell
+        # the views to redraw the visible rows
+        self.world_model.refresh()
+        self.level_model.refresh()
+
+    def schedule_label_update(self, obj: object) -> None:
+        """Update the label of one world or level soon. Edits that
+        happen in quick succession (such as typing) are combined."""
+        self.pending_label_updates[id(obj)] = obj
+        if not self.label_timer.isActive():
+            self.label_timer.start()
+
+    def update_pending_labels(self) -> None:
+        """Update the labels of the worlds and levels passed to
+        schedule_label_update()"""
+        for obj in self.pending_label_updates.values():
+            # The edited object is almost always the current one, so
+            # check that row first
+            if isinstance(obj, WorldInfo):
+                self.world_model.refresh_object(obj, self.world_picker.current_row())
+            else:
+                self.level_model.refresh_object(obj, self.level_picker.current_row())
+        self.pending_label_updates.clear()
 
     def save_file(self) -> bytes:
         """Return the file in saved form"""
         return self.file.save()  # self.file does this for us
 
 
+    # Undo/redo functions
+
+    def edit(self, changes: List[Tuple[object, str, object]], text: str = '', can_merge: bool = False) -> None:
+        """Set attributes of worlds, levels or the file, as one step that
+        can be undone. changes is a list of (object, attr, value)."""
+        changes = [change for change in changes if getattr(change[0], change[1]) != change[2]]
+        if not changes: return
+
+        if not text:
+            text = 'Change ' + FIELD_NAMES.get(changes[0][1], changes[0][1])
+        self.undo_stack.push(EditFieldsCommand(self, changes, text, can_merge))
+
+    def handle_edit_request(self, changes: List[Tuple[object, str, object]], can_merge: bool) -> None:
+        """Handle an editor widget asking to change some values"""
+        self.edit(changes, can_merge=can_merge)
+
+    def handle_fields_changed(self, changes: List[Tuple[object, str, object]], refresh_editors: bool) -> None:
+        """Handle attributes of worlds, levels or the file being set by an
+        undo command. If refresh_editors is True, the editor widgets are
+        updated to show the new values."""
+        self.file_edited.emit([level_info_journal.set_record(self.object_index, *change) for change in changes])
+
+        objects = [change[0] for change in changes]
+        for obj in objects:
+            if isinstance(obj, (LevelInfo, WorldInfo)):
+                self.object_changed.emit(obj)
+                if self.search_index is not None:
+                    self.search_index.update(obj)
+            self.validator.update(obj)
+        self.update_results()
+
+        if len(objects) == 1:
+            if objects[0] is not self.file:
+                self.schedule_label_update(objects[0])
+        else:
+            self.update_names()
+
+        if not refresh_editors: return
+
+        # Objects are compared by identity, since equal worlds or levels
+        # can be different objects
+        ids = {id(obj) for obj in objects}
+        if id(self.world_editor.world) in ids:
+            self.world_editor.set_world(self.world_editor.world)
+        if any(id(level) in ids for level in self.level_editor.levels):
+            self.level_editor.set_levels(self.level_editor.levels)
+        if id(self.file) in ids and self.comments_editor is not None:
+            self.comments_editor.blockSignals(True)
+            self.comments_editor.setPlainText(self.file.comments)
+            self.comments_editor.blockSignals(False)
+
+    def model_for(self, items: list) -> Optional[ObjectListModel]:
+        """Return the model showing a list, or None if it isn't shown.
+        If it's the levels of a world that isn't selected, that world is
+        selected first, so that the user can see what happens."""
+        if items is self.world_model.items:
+            return self.world_model
+        if items is not self.level_model.items:
+            for row, world in enumerate(self.file.worlds):
+                if world.levels is items:
+                    self.world_picker.set_current_row(row)
+                    break
+        if items is self.level_model.items:
+            return self.level_model
+        return None
+
+    def picker_for(self, model: ObjectListModel) -> DNDPicker:
+        """Return the picker that shows a model"""
+        return self.world_picker if model is self.world_model else self.level_picker
+
+    def insert_objects(self, items: list, rows: List[Tuple[int, object]]) -> None:
+        """Insert (row, object) pairs into a list of worlds or levels, in
+        row order, and select them"""
+        model = self.model_for(items)
+        records = []
+        for row, obj in rows:
+            if model is None:
+                items.insert(row, obj)
+            else:
+                model.insert(row, obj)
+            self.object_index.insert(items, obj)
+            records.append(level_info_journal.insert_record(self.object_index, items, row, obj))
+            if self.search_index is not None:
+                self.search_index.insert(obj)
+            self.validator.insert(obj)
+        self.file_edited.emit(records)
+        self.update_results()
+
+        if model is not None:
+            picker = self.picker_for(model)
+            picker.set_current_row(rows[0][0])
+            for row, _ in rows[1:]:
+                picker.selectionModel().select(model.index(row), QtCore.QItemSelectionModel.SelectionFlag.Select)
+
+    def remove_objects(self, items: list, rows: List[Tuple[int, object]]) -> None:
+        """Remove (row, object) pairs from a list of worlds or levels"""
+        model = self.model_for(items)
+
+        # Start from the end so the other rows don't shift
+        records = []
+        for row, obj in reversed(rows):
+            records.append(level_info_journal.remove_record(self.object_index, items, row))
+            if model is None:
+                del items[row]
+            else:
+                model.removeRows(row, 1)
+            if self.search_index is not None:
+                self.search_index.remove(obj)
+            self.validator.remove(obj)
+            self.object_index.remove(obj)
+        self.file_edited.emit(records)
+        self.update_results()
+
+    def move_rows(self, items: list, rows: List[int], destination: int) -> bool:
+        """Move rows (sorted, without duplicates) of a list of worlds or
+        levels (see ObjectListModel.move_rows())"""
+        model = self.model_for(items)
+        if model is None:
+            return False
+
+        if not model.move_rows(rows, destination):
+            return False
+        self.file_edited.emit([level_info_journal.move_record(self.object_index, items, rows, destination)])
+        self.update_results()
+        return True
+
+    def unmove_rows(self, items: list, rows: List[int], destination: int) -> None:
+        """Undo move_rows()"""
+        model = self.model_for(items)
+        if model is None:
+            unmove_items(items, rows, destination)
+        else:
+            model.unmove_rows(rows, destination)
+        self.file_edited.emit([level_info_journal.move_record(self.object_index, items, rows, destination, True)])
+        self.update_results()
+
+
+    # Search and problem list functions
+
+    def update_results(self) -> None:
+        """Update the search results and the problem list after an edit.
+        The problem list is updated a little later, so that typing
+        doesn't rebuild it for every keystroke."""
+        self.update_search()
+        if not self.problems_timer.isActive():
+            self.problems_timer.start()
+
+    def update_problems(self) -> None:
+        """Update the problem count and list from the validator. Only the
+        first MAX_PROBLEMS problems are listed, so this doesn't have to
+        go through every problem."""
+        count = self.validator.count_problems()
+        self.tab.setTabText(self.tab.indexOf(self.problems_box), f'Problems ({count})' if count else 'Problems')
+        if self.problems_model is None: return
+
+        problems = list(itertools.islice(self.validator.iter_problems(), MAX_PROBLEMS))
+        self.problems_model.set_problems(problems, count)
+
+    def get_search_index(self) -> SearchIndex:
+        """Return the search index, building it if that hasn't been done
+        yet. That takes a while for big files, so it's only done when
+        it's needed."""
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.object_index)
+        return self.search_index
+
+    def update_search(self) -> None:
+        """List the results for the text in the search box"""
+        self.search_results.clear()
+
+        query = self.search_edit.text()
+        if not query.strip():
+            self.search_results.hide()
+            return
+
+        results = self.get_search_index().search(query)
+        for obj in results[:MAX_SEARCH_RESULTS]:
+            if isinstance(obj, WorldInfo):
+                text = world_label(obj)
+            else:
+                world = self.object_index.get_world(obj)
+                text = f'{world_label(world)}: {level_label(obj)} ({obj.file_world:02}-{obj.file_level:02}.arc)'
+            item = QtWidgets.QListWidgetItem(text)
+            item.setData(QtCore.Qt.ItemDataRole.UserRole, obj)
+            self.search_results.addItem(item)
+
+        # Add a note if some (or all) results aren't listed
+        if len(results) > MAX_SEARCH_RESULTS or not results:
+            if results:
+                text = f'({len(results) - MAX_SEARCH_RESULTS} more)'
+            else:
+                text = '(No results)'
+            item = QtWidgets.QListWidgetItem(text)
+            item.setFlags(QtCore.Qt.ItemFlag.NoItemFlags)
+            self.search_results.addItem(item)
+
+        self.search_results.show()
+
+    def handle_search_return(self) -> None:
+        """Handle Enter being pressed in the search box"""
+        if self.search_results.count():
+            self.handle_search_result(self.search_results.item(0))
+
+    def handle_search_result(self, item: QtWidgets.QListWidgetItem) -> None:
+        """Handle a search result being picked"""
+        obj = item.data(QtCore.Qt.ItemDataRole.UserRole)
+        if obj is not None:
+            self.show_object(obj)
+
+    def handle_problem_picked(self, index: QtCore.QModelIndex) -> None:
+        """Handle a problem being picked"""
+        obj = index.data(QtCore.Qt.ItemDataRole.UserRole)
+        if obj is not None:
+            self.show_object(obj)
+
+    def show_object(self, obj: object) -> None:
+        """Select a world or level, and show its editor"""
+        if obj is self.file:
+            self.tab.setCurrentIndex(2)
+            return
+        if isinstance(obj, WorldInfo):
+            world, level = obj, None
+        else:
+            world, level = self.object_index.get_world(obj), obj
+
+        row = self.world_model.row_of(world, self.world_picker.current_row())
+        if row == -1: return
+        self.world_picker.set_current_row(row)
+
+        if level is None:
+            self.tab.setCurrentIndex(0)
+        else:
+            self.level_picker.set_current_row(self.level_model.row_of(level))
+            self.tab.setCurrentIndex(1)
+
+
     # World functions
 
     def handle_world_select(self) -> None:
         """Handle the user picking a world"""
         self.world_editor.clear()
-        self.level_picker.clear()
         self.level_editor.clear()
 
-        # Get the current item (it's None if nothing's selected)
-        current_item = self.world_picker.currentItem()
+        # Get the current world (it's None if nothing's selected)
+        world = self.world_picker.current_object()
 
         # Enable/disable buttons
-        if current_item is None:
-            self.remove_world_button.setEnabled(False)
-            self.add_level_button.setEnabled(False)
-            self.remove_level_button.setEnabled(False)
+        self.remove_world_button.setEnabled(world is not None)
+        self.add_level_button.setEnabled(world is not None)
+        self.renumber_button.setEnabled(world is not None)
+
+        # Show the world's levels. This doesn't copy anything, so it
+        # takes the same amount of time no matter how many there are.
+        self.level_model.set_items([] if world is None else world.levels)
+        if world is not None and world.levels:
+            self.level_picker.set_current_row(0)
         else:
-            index = self.world_picker.indexFromItem(current_item).row()
-            num_items = self.world_picker.count()
-
-            self.remove_world_button.setEnabled(True)
-            self.add_level_button.setEnabled(True)
-
-        # Get the world
-        if current_item is None: return
-        world = current_item.data(QtCore.Qt.ItemDataRole.UserRole)
+            self.handle_level_select()
 
         # Set up the World Options Editor
-        self.world_editor.set_world(world)
-
-        # Add levels to self.level_picker
-        for level in world.levels:
-            item = QtWidgets.QListWidgetItem(level.name)
-            item.setData(QtCore.Qt.ItemDataRole.UserRole, level)
-            self.level_picker.addItem(item)
-        self.level_picker.setCurrentRow(0)
-
+        if world is not None:
+            self.world_editor.set_world(world)
 
     def handle_add_world(self) -> None:
         """Handle "Add World" button clicks"""
-        world = WorldInfo()
-        text = 'World (unknown)'
-
-        # Add it to self.file and self.world_picker
-        self.file.worlds.append(world)
-        item = QtWidgets.QListWidgetItem(text)
-        item.setData(QtCore.Qt.ItemDataRole.UserRole, world)
-        self.world_picker.addItem(item)
-        self.world_picker.scrollToItem(item)
-        item.setSelected(True)
-
-        self.update_names()
+        # Add it to self.file (through the model) and select it
+        rows = [(len(self.file.worlds), WorldInfo())]
+        self.undo_stack.push(ListEditCommand(self, self.file.worlds, rows, True, 'Add World'))
 
     def handle_remove_world(self) -> None:
         """Handle "Remove World" button clicks"""
-        item = self.world_picker.currentItem()
-        world = item.data(QtCore.Qt.ItemDataRole.UserRole)
-
-        # Remove it from file and the picker
-        self.file.worlds.remove(world)
-        self.world_picker.takeItem(self.world_picker.row(item))
+        rows = sorted({index.row() for index in self.world_picker.selectionModel().selectedRows()})
+        if not rows and self.world_picker.current_row() != -1:
+            rows = [self.world_picker.current_row()]
 
-        self.update_names()
+        if not rows: return
 
-    def handle_world_drag_drop(self) -> None:
-        """Handle dragging-and-dropping in the world picker"""
-        new_worlds = []
-        for item in self.world_picker.findItems('', QtCore.Qt.MatchFlag.MatchContains):
-            new_worlds.append(item.data(QtCore.Qt.ItemDataRole.UserRole))
-        self.file.worlds = new_worlds
+        # Remove them from self.file (through the model)
+        worlds = self.file.worlds
+        text = 'Remove World' if len(rows) == 1 else 'Remove Worlds'
+        self.undo_stack.push(ListEditCommand(self, worlds, [(row, worlds[row]) for row in rows], False, text))
 
-        self.update_names()
-
-    def handle_world_data_change(self) -> None:
-        """Handle the user changing world data"""
-        self.update_names()
+    def handle_world_move(self, rows: List[int], destination: int) -> None:
+        """Handle worlds being dragged to a new position"""
+        self.undo_stack.push(MoveCommand(self, self.world_model.items, rows, destination, 'Move Worlds'))
 
 
     # Level functions
 
+    def selected_levels(self) -> List[LevelInfo]:
+        """Return the selected levels, in order"""
+        rows = sorted(index.row() for index in self.level_picker.selectionModel().selectedRows())
+        return [self.level_model.item(row) for row in rows]
+
     def handle_level_select(self) -> None:
-        """Handle the user picking a level"""
+        """Handle the user picking one or more levels"""
         self.level_editor.clear()
 
-        # Get the current item (it's None if nothing's selected)
-        current_item = self.level_picker.currentItem()
+        # Get the selected levels, or the current one if nothing's
+        # selected (the list is empty if there isn't one)
+        levels = self.selected_levels()
+        if not levels and self.level_picker.current_object() is not None:
+            levels = [self.level_picker.current_object()]
 
         # Enable/disable buttons
-        if current_item is None:
-            self.remove_level_button.setEnabled(False)
-        else:
-            index = self.level_picker.indexFromItem(current_item).row()
-            num_items = self.level_picker.count()
+        self.remove_level_button.setEnabled(bool(levels))
 
-            self.remove_level_button.setEnabled(True)
+        # Set LevelEdit to edit them
+        if levels:
+            self.level_editor.set_levels(levels)
 
-        # Get the level
-        if current_item is None: return
-        level = current_item.data(QtCore.Qt.ItemDataRole.UserRole)
+    def renumber_levels(self, attr: str) -> None:
+        """Number the selected levels (or all of them, if there are less
+        than two selected) 1, 2, 3... using the file_level or
+        display_level attribute"""
+        levels = self.selected_levels()
+        if len(levels) < 2:
+            levels = list(self.level_model.items)
+        if not levels: return
 
-        # Set LevelEdit to edit it
-        self.level_editor.setLevel(level)
+        self.edit([(level, attr, min(i + 1, 255)) for i, level in enumerate(levels)], 'Renumber Levels')
 
-    def handle_level_data_change(self) -> None:
-        """Handle the user changing level data"""
-        self.update_names()
+        # Show the new values
+        self.handle_level_select()
 
     def handle_level_nav_request(self, is_up: bool, refocus_widget: QtWidgets.QWidget) -> None:
         """Handle the user pressing PgUp or PgDn to switch between levels"""
-        current_row = self.level_picker.currentRow()
+        current_row = self.level_picker.current_row()
 
         new_row = current_row + (-1 if is_up else 1)
         new_row = max(0, new_row)
-        new_row = min(new_row, self.level_picker.count() - 1)
+        new_row = min(new_row, self.level_model.rowCount() - 1)
 
         if new_row != current_row:
-            self.level_picker.setCurrentRow(new_row)
+            self.level_picker.set_current_row(new_row)
             refocus_widget.setFocus(True)
 
     def handle_add_level(self) -> None:
         """Handle "Add Level" button clicks"""
-        level = LevelInfo(name='New Level')
-        item = QtWidgets.QListWidgetItem(level.name)
-        item.setData(QtCore.Qt.ItemDataRole.UserRole, level)
-
-        # Add it to the current world and self.level_picker
-        world = self.world_picker.currentItem().data(QtCore.Qt.ItemDataRole.UserRole)
-        world.levels.append(level)
-        self.level_picker.addItem(item)
-        self.level_picker.scrollToItem(item)
-        item.setSelected(True)
-
-        self.update_names()
+        # Add it to the current world (through the model) and select it
+        levels = self.level_model.items
+        rows = [(len(levels), LevelInfo(name='New Level'))]
+        self.undo_stack.push(ListEditCommand(self, levels, rows, True, 'Add Level'))
 
     def handle_remove_level(self) -> None:
         """Handle "Remove Level" button clicks"""
-        item = self.level_picker.currentItem()
-        level = item.data(QtCore.Qt.ItemDataRole.UserRole)
-
-        # Remove it from file and the picker
-        world = self.world_picker.currentItem().data(QtCore.Qt.ItemDataRole.UserRole)
-        world.levels.remove(level)
-        self.level_picker.takeItem(self.level_picker.row(item))
+        rows = sorted({index.row() for index in self.level_picker.selectionModel().selectedRows()})
+        if not rows and self.level_picker.current_row() != -1:
+            rows = [self.level_picker.current_row()]
 
-        self.update_names()
+        if not rows: return
 
-    def handle_level_drag_drop(self) -> None:
-        """Handle dragging-and-dropping in the level picker"""
-        world = self.world_picker.currentItem().data(QtCore.Qt.ItemDataRole.UserRole)
+        # Remove them from the current world (through the model)
+        levels = self.level_model.items
+        text = 'Remove Level' if len(rows) == 1 else 'Remove Levels'
+        self.undo_stack.push(ListEditCommand(self, levels, [(row, levels[row]) for row in rows], False, text))
 
-        new_levels = []
-        for item in self.level_picker.findItems('', QtCore.Qt.MatchFlag.MatchContains):
-            new_levels.append(item.data(QtCore.Qt.ItemDataRole.UserRole))
-
-        world = self.world_picker.currentItem().data(QtCore.Qt.ItemDataRole.UserRole)
-        world.levels = new_levels
-
-        self.update_names()
+    def handle_level_move(self, rows: List[int], destination: int) -> None:
+        """Handle levels being dragged to a new position"""
+        self.undo_stack.push(MoveCommand(self, self.level_model.items, rows, destination, 'Move Levels'))
 
 
     # Comments functions
 
     def handle_comments_changed(self) -> None:
         """Handle comments changes"""
-        self.file.comments = str(self.comments_editor.toPlainText())
+        self.edit([(self.file, 'comments', str(self.comments_editor.toPlainText()))], can_merge=True)
 
 
 
@@ -577,7 +1164,7 @@ class LevelInfoViewer(QtWidgets.QWidget):
 
 class WorldOptionsEditor(QtWidgets.QWidget):
     """Widget that allows the user to change world settings"""
-    data_changed = QtCore.pyqtSignal()
+    edit_requested = QtCore.pyqtSignal(list, bool)  # [(object, attr, value), ...], can merge
 
     def __init__(self):
         super().__init__()
@@ -644,88 +1231,85 @@ class WorldOptionsEditor(QtWidgets.QWidget):
 
     def set_world(self, world: WorldInfo) -> None:
         """Set the world to be edited"""
-        self.world = world
+        # self.world is set at the end, so that the handlers ignore the
+        # changes made here
+        self.world = None
 
         # Enable the first box, and potentially others
-        if world.has_left or world.has_right:
-            self.number_edit.setEnabled(True)
+        has_number = world.has_left or world.has_right
+        self.number_edit.setEnabled(has_number)
         self.left_exists_edit.setEnabled(True)
         self.left_name_edit.setEnabled(world.has_left)
         self.right_exists_edit.setEnabled(True)
         self.right_name_edit.setEnabled(world.has_right)
 
         # Set them to the correct values
-        if world.has_left or world.has_right:
-            self.number_edit.setValue(world.world_number)
+        self.number_edit.setValue(world.world_number if has_number else 0)
         self.left_exists_edit.setChecked(world.has_left)
-        if world.has_left:
-            self.left_name_edit.setText(world.name_left)
+        self.left_name_edit.setText(world.name_left if world.has_left else '')
         self.right_exists_edit.setChecked(world.has_right)
-        if world.has_right:
-            self.right_name_edit.setText(world.name_right)
+        self.right_name_edit.setText(world.name_right if world.has_right else '')
+
+        self.world = world
 
     def handle_number_change(self) -> None:
         """Handle self.number_edit changes"""
         if self.world is None: return
-        self.world.world_number = self.number_edit.value()
-        self.data_changed.emit()
+        self.edit_requested.emit([(self.world, 'world_number', self.number_edit.value())], True)
 
     def handle_left_exists_change(self) -> None:
         """Handle self.left_exists_edit changes"""
         if self.world is None: return
-        self.world.has_left = self.left_exists_edit.isChecked()
-        self.left_name_edit.setEnabled(self.world.has_left)
-        if not self.world.has_left:
-            self.left_name_edit.setText('')
-        self.number_edit.setEnabled(self.world.has_left or self.world.has_right)
-        if (not self.world.has_left) and (not self.world.has_right):
-            self.world.world_number = None
-            self.number_edit.setValue(0)
-        elif self.world.world_number is None:
-            self.world.world_number = 0
-            self.number_edit.setValue(0)
-        self.data_changed.emit()
+        self.set_half_exists('has_left', self.left_exists_edit.isChecked())
 
     def handle_left_name_change(self) -> None:
         """Handle self.left_name_edit changes"""
         if self.world is None: return
-        self.world.name_left = str(self.left_name_edit.text())
-        self.data_changed.emit()
+        self.edit_requested.emit([(self.world, 'name_left', str(self.left_name_edit.text()))], True)
 
     def handle_right_exists_change(self) -> None:
         """Handle self.right_exists_edit changes"""
         if self.world is None: return
-        self.world.has_right = self.right_exists_edit.isChecked()
-        self.right_name_edit.setEnabled(self.world.has_right)
-        if not self.world.has_right: self.right_name_edit.setText('')
-        self.number_edit.setEnabled(self.world.has_left or self.world.has_right)
-        if (not self.world.has_left) and (not self.world.has_right):
-            self.world.world_number = None
-            self.number_edit.setValue(0)
-        elif self.world.world_number is None:
-            self.world.world_number = 0
-            self.number_edit.setValue(0)
-        self.data_changed.emit()
+        self.set_half_exists('has_right', self.right_exists_edit.isChecked())
 
     def handle_right_name_change(self) -> None:
         """Handle self.right_name_edit changes"""
         if self.world is None: return
-        self.world.name_right = str(self.right_name_edit.text())
-        self.data_changed.emit()
+        self.edit_requested.emit([(self.world, 'name_right', str(self.right_name_edit.text()))], True)
+
+    def set_half_exists(self, attr: str, exists: bool) -> None:
+        """Turn one half of the world on or off. The world only has a
+        world number if at least one half is on."""
+        world = self.world
+        changes = [(world, attr, exists)]
+
+        has_left = exists if attr == 'has_left' else world.has_left
+        has_right = exists if attr == 'has_right' else world.has_right
+        if not (has_left or has_right):
+            changes.append((world, 'world_number', None))
+        elif world.world_number is None:
+            changes.append((world, 'world_number', 0))
+
+        self.edit_requested.emit(changes, False)
+
+        # Enable/disable the other widgets to match
+        self.set_world(world)
 
 
 
 
 
 class LevelEditor(QtWidgets.QGroupBox):
-    """Widget that allows the user to change level settings"""
-    data_changed = QtCore.pyqtSignal()
+    """Widget that allows the user to change level settings. If several
+    levels are being edited, changes apply to all of them at once."""
+    edit_requested = QtCore.pyqtSignal(list, bool)  # [(object, attr, value), ...], can merge
     nav_request = QtCore.pyqtSignal(bool, QtWidgets.QWidget)
 
     def __init__(self):
         super().__init__()
         self.setTitle('Level')
-        self.level = None
+        self.level = None  # the first level being edited
+        self.levels = []
 
         # Create the data-editing widgets
         self.name_edit = QtWidgets.QLineEdit()
@@ -759,8 +1343,10 @@ class LevelEditor(QtWidgets.QGroupBox):
 
         # Connect them to handlers
         self.name_edit.textEdited.connect(self.handle_name_change)
-        self.file_edit.data_changed.connect(self.handle_file_change)
-        self.display_edit.data_changed.connect(self.handle_display_change)
+        self.file_edit.world_changed.connect(self.handle_file_world_change)
+        self.file_edit.level_changed.connect(self.handle_file_level_change)
+        self.display_edit.world_changed.connect(self.handle_display_world_change)
+        self.display_edit.level_changed.connect(self.handle_display_level_change)
         self.in_star_coins_menu_edit.stateChanged.connect(self.handle_star_coins_menu_change)
         self.has_normal_exit_edit.stateChanged.connect(self.handle_has_normal_exit_change)
         self.has_secret_exit_edit.stateChanged.connect(self.handle_has_secret_exit_change)
@@ -807,6 +1393,7 @@ class LevelEditor(QtWidgets.QGroupBox):
     def clear(self) -> None:
         """Clear all data from the LevelEditor"""
         self.level = None
+        self.levels = []
         self.setTitle('Level')
 
         # Disable all of the data-editing widgets
@@ -822,18 +1409,36 @@ class LevelEditor(QtWidgets.QGroupBox):
         self.name_edit.setText('')
         self.file_edit.reset()
         self.display_edit.reset()
-        self.in_star_coins_menu_edit.setChecked(False)
-        self.has_normal_exit_edit.setChecked(False)
-        self.has_secret_exit_edit.setChecked(False)
+        for checkbox in self.checkboxes():
+            checkbox.setTristate(False)
+            checkbox.setChecked(False)
         self.world_half_edit.setCurrentIndex(0)
 
+    def checkboxes(self) -> List[QtWidgets.QCheckBox]:
+        """Return the flag checkboxes"""
+        return [self.in_star_coins_menu_edit, self.has_normal_exit_edit, self.has_secret_exit_edit]
+
     def setLevel(self, level: LevelInfo) -> None:
         """Set the level to be edited"""
-        self.level = level
-        self.setTitle(self.level.name)
+        self.set_levels([level])
+
+    def set_levels(self, levels: List[LevelInfo]) -> None:
+        """Set the levels to be edited. The widgets show the values of
+        the first one, except that checkboxes are partially checked if
+        the levels disagree."""
+        # self.levels is set at the end, so that the handlers ignore the
+        # changes made here
+        self.level = None
+        self.levels = []
+        level = levels[0]
+        if len(levels) == 1:
+            self.setTitle(level.name)
+        else:
+            self.setTitle(f'{len(levels)} Levels')
 
-        # Enable all of the data-editing widgets
-        self.name_edit.setEnabled(True)
+        # Enable all of the data-editing widgets (names can only be
+        # edited one at a time)
+        self.name_edit.setEnabled(len(levels) == 1)
         self.file_edit.setEnabled(True)
         self.display_edit.setEnabled(True)
         self.in_star_coins_menu_edit.setEnabled(True)
@@ -842,64 +1447,78 @@ class LevelEditor(QtWidgets.QGroupBox):
         self.world_half_edit.setEnabled(True)
 
         # Set them to the correct values
-        self.name_edit.setText(level.name)
+        self.name_edit.setText(level.name if len(levels) == 1 else '')
         self.file_edit.set_data(level.file_world, level.file_level)
         self.display_edit.set_data(level.display_world, level.display_level)
-        self.in_star_coins_menu_edit.setChecked(level.in_star_coins_menu)
-        self.has_normal_exit_edit.setChecked(level.has_normal_exit)
-        self.has_secret_exit_edit.setChecked(level.has_secret_exit)
+        for checkbox, attr in zip(self.checkboxes(), ['in_star_coins_menu', 'has_normal_exit', 'has_secret_exit']):
+            values = {getattr(l, attr) for l in levels}
+            checkbox.setTristate(len(values) > 1)
+            if len(values) > 1:
+                checkbox.setCheckState(QtCore.Qt.CheckState.PartiallyChecked)
+            else:
+                checkbox.setChecked(values.pop())
         self.world_half_edit.setCurrentIndex(1 if level.is_right_side else 0)
 
+        self.level = level
+        self.levels = list(levels)
+
+    def set_all(self, attr: str, value: object, can_merge: bool = False) -> None:
+        """Ask for an attribute of every level being edited to be set, as
+        one edit"""
+        if not self.levels: return
+        self.edit_requested.emit([(level, attr, value) for level in self.levels], can_merge)
+
+    def set_all_from_checkbox(self, attr: str, checkbox: QtWidgets.QCheckBox) -> None:
+        """Set a flag of every level being edited from a checkbox"""
+        if not self.levels: return
+        # Once the user picks a value, it applies to every level
+        checkbox.setTristate(False)
+        self.set_all(attr, checkbox.isChecked())
+
     def handle_name_change(self) -> None:
         """Handle self.name_edit changes"""
         if self.level is None: return
-        self.level.name = str(self.name_edit.text())
-        self.data_changed.emit()
+        self.edit_requested.emit([(self.level, 'name', str(self.name_edit.text()))], True)
         self.setTitle('Level - ' + self.level.name)
 
-    def handle_file_change(self) -> None:
-        """Handle self.file_edit changes"""
-        if self.level is None: return
-        self.level.file_world = self.file_edit.get_world()
-        self.level.file_level = self.file_edit.get_level()
-        self.data_changed.emit()
+    def handle_file_world_change(self, value: int) -> None:
+        """Handle self.file_edit world number changes"""
+        self.set_all('file_world', value, True)
 
-    def handle_display_change(self) -> None:
-        """Handle self.display_edit changes"""
-        if self.level is None: return
-        self.level.display_world = self.display_edit.get_world()
-        self.level.display_level = self.display_edit.get_level()
-        self.data_changed.emit()
+    def handle_file_level_change(self, value: int) -> None:
+        """Handle self.file_edit level number changes"""
+        self.set_all('file_level', value, True)
+
+    def handle_display_world_change(self, value: int) -> None:
+        """Handle self.display_edit world number changes"""
+        self.set_all('display_world', value, True)
+
+    def handle_display_level_change(self, value: int) -> None:
+        """Handle self.display_edit level number changes"""
+        self.set_all('display_level', value, True)
 
     def handle_star_coins_menu_change(self) -> None:
         """Handle self.in_star_coins_menu_edit changes"""
-        if self.level is None: return
-        self.level.in_star_coins_menu = self.in_star_coins_menu_edit.isChecked()
-        self.data_changed.emit()
+        self.set_all_from_checkbox('in_star_coins_menu', self.in_star_coins_menu_edit)
 
     def handle_has_normal_exit_change(self) -> None:
         """Handle self.has_normal_exit_edit changes"""
-        if self.level is None: return
-        self.level.has_normal_exit = self.has_normal_exit_edit.isChecked()
-        self.data_changed.emit()
+        self.set_all_from_checkbox('has_normal_exit', self.has_normal_exit_edit)
 
     def handle_has_secret_exit_change(self) -> None:
         """Handle self.has_secret_exit_edit changes"""
-        if self.level is None: return
-        self.level.has_secret_exit = self.has_secret_exit_edit.isChecked()
-        self.data_changed.emit()
+        self.set_all_from_checkbox('has_secret_exit', self.has_secret_exit_edit)
 
     def handle_world_half_change(self) -> None:
         """Handle self.world_half_edit changes"""
-        if self.level is None: return
-        self.level.is_right_side = (self.world_half_edit.currentIndex() == 1)
-        self.data_changed.emit()
+        self.set_all('is_right_side', self.world_half_edit.currentIndex() == 1)
 
 
 
 class LevelNameEdit(QtWidgets.QWidget):
     """Widget that allows a level name to be edited"""
-    data_changed = QtCore.pyqtSignal()
+    world_changed = QtCore.pyqtSignal(int)
+    level_changed = QtCore.pyqtSignal(int)
 
     def __init__(self):
         super().__init__()
@@ -911,8 +1530,8 @@ class LevelNameEdit(QtWidgets.QWidget):
         self.level_num_edit = QtWidgets.QSpinBox()
         self.level_num_edit.setMaximum(255)
 
-        self.world_num_edit.valueChanged.connect(self.emit_data_change)
-        self.level_num_edit.valueChanged.connect(self.emit_data_change)
+        self.world_num_edit.valueChanged.connect(self.world_changed)
+        self.level_num_edit.valueChanged.connect(self.level_changed)
 
         L = QtWidgets.QHBoxLayout(self)
         L.setContentsMargins(0, 0, 0, 0)
@@ -943,10 +1562,6 @@ class LevelNameEdit(QtWidgets.QWidget):
         self.world_num_edit.setValue(0)
         self.level_num_edit.setValue(0)
 
-    def emit_data_change(self) -> None:
-        """Emit the data_changed signal"""
-        self.data_changed.emit()
-
     def set_minimums(self, world_minimum: int, level_minimum: int) -> None:
         """Set the minimum for each spinbox"""
         self.world_num_edit.setMinimum(world_minimum)
@@ -961,20 +1576,254 @@ class LevelNameEdit(QtWidgets.QWidget):
 
 
 
+class SaveThread(QtCore.QThread):
+    """Thread that saves a file through a LevelInfoPatcher"""
+    prepared = QtCore.pyqtSignal()
+    progress = QtCore.pyqtSignal(int, int)
+    save_finished = QtCore.pyqtSignal(str)  # error message, or '' on success
+
+    def __init__(self, patcher: LevelInfoPatcher):
+        super().__init__()
+        self.patcher = patcher
+
+    def run(self) -> None:
+        """Serialize the file, then write it"""
+        # The file must not be edited until "prepared" is emitted
+        try:
+            pending = self.patcher.prepare_save()
+        except Exception as e:
+            self.prepared.emit()
+            self.save_finished.emit(f'The file could not be saved: {e}')
+            return
+        self.prepared.emit()
+
+        try:
+            pending.write(self.progress.emit)
+        except Exception as e:
+            self.patcher.finish_save(False)
+            self.save_finished.emit(f'The file could not be written: {e}')
+            return
+
+        self.patcher.finish_save(True)
+        self.save_finished.emit('')
+
+
+class LoadCancelled(Exception):
+    """Raised inside LoadThread to stop loading"""
+
+
+class LoadThread(QtCore.QThread):
+    """Thread that reads and decodes a file, and makes a
+    LevelInfoPatcher and the viewer's indexes for it"""
+    progress = QtCore.pyqtSignal(int, int)  # bytes read, file size
+    world_loaded = QtCore.pyqtSignal(int, int, object)  # see level_info.WorldCallback
+    load_finished = QtCore.pyqtSignal(object, object, str)  # file, patcher, error message
+
+    # Files are read this many bytes at a time, so that progress can be
+    # shown (and loading cancelled) while reading slow files
+    chunk_size = 0x40000
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.data = None  # the file data, once it's been loaded
+        self.object_index = None  # indexes of the file, for LevelInfoViewer.set_file()
+        self.search_index = None
+        self.validator = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Ask the thread to stop as soon as possible. load_finished is
+        emitted with no file and no error message."""
+        self.cancelled = True
+
+    def check_cancelled(self) -> None:
+        """Stop loading if cancel() was called"""
+        if self.cancelled:
+            raise LoadCancelled
+
+    def handle_world_loaded(self, index: int, count: int, world: WorldInfo) -> None:
+        """Pass decoded worlds on to the GUI thread"""
+        self.check_cancelled()
+        self.world_loaded.emit(index, count, world)
+
+    def run(self) -> None:
+        """Read the file, then decode it"""
+        try:
+            data = bytearray()
+            with open(self.path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                while True:
+                    self.check_cancelled()
+                    chunk = f.read(self.chunk_size)
+                    if not chunk: break
+                    data += chunk
+                    self.progress.emit(len(data), size)
+
+            file = LevelInfoFile.from_data(data, self.handle_world_loaded)
+            if file is None:
+                self.load_finished.emit(None, None, 'This is not a LevelInfo.bin file.')
+                return
+
+            # The patcher reads the file layout from the same data, so
+            # the file doesn't have to be read twice
+            self.check_cancelled()
+            patcher = LevelInfoPatcher(file, self.path, data)
+
+            # Indexing a big file takes a while, so do it here too
+            self.check_cancelled()
+            object_index = ObjectIndex(file)
+            self.check_cancelled()
+            self.search_index = SearchIndex(object_index)
+            self.check_cancelled()
+            self.validator = Validator(object_index)
+            self.object_index = object_index
+            self.data = data
+        except LoadCancelled:
+            self.load_finished.emit(None, None, '')
+            return
+        except Exception as e:
+            self.load_finished.emit(None, None, f'The file could not be opened: {e}')
+            return
+
+        self.load_finished.emit(file, patcher, '')
+
+
+class JournalThread(QtCore.QThread):
+    """Thread that makes a snapshot for a crash recovery journal, so the
+    editor doesn't freeze while big files are saved and written. If no
+    data is given, the thread only saves the file: since the file can be
+    edited while that happens, the data can only be written (by another
+    JournalThread) once MainWindow has checked that it wasn't."""
+    def __init__(self, journal: level_info_journal.EditJournal, file: LevelInfoFile, count: int,
+                 data: Optional[bytes] = None):
+        """count is the journal's record_count at the time the snapshot
+        is of"""
+        super().__init__()
+        self.journal = journal
+        self.file = file
+        self.count = count
+        self.data = data
+        self.writing = data is not None
+        self.failed = False
+        self.error = ''
+
+    def run(self) -> None:
+        """Save the file, or write the snapshot"""
+        try:
+            if self.writing:
+                self.journal.write_snapshot(self.data, self.count)
+            else:
+                self.data = self.file.save()
+        except OSError as e:
+            self.error = f'Could not write the recovery journal: {e}'
+        except Exception:
+            # The file can't be saved as it is (for example, a name has
+            # non-ASCII characters), or it was edited while it was
+            # being saved. Edits keep going to the last snapshot.
+            self.data = None
+            self.failed = True
+
+
+
+class ChangeListDialog(QtWidgets.QDialog):
+    """Non-modal dialog that lists differences or merge conflicts.
+    Clicking one shows the world or level it's about."""
+    def __init__(self, view: LevelInfoViewer, title: str, text: str, items: list):
+        """items is a list of level_info_diff Changes or Conflicts"""
+        super().__init__(view.window())
+        self.view = view
+
+        label = QtWidgets.QLabel(text)
+        label.setWordWrap(True)
+
+        self.list = QtWidgets.QListWidget()
+        for item in items:
+            list_item = QtWidgets.QListWidgetItem(str(item))
+            list_item.setData(QtCore.Qt.ItemDataRole.UserRole, item.obj)
+            self.list.addItem(list_item)
+        self.list.itemActivated.connect(self.handle_item_picked)
+        self.list.itemClicked.connect(self.handle_item_picked)
+
+        button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Close)
+        button_box.rejected.connect(self.close)
+
+        L = QtWidgets.QVBoxLayout(self)
+        L.addWidget(label)
+        L.addWidget(self.list)
+        L.addWidget(button_box)
+
+        self.setWindowTitle(title)
+        self.setMinimumWidth(480)
+
+    def handle_item_picked(self, item: QtWidgets.QListWidgetItem) -> None:
+        """Handle a difference or conflict being clicked"""
+        obj = item.data(QtCore.Qt.ItemDataRole.UserRole)
+        if obj is not None:
+            self.view.show_object(obj)
+
+
+# How often (in ms) the crash recovery journal is replaced by a snapshot,
+# if there have been edits
+JOURNAL_COMPACT_INTERVAL = 30000
+
+# Each journal has a lock file while an editor is using it, so that
+# other editors don't offer to recover it
+JOURNAL_LOCK_SUFFIX = '.lock'
+
+
+def get_journal_dir() -> str:
+    """Return the folder that crash recovery journals are kept in"""
+    cache_dir = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.StandardLocation.CacheLocation)
+    return os.path.join(cache_dir or tempfile.gettempdir(), 'journals')
+
+
 class MainWindow(QtWidgets.QMainWindow):
     """Main window"""
-    def __init__(self):
+    def __init__(self, check_recovery: bool = True):
         super().__init__()
         self.file_path = None
+        self.patcher = None
+        self.save_thread = None
+        self.load_thread = None
+        self.journal = None
+        self.journal_lock = None
+        self.journal_thread = None
+        self.journal_snapshot_wanted = False  # a snapshot was asked for while journal_thread ran
+        self.journal_save_failed = False  # the file couldn't be saved for the last snapshot
+        self.journal_mark = 0
+        self.change_list_dialog = None
+        self.about_text = None
 
         self.view = LevelInfoViewer()
+        self.view.object_changed.connect(self.handle_object_change)
+        self.view.file_edited.connect(self.handle_file_edited)
         self.setCentralWidget(self.view)
 
+        self.journal_timer = QtCore.QTimer(self)
+        self.journal_timer.setInterval(JOURNAL_COMPACT_INTERVAL)
+        self.journal_timer.timeout.connect(self.handle_journal_timer)
+        self.journal_timer.start()
+
         self.create_menu_bar()
 
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+
+        self.cancel_load_button = QtWidgets.QPushButton('Cancel')
+        self.cancel_load_button.clicked.connect(self.handle_cancel_load)
+        self.cancel_load_button.hide()
+        self.statusBar().addPermanentWidget(self.cancel_load_button)
+
         self.setWindowTitle('Level Info Editor')
         self.show()
 
+        # Wait until the window is showing before asking anything
+        if check_recovery:
+            QtCore.QTimer.singleShot(0, self.offer_recovery)
+
     def create_menu_bar(self) -> None:
         """Set up the menu bar"""
         m = self.menuBar()
@@ -982,18 +1831,26 @@ class MainWindow(QtWidgets.QMainWindow):
         # File menu
         f = m.addMenu('&File')
 
-        open_action = f.addAction('Open File...')
-        open_action.setShortcut('Ctrl+O')
-        open_action.triggered.connect(self.handle_open)
+        self.open_action = f.addAction('Open File...')
+        self.open_action.setShortcut('Ctrl+O')
+        self.open_action.triggered.connect(self.handle_open)
 
         self.save_action = f.addAction('Save File')
         self.save_action.setShortcut('Ctrl+S')
         self.save_action.triggered.connect(self.handle_save)
         self.save_action.setEnabled(False)
 
-        save_as_action = f.addAction('Save File As...')
-        save_as_action.setShortcut('Ctrl+Shift+S')
-        save_as_action.triggered.connect(self.handle_save_as)
+        self.save_as_action = f.addAction('Save File As...')
+        self.save_as_action.setShortcut('Ctrl+Shift+S')
+        self.save_as_action.triggered.connect(self.handle_save_as)
+
+        f.addSeparator()
+
+        self.compare_action = f.addAction('Compare With File...')
+        self.compare_action.triggered.connect(self.handle_compare)
+
+        self.merge_action = f.addAction('Merge Changes...')
+        self.merge_action.triggered.connect(self.handle_merge)
 
         f.addSeparator()
 
@@ -1001,6 +1858,17 @@ class MainWindow(QtWidgets.QMainWindow):
         exit_action.setShortcut('Ctrl+Q')
         exit_action.triggered.connect(self.handle_exit)
 
+        # Edit menu
+        e = m.addMenu('&Edit')
+
+        self.undo_action = self.view.undo_stack.createUndoAction(self, 'Undo')
+        self.undo_action.setShortcut(QtGui.QKeySequence.StandardKey.Undo)
+        e.addAction(self.undo_action)
+
+        self.redo_action = self.view.undo_stack.createRedoAction(self, 'Redo')
+        self.redo_action.setShortcut(QtGui.QKeySequence.StandardKey.Redo)
+        e.addAction(self.redo_action)
+
         # Help menu
         h = m.addMenu('&Help')
 
@@ -1011,27 +1879,152 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def handle_open(self) -> None:
         """Handle file opening"""
+        if self.load_thread is not None: return
+
         fp = QtWidgets.QFileDialog.getOpenFileName(self, 'Open File', '', 'Binary Files (*.bin);;All Files (*)')[0]
         if fp == '': return
-        self.file_path = fp
-
-        with open(fp, 'rb') as f:
-            data = f.read()
 
-        LevelInfo = LevelInfoFile.from_data(data)
-        if LevelInfo is None:
+        # Block edits while loading. The world list shows the worlds
+        # as they're decoded.
+        self.view.setEnabled(False)
+        self.view.begin_loading()
+        self.open_action.setEnabled(False)
+        self.save_action.setEnabled(False)
+        self.save_as_action.setEnabled(False)
+        self.undo_action.setEnabled(False)
+        self.redo_action.setEnabled(False)
+
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_load_button.show()
+        self.statusBar().showMessage('Loading...')
+
+        self.load_thread = LoadThread(fp)
+        self.load_thread.progress.connect(self.handle_progress)
+        self.load_thread.world_loaded.connect(self.handle_world_loaded)
+        self.load_thread.load_finished.connect(self.handle_load_finished)
+        self.load_thread.start()
+
+    def handle_world_loaded(self, index: int, count: int, world: WorldInfo) -> None:
+        """Handle the load thread decoding a world"""
+        self.view.add_loaded_world(world)
+        self.progress_bar.setRange(0, count)
+        self.progress_bar.setValue(index + 1)
+
+    def handle_cancel_load(self) -> None:
+        """Handle the Cancel button next to the progress bar"""
+        if self.load_thread is not None:
+            self.load_thread.cancel()
+
+    def handle_load_finished(self, file: Optional[LevelInfoFile], patcher: Optional[LevelInfoPatcher],
+                             error: str) -> None:
+        """Handle the load thread finishing"""
+        path = self.load_thread.path
+        data = self.load_thread.data
+        object_index = self.load_thread.object_index
+        search_index = self.load_thread.search_index
+        validator = self.load_thread.validator
+        self.load_thread.wait()
+        self.load_thread = None
+
+        self.progress_bar.hide()
+        self.cancel_load_button.hide()
+        self.statusBar().clearMessage()
+        self.view.setEnabled(True)
+        self.open_action.setEnabled(True)
+        self.save_as_action.setEnabled(True)
+
+        if file is None:
+            # Go back to the file that was open before
+            self.view.cancel_loading()
+            self.save_action.setEnabled(self.file_path is not None)
+            self.undo_action.setEnabled(self.view.undo_stack.canUndo())
+            self.redo_action.setEnabled(self.view.undo_stack.canRedo())
+            if error:
+                QtWidgets.QMessageBox.critical(self, 'Level Info Editor', error)
             return
 
-        self.view.set_file(LevelInfo)
+        # Unsaved changes to the previous file are thrown away. The
+        # first snapshot of the new one is the data it was loaded from.
+        self.discard_journal()
+
+        self.file_path = path
+        self.view.set_file(file, object_index, search_index, validator)
+        self.patcher = patcher
+        self.start_journal(data)
 
         self.save_action.setEnabled(True)
 
     def handle_save(self) -> None:
         """Handle file saving"""
-        data = self.view.save_file()
+        if self.save_thread is not None: return
+
+        # The patcher only rewrites the changed parts of the file, if
+        # it can. A new one always writes the whole file.
+        if self.patcher is None or self.patcher.path != self.file_path:
+            self.patcher = LevelInfoPatcher(self.view.file, self.file_path)
+
+        # After "Save As", the file's journal is named after the new path
+        if self.journal is not None and self.journal.source_path != self.file_path:
+            self.discard_journal()
+            self.start_journal()
+            self.update_journal_snapshot()
+
+        # Block edits until the thread has serialized the file
+        self.view.setEnabled(False)
+        self.undo_action.setEnabled(False)
+        self.redo_action.setEnabled(False)
+        self.open_action.setEnabled(False)
+        self.save_action.setEnabled(False)
+        self.save_as_action.setEnabled(False)
+
+        self.progress_bar.setRange(0, 0)  # "busy" until we know the size
+        self.progress_bar.show()
+        self.statusBar().showMessage('Saving...')
+
+        self.save_thread = SaveThread(self.patcher)
+        self.save_thread.prepared.connect(self.handle_save_prepared)
+        self.save_thread.progress.connect(self.handle_progress)
+        self.save_thread.save_finished.connect(self.handle_save_finished)
+        self.save_thread.start()
+
+    def handle_save_prepared(self) -> None:
+        """Handle the save thread being done with the file data"""
+        self.view.setEnabled(True)
+
+        # Edits from now on aren't in the saved file
+        self.journal_mark = 0 if self.journal is None else self.journal.record_count
+        self.undo_action.setEnabled(self.view.undo_stack.canUndo())
+        self.redo_action.setEnabled(self.view.undo_stack.canRedo())
+
+    def handle_progress(self, done: int, total: int) -> None:
+        """Handle save or load progress updates"""
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def handle_save_finished(self, error: str) -> None:
+        """Handle the save thread finishing"""
+        self.save_thread.wait()
+        self.save_thread = None
+
+        self.progress_bar.hide()
+        self.open_action.setEnabled(True)
+        self.save_action.setEnabled(True)
+        self.save_as_action.setEnabled(True)
+
+        if error:
+            self.statusBar().clearMessage()
+            QtWidgets.QMessageBox.critical(self, 'Level Info Editor', error)
+            return
 
-        with open(self.file_path, 'wb') as f:
-            f.write(data)
+        self.statusBar().showMessage('Saved', 3000)
+
+        # The journal is only needed for edits made while saving
+        if self.journal is not None:
+            if self.journal.record_count == self.journal_mark:
+                self.discard_journal()
+            else:
+                self.update_journal_snapshot()
 
     def handle_save_as(self) -> None:
         """Handle saving to a new file"""
@@ -1043,19 +2036,259 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.save_action.setEnabled(True)
 
+    def read_other_file(self, title: str) -> Tuple[Optional[LevelInfoFile], str]:
+        """Ask for a file to compare or merge with, and load it. This
+        returns (None, '') if that doesn't work out."""
+        fp = QtWidgets.QFileDialog.getOpenFileName(self, title, '', 'Binary Files (*.bin);;All Files (*)')[0]
+        if fp == '': return None, ''
+
+        try:
+            file = LevelInfoFile.from_path(fp)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, 'Level Info Editor', f'The file could not be opened: {e}')
+            return None, ''
+        if file is None:
+            QtWidgets.QMessageBox.critical(self, 'Level Info Editor', 'This is not a LevelInfo.bin file.')
+            return None, ''
+        return file, fp
+
+    def show_change_list(self, title: str, text: str, items: list) -> None:
+        """Show a list of differences or merge conflicts"""
+        if self.change_list_dialog is not None:
+            self.change_list_dialog.close()
+        self.change_list_dialog = ChangeListDialog(self.view, title, text, items)
+        self.change_list_dialog.show()
+
+    def handle_compare(self) -> None:
+        """List the differences between another file and this one"""
+        if self.load_thread is not None: return
+
+        other, fp = self.read_other_file('Compare With File')
+        if other is None: return
+
+        changes = level_info_diff.diff(other, self.view.file)
+        if not changes:
+            QtWidgets.QMessageBox.information(self, 'Level Info Editor', 'The files are the same.')
+            return
+        self.show_change_list('Differences', f'Changes from {os.path.basename(fp)} to this file:', changes)
+
+    def handle_merge(self) -> None:
+        """Merge the changes someone else made to a copy of this file"""
+        if self.load_thread is not None or self.save_thread is not None: return
+
+        base, _ = self.read_other_file('Open the File Both Copies Were Made From')
+        if base is None: return
+        theirs, fp = self.read_other_file('Open the Copy to Merge In')
+        if theirs is None: return
+
+        result, conflicts = level_info_diff.merge(base, self.view.file, theirs)
+
+        # Like opening a file, this can't be undone. The first save
+        # rewrites the whole file.
+        self.view.set_file(result)
+        self.patcher = None
+        self.discard_journal()
+        self.start_journal()
+        self.update_journal_snapshot()
+
+        if conflicts:
+            self.show_change_list('Merge Conflicts',
+                f'These were changed both here and in {os.path.basename(fp)}. The changes made here were kept:',
+                conflicts)
+        else:
+            self.statusBar().showMessage(f'Merged {os.path.basename(fp)}', 3000)
+
+    def handle_object_change(self, obj: object) -> None:
+        """Handle a world or level being edited"""
+        if self.patcher is not None:
+            self.patcher.mark_dirty(obj)
+
+    def start_journal(self, data: Optional[bytes] = None,
+                      journal: Optional[level_info_journal.EditJournal] = None) -> None:
+        """Start a new crash recovery journal for the current file, or use
+        an existing one. The journal file is written when the first edit
+        is made; if data (the file as it is now) is given, the snapshot
+        is made from that instead of by saving the file."""
+        if journal is None:
+            path = level_info_journal.get_journal_path(get_journal_dir(), self.file_path)
+            journal = level_info_journal.EditJournal(path, self.file_path, data)
+        self.journal = journal
+        self.journal_mark = 0
+        self.journal_save_failed = False
+
+    def discard_journal(self) -> None:
+        """Delete the crash recovery journal, if there is one"""
+        if self.journal is not None:
+            self.journal.discard()
+            self.journal = None
+        if self.journal_lock is not None:
+            self.journal_lock.unlock()
+            self.journal_lock = None
+
+    def write_journal(self, func, *args) -> None:
+        """Call a method of the journal, reporting (but otherwise
+        ignoring) errors, since editing can go on without it"""
+        try:
+            func(*args)
+        except OSError as e:
+            self.statusBar().showMessage(f'Could not write the recovery journal: {e}', 5000)
+
+    def update_journal_snapshot(self) -> None:
+        """Replace the journal with a snapshot on a JournalThread, if one
+        isn't already running"""
+        if self.journal is None: return
+        if self.journal_thread is not None:
+            self.journal_snapshot_wanted = True
+            return
+
+        # Lock the journal before it's written, so other editors leave
+        # it alone
+        if self.journal_lock is None:
+            try:
+                os.makedirs(os.path.dirname(self.journal.path), exist_ok=True)
+            except OSError:
+                pass
+            self.journal_lock = QtCore.QLockFile(self.journal.path + JOURNAL_LOCK_SUFFIX)
+            self.journal_lock.tryLock(0)
+
+        # The data the journal started with (if any) is the file before
+        # any edits. Otherwise, the file has to be saved.
+        if self.journal.data is not None:
+            self.start_journal_thread(0, self.journal.data)
+        else:
+            self.start_journal_thread(self.journal.record_count, None)
+
+    def start_journal_thread(self, count: int, data: Optional[bytes]) -> None:
+        """Start a JournalThread for the current journal"""
+        self.journal_thread = JournalThread(self.journal, self.view.file, count, data)
+        self.journal_thread.finished.connect(self.handle_journal_thread_finished)
+        self.journal_thread.start()
+
+    def handle_journal_thread_finished(self) -> None:
+        """Handle a JournalThread finishing"""
+        thread = self.journal_thread
+        thread.wait()
+        self.journal_thread = None
+
+        retry = self.journal_snapshot_wanted
+        self.journal_snapshot_wanted = False
+
+        if thread.journal is self.journal and thread.error:
+            self.statusBar().showMessage(thread.error, 5000)
+        elif thread.journal is self.journal and not thread.writing:
+            # The data is only right if there were no edits while the
+            # file was being saved. If there were, try again (right
+            # away, if there's no snapshot yet).
+            unchanged = thread.count == self.journal.record_count
+            self.journal_save_failed = thread.failed and unchanged
+            if thread.data is not None and unchanged:
+                self.start_journal_thread(thread.count, thread.data)
+                return
+            retry = retry or not (unchanged or self.journal.has_snapshot())
+
+        if retry:
+            self.update_journal_snapshot()
+
+    def handle_file_edited(self, records: list) -> None:
+        """Handle any edit to the file, by adding it to the journal"""
+        if self.journal is None:
+            self.start_journal()
+        self.write_journal(self.journal.append, records)
+
+        # The edits are only kept in memory until there's a snapshot (a
+        # JournalThread that's already running includes them). If the
+        # file couldn't be saved to make one, handle_journal_timer()
+        # tries again later.
+        if self.journal_thread is None and not (self.journal.has_snapshot() or self.journal_save_failed):
+            self.update_journal_snapshot()
+
+    def handle_journal_timer(self) -> None:
+        """Replace the journal with a snapshot now and then, so it doesn't
+        grow forever (this also makes sure it's on disk)"""
+        if self.journal is not None and self.journal.pending_count:
+            self.update_journal_snapshot()
+
+    def offer_recovery(self) -> None:
+        """Offer to recover unsaved changes from a journal left behind by
+        an editor that crashed"""
+        for path in level_info_journal.find_journals(get_journal_dir()):
+            # Skip journals that another editor is still using. (The lock
+            # file of an editor that crashed is removed by tryLock().)
+            lock = QtCore.QLockFile(path + JOURNAL_LOCK_SUFFIX)
+            if not lock.tryLock(0): continue
+
+            try:
+                recovered = level_info_journal.read_journal(path)
+            except (OSError, ValueError, KeyError, TypeError):
+                recovered = None
+
+            if recovered is not None:
+                name = 'a new file' if recovered.source_path is None else recovered.source_path
+                answer = QtWidgets.QMessageBox.question(self, 'Level Info Editor',
+                    f'Level Info Editor closed without saving changes to {name}. Do you want to recover them?')
+                if answer == QtWidgets.QMessageBox.StandardButton.Yes:
+                    self.recover(path, lock, recovered)
+                    return
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            lock.unlock()
+
+    def recover(self, journal_path: str, lock: QtCore.QLockFile,
+                recovered: level_info_journal.RecoveredJournal) -> None:
+        """Open a file recovered from a journal, whose lock file is held"""
+        self.discard_journal()
+        self.file_path = recovered.source_path
+
+        # The file on disk is older than this, so the first save
+        # rewrites the whole thing
+        self.view.set_file(recovered.file)
+        self.patcher = None
+        self.save_action.setEnabled(recovered.source_path is not None)
+
+        # Keep using the same journal, so the changes stay recoverable
+        # until they're saved. It's rewritten with the snapshot and the
+        # edits that could be replayed, in case the last line was only
+        # partly written.
+        self.journal_lock = lock
+        self.start_journal(journal=level_info_journal.EditJournal(
+            journal_path, recovered.source_path, recovered.data, recovered.records))
+        self.update_journal_snapshot()
+
+        self.statusBar().showMessage('Recovered unsaved changes', 5000)
+
     def handle_exit(self) -> None:
         """Exit"""
         self.close()
 
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        """Handle the window closing"""
+        # Don't exit in the middle of writing a file
+        if self.save_thread is not None:
+            self.save_thread.wait()
+        if self.load_thread is not None:
+            self.load_thread.cancel()
+            self.load_thread.wait()
+        if self.journal_thread is not None:
+            self.journal_thread.wait()
+
+        # Closing normally (not crashing) throws away unsaved changes
+        self.discard_journal()
+        super().closeEvent(event)
+
     def handle_about(self) -> None:
         """Show the About dialog"""
-        try:
-            with open('readme.md', 'r', encoding='utf-8') as f:
-                readme = f.read()
-        except Exception:
-            readme = 'Level Info Editor {VERSION} by RoadrunnerWMC\n(No readme.md found!)\nLicensed under GPL 3'
-
-        text_edit = QtWidgets.QPlainTextEdit(readme)
+        # The readme is only read the first time
+        if self.about_text is None:
+            try:
+                with open('readme.md', 'r', encoding='utf-8') as f:
+                    self.about_text = f.read()
+            except Exception:
+                self.about_text = 'Level Info Editor {VERSION} by RoadrunnerWMC\n(No readme.md found!)\nLicensed under GPL 3'
+
+        text_edit = QtWidgets.QPlainTextEdit(self.about_text)
         text_edit.setReadOnly(True)
 
         button_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Ok)
@@ -1073,9 +2306,68 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 
+class StartupTimer(QtCore.QObject):
+    """Event filter for --startup-benchmark. It prints how long startup
+    took once the main window has been painted, and then quits."""
+    def __init__(self, window_time: float):
+        super().__init__()
+        self.window_time = window_time
+
+    def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        """Watch for the first paint event"""
+        if event.type() == QtCore.QEvent.Type.Paint:
+            paint_time = time.perf_counter()
+            obj.removeEventFilter(self)
+
+            # Times are counted from when this module started loading
+            print(f'Imports done:       {(IMPORTS_DONE_TIME - STARTUP_TIME) * 1000:8.1f} ms')
+            print(f'Main window built:  {(self.window_time - STARTUP_TIME) * 1000:8.1f} ms')
+            print(f'First paint:        {(paint_time - STARTUP_TIME) * 1000:8.1f} ms')
+            QtCore.QTimer.singleShot(0, QtWidgets.QApplication.instance().quit)
+
+        return False
+
+
 def main():
+    # Needed for the batch mode's process pool in frozen builds (this is
+    # a no-op otherwise, so don't spend time importing multiprocessing)
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    # Opt-in profiling (see level_info_profile.py)
+    profiler = level_info_profile.start_from_args(sys.argv)
+
+    # Command-line mode (see level_info_cli.py). It's only imported when
+    # it might be needed, since it takes a while to import.
+    if len(sys.argv) > 1 and not sys.argv[1].startswith('-'):
+        import level_info_cli
+        if sys.argv[1] in level_info_cli.COMMANDS:
+            sys.exit(level_info_cli.main(sys.argv[1:]))
+
+    startup_benchmark = '--startup-benchmark' in sys.argv
+    if startup_benchmark:
+        sys.argv.remove('--startup-benchmark')
+
+    # Every change made in an editor widget goes edit_requested ->
+    # handle_edit_request() -> edit() -> EditFieldsCommand.redo() ->
+    # handle_fields_changed()
+    if profiler is not None:
+        profiler.instrument(LevelInfoViewer, ('set_file', 'update_names', 'handle_world_select',
+                                              'handle_edit_request', 'edit', 'handle_fields_changed'))
+        profiler.instrument(EditFieldsCommand, ('redo', 'undo'))
+        profiler.instrument(LevelEditor, ('set_all', 'handle_name_change'))
+
     app = QtWidgets.QApplication(sys.argv)
-    main_window = MainWindow()
+    app.setApplicationName('Level Info Editor')  # used for the journal folder
+    main_window = MainWindow(check_recovery=not startup_benchmark)
+
+    if startup_benchmark:
+        startup_timer = StartupTimer(time.perf_counter())
+        main_window.installEventFilter(startup_timer)
+
     sys.exit(app.exec())
 
-main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+# level_info_index.py
+# Index of where each world and level is in a LevelInfoFile, shared by
+# the search index, the validator and the crash recovery journal. Like
+# level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+from typing import Optional, Tuple, Union
+
+from level_info import LevelInfo, WorldInfo, LevelInfoFile
+
+
+class ObjectIndex():
+    """Finds the world each level is in, and the row of each world and
+    level, without searching through the file. Everything is keyed by
+    object id, since equal levels can be different objects.
+
+    Rows are remembered from the last time each list was indexed, and
+    checked before they're used; a list is only indexed again when that
+    turns out to be wrong (for example, after something was inserted
+    into it), so reordering doesn't need any updates. After adding a
+    world or level, call insert() before updating anything that uses
+    this index; after removing one, call remove() after updating them."""
+
+    def __init__(self, file: LevelInfoFile):
+        self.file = file
+        self.objects = {}  # id -> LevelInfo or WorldInfo
+        self.parents = {}  # id of a level -> its WorldInfo
+        self.list_owners = {}  # id of a world's levels list -> the WorldInfo
+        self.rows = {}  # id -> its row the last time its list was indexed
+
+        for world in file.worlds:
+            self.add_world(world)
+
+    def add_world(self, world: WorldInfo) -> None:
+        """Add a world and all of its levels"""
+        self.objects[id(world)] = world
+        self.list_owners[id(world.levels)] = world
+        for level in world.levels:
+            self.objects[id(level)] = level
+            self.parents[id(level)] = world
+
+    def discard(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Remove one level or world (not including its levels)"""
+        key = id(obj)
+        self.objects.pop(key, None)
+        self.parents.pop(key, None)
+        self.rows.pop(key, None)
+
+    def insert(self, items: list, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Add a world that was inserted into file.worlds, or a level that
+        was inserted into a world's levels"""
+        if items is self.file.worlds:
+            self.add_world(obj)
+        else:
+            self.objects[id(obj)] = obj
+            self.parents[id(obj)] = self.list_owners[id(items)]
+
+    def remove(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Remove a world (and its levels) or a level that was removed
+        from the file"""
+        if isinstance(obj, WorldInfo):
+            self.list_owners.pop(id(obj.levels), None)
+            for level in obj.levels:
+                self.discard(level)
+        self.discard(obj)
+
+    def get_world(self, level: LevelInfo) -> Optional[WorldInfo]:
+        """Return the world a level is in"""
+        return self.parents.get(id(level))
+
+    def get_owner(self, items: list) -> Optional[WorldInfo]:
+        """Return the world a levels list belongs to"""
+        return self.list_owners.get(id(items))
+
+    def row_of(self, obj: Union[LevelInfo, WorldInfo]) -> int:
+        """Return the row of a world in file.worlds or of a level in its
+        world's levels, or -1 if it isn't in the file"""
+        if isinstance(obj, WorldInfo):
+            items = self.file.worlds
+        else:
+            world = self.parents.get(id(obj))
+            if world is None: return -1
+            items = world.levels
+
+        row = self.rows.get(id(obj), -1)
+        if not (0 <= row < len(items) and items[row] is obj):
+            # The list has changed since it was indexed
+            self.rows.update((id(item), r) for r, item in enumerate(items))
+            row = self.rows.get(id(obj), -1)
+            if not (0 <= row < len(items) and items[row] is obj):
+                return -1
+        return row
+
+    def get_sort_key(self, obj: Union[LevelInfo, WorldInfo]) -> Tuple[int, int]:
+        """Return (world row, level row) for a world or level, which puts
+        them in file order. Worlds have a level row of -1, so they come
+        before their levels."""
+        if isinstance(obj, WorldInfo):
+            return self.row_of(obj), -1
+        world = self.parents.get(id(obj))
+        return (-1 if world is None else self.row_of(world)), self.row_of(obj)
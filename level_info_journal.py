@@ -0,0 +1,328 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# level_info_journal.py
+# Crash recovery journal for Level Info Editor. Every edit made in the
+# editor is appended to a journal file as one line of JSON, and the
+# journal is replaced by a snapshot of the whole file now and then. If
+# the editor crashes, replaying the journal gives back the unsaved work.
+# Like level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+import base64
+import dataclasses
+import glob
+import hashlib
+import json
+import os
+import os.path
+import tempfile
+import threading
+from typing import List, Optional, Sequence, Union
+
+from level_info import Buffer, LevelInfo, WorldInfo, LevelInfoFile, move_items, unmove_items
+from level_info_index import ObjectIndex
+
+
+JOURNAL_EXTENSION = '.journal'
+
+# A world or level, as a path of list indices from the LevelInfoFile:
+# [] is the file itself, [w] is file.worlds[w] and [w, l] is
+# file.worlds[w].levels[l]
+Target = List[int]
+
+# One line of a journal
+Record = dict
+
+
+def get_journal_path(directory: str, source_path: Optional[str]) -> str:
+    """Return the path of the journal for a file. Every file gets its
+    own journal, named after a hash of its absolute path. The process ID
+    is included, so that editors running at the same time never use the
+    same journal."""
+    if source_path is None:
+        name = 'untitled'
+    else:
+        path = os.path.abspath(source_path).encode('utf-8', 'surrogateescape')
+        name = hashlib.sha1(path).hexdigest()[:16]
+    return os.path.join(directory, f'{name}-{os.getpid()}{JOURNAL_EXTENSION}')
+
+
+def find_journals(directory: str) -> List[str]:
+    """Return the paths of the journals in a directory, newest first"""
+    paths = glob.glob(os.path.join(glob.escape(directory), '*' + JOURNAL_EXTENSION))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def find_target(object_index: ObjectIndex, obj: Union[LevelInfoFile, WorldInfo, LevelInfo]) -> Target:
+    """Return the path to the file, a world or a level"""
+    if obj is object_index.file:
+        return []
+    row = object_index.row_of(obj)
+    if row == -1:
+        raise ValueError('object is not in the file')
+    if isinstance(obj, WorldInfo):
+        return [row]
+    return [object_index.row_of(object_index.get_world(obj)), row]
+
+
+def find_list_target(object_index: ObjectIndex, items: list) -> Target:
+    """Return the path to a list of worlds ([]) or levels ([w])"""
+    if items is object_index.file.worlds:
+        return []
+    world = object_index.get_owner(items)
+    row = -1 if world is None else object_index.row_of(world)
+    if row == -1:
+        raise ValueError('list is not in the file')
+    return [row]
+
+
+def resolve_target(file: LevelInfoFile, target: Target) -> Union[LevelInfoFile, WorldInfo, LevelInfo]:
+    """Return the object a target path points to"""
+    if not target:
+        return file
+    world = file.worlds[target[0]]
+    return world if len(target) == 1 else world.levels[target[1]]
+
+
+def resolve_list_target(file: LevelInfoFile, target: Target) -> list:
+    """Return the list a list target path points to"""
+    return file.worlds if not target else file.worlds[target[0]].levels
+
+
+def set_record(object_index: ObjectIndex, obj: Union[LevelInfoFile, WorldInfo, LevelInfo], attr: str,
+               value: object) -> Record:
+    """Make a record of an attribute being set"""
+    return {'op': 'set', 'target': find_target(object_index, obj), 'attr': attr, 'value': value}
+
+
+def insert_record(object_index: ObjectIndex, items: list, row: int, obj: Union[WorldInfo, LevelInfo]) -> Record:
+    """Make a record of a world or level being inserted into a list"""
+    return {'op': 'insert', 'target': find_list_target(object_index, items), 'row': row,
+            'object': dataclasses.asdict(obj)}
+
+
+def remove_record(object_index: ObjectIndex, items: list, row: int) -> Record:
+    """Make a record of a world or level being removed from a list"""
+    return {'op': 'remove', 'target': find_list_target(object_index, items), 'row': row}
+
+
+def move_record(object_index: ObjectIndex, items: list, rows: List[int], destination: int,
+                undo: bool = False) -> Record:
+    """Make a record of rows of a list being moved with move_items(), or
+    moved back with unmove_items() if undo is True"""
+    return {'op': 'move', 'target': find_list_target(object_index, items), 'rows': rows,
+            'destination': destination, 'undo': undo}
+
+
+def apply_record(file: LevelInfoFile, record: Record) -> None:
+    """Redo the edit described by a record"""
+    op = record['op']
+    if op == 'set':
+        setattr(resolve_target(file, record['target']), record['attr'], record['value'])
+        return
+
+    items = resolve_list_target(file, record['target'])
+    if op == 'insert':
+        fields = record['object']
+        if record['target']:
+            obj = LevelInfo(**fields)
+        else:
+            obj = WorldInfo(**fields)
+            obj.levels = [LevelInfo(**level) for level in obj.levels]
+        items.insert(record['row'], obj)
+    elif op == 'remove':
+        del items[record['row']]
+    elif op == 'move':
+        move = unmove_items if record['undo'] else move_items
+        move(items, record['rows'], record['destination'])
+    else:
+        raise ValueError(f'unknown journal record: {op}')
+
+
+@dataclasses.dataclass
+class RecoveredJournal():
+    """What read_journal() found in a journal"""
+    source_path: Optional[str]  # the file it was for, or None if it was never saved
+    file: LevelInfoFile  # with the edits applied
+    data: bytes  # the snapshot
+    records: List[Record]  # the edits that could be applied
+
+
+def read_journal(path: str) -> RecoveredJournal:
+    """Replay a journal. Replaying stops at a line that can't be read or
+    applied, such as one that was only partly written when the editor
+    crashed."""
+    with open(path, 'r', encoding='ascii') as f:
+        snapshot = json.loads(f.readline())
+        data = base64.b64decode(snapshot['data'])
+        file = LevelInfoFile.from_data(data)
+        if file is None:
+            raise ValueError('the journal snapshot is not a LevelInfo.bin file')
+
+        records = []
+        for line in f:
+            try:
+                record = json.loads(line)
+                apply_record(file, record)
+            except (ValueError, KeyError, IndexError, TypeError):
+                break
+            records.append(record)
+
+    return RecoveredJournal(snapshot['path'], file, data, records)
+
+
+def format_records(records: List[Record]) -> str:
+    """Return records as journal lines"""
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+class EditJournal():
+    """Append-only log of the edits made to a LevelInfoFile. The journal
+    starts with a snapshot of the file, followed by one line per edit.
+    Appending only writes the new lines, so it costs the same no matter
+    how big the file is.
+
+    Snapshots are written by write_snapshot(), which is slow for big
+    files, so it can be called from another thread while edits are
+    appended. Until the first snapshot is written, edits are only kept
+    in memory. After that, they're added to the newest snapshot that
+    could be written, even if later ones can't be."""
+    def __init__(self, path: str, source_path: Optional[str], data: Optional[Buffer] = None,
+                 records: Sequence[Record] = ()):
+        """data is the file before any edits, if it's known (for example,
+        the data it was loaded from), and records are edits that were
+        made to it before the journal was created. write_snapshot() has
+        to be called to write them."""
+        self.path = path
+        self.source_path = source_path
+        self.data = data
+        self.lock = threading.Lock()
+        self.handle = None
+        self.discarded = False
+        self.records = list(records)  # records made since the newest snapshot
+        self.record_count = len(self.records)  # records made since the journal was created
+        self.snapshot_count = 0  # record_count when the newest snapshot was made
+
+    @property
+    def pending_count(self) -> int:
+        """The number of records made since the newest snapshot"""
+        return len(self.records)
+
+    def has_snapshot(self) -> bool:
+        """Check if a snapshot has been written, so edits are being
+        written to disk"""
+        return self.handle is not None
+
+    def append(self, records: List[Record]) -> None:
+        """Add records of edits that have just been made to the file"""
+        with self.lock:
+            self.records.extend(records)
+            self.record_count += len(records)
+            if self.handle is None: return
+
+            self.handle.write(format_records(records))
+
+            # This only hands the data to the OS (which keeps it if the
+            # editor crashes); sync() makes sure it reaches the disk
+            self.handle.flush()
+
+    def write_snapshot(self, data: Buffer, count: int) -> None:
+        """Replace the journal with a snapshot of the file data as it
+        was after the first count records were made. Records made after
+        that are written after it. This can be called from any thread."""
+        snapshot = {'op': 'snapshot', 'path': self.source_path, 'data': str(base64.b64encode(data), 'ascii')}
+        with self.lock:
+            if self.discarded or count < self.snapshot_count: return
+            lines = json.dumps(snapshot) + '\n' + format_records(self.records[count - self.snapshot_count:])
+            written_count = self.record_count
+
+        # Like write_file_atomic(), but the file is only renamed into
+        # place while records can't be appended to the old one
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(self.path) + '.', suffix='.tmp',
+                                         dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='ascii') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self.lock:
+                if self.discarded or count < self.snapshot_count:
+                    os.remove(temp_path)
+                    return
+
+                # (Windows can't replace files that are open)
+                self.close_handle()
+                os.replace(temp_path, self.path)
+                self.handle = open(self.path, 'a', encoding='ascii')
+
+                # Add anything appended while the snapshot was written
+                self.handle.write(format_records(self.records[written_count - self.snapshot_count:]))
+                self.handle.flush()
+
+                self.records = self.records[count - self.snapshot_count:]
+                self.snapshot_count = count
+                self.data = None
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def sync(self) -> None:
+        """Make sure everything appended so far is on disk"""
+        with self.lock:
+            if self.handle is not None:
+                os.fsync(self.handle.fileno())
+
+    def close_handle(self) -> None:
+        """Close the journal file (call this with the lock held)"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def close(self) -> None:
+        """Close the journal file, leaving it on disk"""
+        with self.lock:
+            self.close_handle()
+
+    def discard(self) -> None:
+        """Close and delete the journal, once it isn't needed anymore"""
+        with self.lock:
+            self.discarded = True
+            self.close_handle()
+            self.records = []
+            self.data = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
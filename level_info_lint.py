@@ -0,0 +1,344 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# level_info_lint.py
+# Finds problems in a LevelInfoFile that the file format allows, but
+# that stop it from being saved or that the game doesn't handle well.
+# Like level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+import collections
+import dataclasses
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+from level_info import LevelInfo, WorldInfo, LevelInfoFile
+from level_info_index import ObjectIndex
+
+
+# The game's save file has room for this many worlds
+MAX_WORLDS = 10
+
+# Text lengths are stored in a single byte
+MAX_TEXT_LENGTH = 255
+
+# Severities. Errors stop the file from being saved (or loaded back the
+# same way); warnings are things the game doesn't handle well.
+ERROR = 'error'
+WARNING = 'warning'
+
+
+@dataclasses.dataclass
+class Problem():
+    """A problem found by Validator"""
+    severity: str
+    message: str
+    obj: Union[LevelInfoFile, WorldInfo, LevelInfo, None] = None
+    location: str = ''  # such as 'world 2, level 5 ("Name")'
+
+    def __str__(self) -> str:
+        if self.location:
+            return f'{self.severity}: {self.location}: {self.message}'
+        return f'{self.severity}: {self.message}'
+
+
+def check_text(text: str, what: str) -> List[Tuple[str, str]]:
+    """Return (severity, message) pairs for text that can't be saved"""
+    if not text.isascii():
+        return [(ERROR, f'{what} has non-ASCII characters, so the file can\'t be saved')]
+    if len(text) > MAX_TEXT_LENGTH:
+        return [(ERROR, f'{what} is {len(text)} characters long (the limit is {MAX_TEXT_LENGTH}), so the file can\'t be saved')]
+    return []
+
+
+def check_level(level: LevelInfo) -> List[Tuple[str, str]]:
+    """Return (severity, message) pairs for problems with one level"""
+    problems = check_text(level.name, 'The name')
+
+    if not (0 <= level.display_world <= 255 and 0 <= level.display_level <= 255):
+        problems.append((ERROR, 'The display name numbers must be from 0 to 255, so the file can\'t be saved'))
+    elif level.display_level >= 100:
+        problems.append((ERROR, 'Display level numbers of 100 or more mark world names, so this level would be loaded back as one'))
+
+    # Filenames are stored minus one, in a single byte
+    if not (1 <= level.file_world <= 256 and 1 <= level.file_level <= 256):
+        problems.append((WARNING, f'The filename {level.file_world:02}-{level.file_level:02} can\'t be stored, '
+                                   f'so it will be saved as {(level.file_world - 1) % 256 + 1:02}-{(level.file_level - 1) % 256 + 1:02}'))
+
+    return problems
+
+
+def check_world(world: WorldInfo) -> List[Tuple[str, str]]:
+    """Return (severity, message) pairs for problems with one world (not
+    including its levels)"""
+    problems = []
+    if world.has_left:
+        problems += check_text(world.name_left, 'The 1st half name')
+    if world.has_right:
+        problems += check_text(world.name_right, 'The 2nd half name')
+
+    if world.world_number is None:
+        if world.has_left or world.has_right:
+            problems.append((ERROR, 'The world has a world half but no world number, so the file can\'t be saved'))
+        elif world.levels:
+            problems.append((WARNING, 'The world has levels but no world number (turn on a world half to set one)'))
+    elif not 0 <= world.world_number <= 255:
+        problems.append((ERROR, 'The world number must be from 0 to 255, so the file can\'t be saved'))
+
+    return problems
+
+
+class Validator():
+    """Checks a LevelInfoFile for problems. Duplicate filenames and
+    colliding display names are found with hash indexes, so checking a
+    file takes linear time.
+
+    Like level_info_search.SearchIndex, this is kept up to date
+    incrementally: call update() after changing a level, world or the
+    comments, and insert() or remove() after adding or removing a level
+    or world (see ObjectIndex for the order). The problems are kept for
+    each object, along with which levels of each world have any, so
+    listing the first few problems or counting them doesn't have to go
+    through the whole file."""
+
+    def __init__(self, object_index: ObjectIndex, max_worlds: int = MAX_WORLDS):
+        self.file = object_index.file
+        self.object_index = object_index
+        self.max_worlds = max_worlds
+
+        # Like in ObjectIndex, everything is keyed by object id
+        self.keys = {}  # id of a level -> (filename key, display name key)
+
+        # Problems found by check_level() and check_world(), for the
+        # objects that have any
+        self.local_problems = {}
+
+        # Levels by filename, and by display name within each world, and
+        # the keys that more than one level has
+        self.file_numbers = collections.defaultdict(set)  # (world, level) -> ids
+        self.display_numbers = collections.defaultdict(set)  # (world id, (world, level)) -> ids
+        self.duplicate_files = set()
+        self.duplicate_displays = set()
+
+        # The ids of the levels that have any problems, by world id, and
+        # the number of problems that worlds and levels have in total
+        self.problem_levels = collections.defaultdict(set)
+        self.object_problem_count = 0
+
+        self.comments_problems = []
+        for world in self.file.worlds:
+            self.add_world(world)
+        self.update(self.file)
+
+    def refresh_level(self, key: int) -> None:
+        """Update whether the level with some id is in problem_levels"""
+        world = self.object_index.parents.get(key)
+        if world is None: return
+        file_key, display_key = self.keys[key]
+        if key in self.local_problems or file_key in self.duplicate_files or display_key in self.duplicate_displays:
+            self.problem_levels[id(world)].add(key)
+        else:
+            self.problem_levels[id(world)].discard(key)
+
+    def check(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Run check_level() or check_world() on an object"""
+        key = id(obj)
+        problems = check_world(obj) if isinstance(obj, WorldInfo) else check_level(obj)
+        old_problems = self.local_problems.get(key, ())
+        self.object_problem_count += len(problems) - len(old_problems)
+        if problems:
+            self.local_problems[key] = problems
+        elif old_problems:
+            del self.local_problems[key]
+
+        if bool(problems) != bool(old_problems) and key in self.keys:
+            self.refresh_level(key)
+
+    def add_key(self, index: Dict[object, Set[int]], duplicates: set, key: object, obj_id: int) -> None:
+        """Add a level to a filename or display name index"""
+        ids = index[key]
+        ids.add(obj_id)
+        if len(ids) == 2:
+            # Both levels get a warning
+            duplicates.add(key)
+            self.object_problem_count += 2
+            for other_id in ids:
+                self.refresh_level(other_id)
+        elif len(ids) > 2:
+            self.object_problem_count += 1
+            self.refresh_level(obj_id)
+
+    def discard_key(self, index: Dict[object, Set[int]], duplicates: set, key: object, obj_id: int) -> None:
+        """Remove a level from a filename or display name index"""
+        ids = index[key]
+        ids.discard(obj_id)
+        if len(ids) == 1:
+            # The other level doesn't get a warning anymore
+            duplicates.discard(key)
+            self.object_problem_count -= 2
+            for other_id in ids:
+                self.refresh_level(other_id)
+        elif len(ids) > 1:
+            self.object_problem_count -= 1
+        if not ids:
+            del index[key]
+
+    def add_level(self, level: LevelInfo, world: WorldInfo) -> None:
+        """Add a level"""
+        key = id(level)
+        self.keys[key] = file_key, display_key = self.get_keys(level, world)
+        self.add_key(self.file_numbers, self.duplicate_files, file_key, key)
+        self.add_key(self.display_numbers, self.duplicate_displays, display_key, key)
+        self.check(level)
+
+    def discard_level(self, level: LevelInfo) -> None:
+        """Remove a level"""
+        key = id(level)
+        if key not in self.keys: return
+        file_key, display_key = self.keys.pop(key)
+        self.discard_key(self.file_numbers, self.duplicate_files, file_key, key)
+        self.discard_key(self.display_numbers, self.duplicate_displays, display_key, key)
+        self.object_problem_count -= len(self.local_problems.pop(key, ()))
+
+        world = self.object_index.get_world(level)
+        if world is not None:
+            self.problem_levels[id(world)].discard(key)
+
+    def add_world(self, world: WorldInfo) -> None:
+        """Add a world and all of its levels"""
+        for level in world.levels:
+            self.add_level(level, world)
+        self.check(world)
+
+    @staticmethod
+    def get_keys(level: LevelInfo, world: WorldInfo) -> tuple:
+        """Return the filename and display name index keys for a level"""
+        return (level.file_world, level.file_level), (id(world), (level.display_world, level.display_level))
+
+    def update(self, obj: Union[LevelInfoFile, WorldInfo, LevelInfo]) -> None:
+        """Check a level, world or the file's comments again after it's
+        been edited"""
+        if obj is self.file:
+            # Comments aren't length-prefixed, so only their characters
+            # matter
+            self.comments_problems = []
+            if not self.file.comments.isascii():
+                self.comments_problems.append((ERROR, 'The comments have non-ASCII characters, so the file can\'t be saved'))
+        elif isinstance(obj, WorldInfo):
+            self.check(obj)
+        else:
+            world = self.object_index.get_world(obj)
+            if world is None: return
+            if self.get_keys(obj, world) != self.keys[id(obj)]:
+                self.discard_level(obj)
+                self.add_level(obj, world)
+            else:
+                self.check(obj)
+
+    def insert(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Add a world (and its levels) or a level that was inserted into
+        the file"""
+        if isinstance(obj, WorldInfo):
+            self.add_world(obj)
+        else:
+            world = self.object_index.get_world(obj)
+            self.add_level(obj, world)
+            self.check(world)
+
+    def remove(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Remove a world (and its levels) or a level that was removed
+        from the file"""
+        if isinstance(obj, WorldInfo):
+            for level in obj.levels:
+                self.discard_level(level)
+            self.object_problem_count -= len(self.local_problems.pop(id(obj), ()))
+            self.problem_levels.pop(id(obj), None)
+        else:
+            world = self.object_index.get_world(obj)
+            self.discard_level(obj)
+            if world is not None:
+                self.check(world)
+
+    def get_file_problems(self) -> List[Tuple[str, str]]:
+        """Return (severity, message) pairs for problems with the file as
+        a whole"""
+        problems = list(self.comments_problems)
+        if len(self.file.worlds) > self.max_worlds:
+            problems.append((WARNING, f'The file has {len(self.file.worlds)} worlds, '
+                                      f'but the game only supports {self.max_worlds}'))
+        return problems
+
+    def get_problems(self, obj: Union[LevelInfo, WorldInfo]) -> List[Tuple[str, str]]:
+        """Return (severity, message) pairs for a world or level, errors
+        first"""
+        problems = list(self.local_problems.get(id(obj), ()))
+
+        keys = self.keys.get(id(obj))
+        if keys is not None:
+            file_key, display_key = keys
+            if file_key in self.duplicate_files:
+                count = len(self.file_numbers[file_key])
+                problems.append((WARNING, f'{count} levels load {file_key[0]:02}-{file_key[1]:02}.arc'))
+            if display_key in self.duplicate_displays:
+                count = len(self.display_numbers[display_key])
+                numbers = display_key[1]
+                problems.append((WARNING, f'{count} levels in this world are shown as {numbers[0]}-{numbers[1]}'))
+
+        problems.sort(key=lambda problem: problem[0] != ERROR)
+        return problems
+
+    def count_problems(self) -> int:
+        """Return the number of problems, without listing them"""
+        return len(self.get_file_problems()) + self.object_problem_count
+
+    def iter_problems(self) -> Iterator[Problem]:
+        """Yield every problem, in file order. Only the levels of worlds
+        that have problem levels are looked at, and the generator can be
+        stopped early to get just the first few problems."""
+        for severity, message in self.get_file_problems():
+            yield Problem(severity, message, self.file)
+
+        for w, world in enumerate(self.file.worlds):
+            for severity, message in self.get_problems(world):
+                yield Problem(severity, message, world, f'world {w + 1}')
+
+            level_ids = self.problem_levels.get(id(world))
+            if not level_ids: continue
+            for l, level in enumerate(world.levels):
+                if id(level) not in level_ids: continue
+                location = f'world {w + 1}, level {l + 1} ("{level.name}")'
+                for severity, message in self.get_problems(level):
+                    yield Problem(severity, message, level, location)
+
+    def problems(self) -> List[Problem]:
+        """Return every problem, in file order"""
+        return list(self.iter_problems())
+
+
+def validate(file: LevelInfoFile, max_worlds: int = MAX_WORLDS) -> List[Problem]:
+    """Return every problem with a file, in file order"""
+    return Validator(ObjectIndex(file), max_worlds).problems()
@@ -0,0 +1,227 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# level_info_numpy.py
+# Vectorized LevelInfo.bin decoding and encoding with NumPy, for
+# analytics over many files. Every entry of a file is read into one
+# structured array, so whole columns can be inspected or changed at
+# once. NumPy is optional: level_info.load_file() and load_path() use
+# this module if it's installed, and fall back to LevelInfoFile if it
+# isn't. Like level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+import dataclasses
+import struct
+from typing import Dict, List, Optional
+
+import numpy
+
+from level_info import (TEXT_DECODE_TABLE, TEXT_ENCODE_TABLE, LEVEL_ENTRY_STRUCT, Buffer, LevelInfo,
+                        WorldInfo, LevelInfoFile, find_null)
+
+
+# NumPy equivalent of LEVEL_ENTRY_STRUCT ('>5BxHI'), with the same field
+# names as LevelEntry
+LEVEL_ENTRY_DTYPE = numpy.dtype([
+    ('file_name_w', 'u1'),
+    ('file_name_l', 'u1'),
+    ('display_name_w', 'u1'),
+    ('display_name_l', 'u1'),
+    ('text_len', 'u1'),
+    ('padding', 'u1'),
+    ('flags', '>u2'),
+    ('text_offs', '>u4'),
+])
+assert LEVEL_ENTRY_DTYPE.itemsize == LEVEL_ENTRY_STRUCT.size
+
+# The bit of the flags value that each LevelInfo flag attribute uses
+FLAG_BITS = {
+    'in_star_coins_menu': 0x0002,
+    'has_normal_exit': 0x0010,
+    'has_secret_exit': 0x0020,
+    'is_right_side': 0x0400,
+}
+
+
+@dataclasses.dataclass
+class EntryTable():
+    """Every entry in a file, as columns. Like LevelEntry, the file
+    numbers are stored minus one, exactly as they are in the file, and
+    world half headers are included.
+
+    The entries can be changed in place (except text_len and text_offs,
+    which to_bytes() fills in from text). Changing the number of
+    entries means changing world_sizes and world_index to match."""
+    entries: numpy.ndarray  # of LEVEL_ENTRY_DTYPE
+    world_index: numpy.ndarray  # the index of the world each entry is in
+    world_sizes: numpy.ndarray  # the number of entries in each world
+    text: List[str]
+    comments: str = ''
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def is_world_header(self) -> numpy.ndarray:
+        """Which entries are world half headers rather than levels"""
+        return self.entries['display_name_l'] >= 100
+
+    def unpack_flags(self) -> Dict[str, numpy.ndarray]:
+        """Return a boolean array for each LevelInfo flag attribute"""
+        flags = self.entries['flags']
+        return {attr: (flags & bit) != 0 for attr, bit in FLAG_BITS.items()}
+
+    def to_bytes(self) -> bytes:
+        """Return LevelInfo.bin file data. For a table read from a file
+        saved by LevelInfoFile.save(), this gives back the same data."""
+        text_lengths = numpy.fromiter(map(len, self.text), numpy.int64, len(self.text))
+        if len(text_lengths) and text_lengths.max() > 0xff:
+            raise struct.error('text must be 255 characters or less')
+        comments = self.comments.encode('ascii') + b'\0'
+        text = ''.join(t + '\0' for t in self.text).encode('ascii').translate(TEXT_ENCODE_TABLE)
+
+        # Work out where everything goes
+        num_worlds = len(self.world_sizes)
+        world_table_size = 8 + 4 * num_worlds
+        world_data_sizes = 4 + self.world_sizes * LEVEL_ENTRY_DTYPE.itemsize
+        world_offsets = world_table_size + numpy.cumsum(world_data_sizes) - world_data_sizes
+        comments_offs = world_table_size + int(world_data_sizes.sum())
+        text_start = comments_offs + len(comments)
+
+        entries = self.entries.astype(LEVEL_ENTRY_DTYPE)  # (a copy, in file byte order)
+        entries['text_len'] = text_lengths
+        entries['text_offs'] = text_start + numpy.cumsum(text_lengths + 1) - (text_lengths + 1)
+        entries['padding'] = 0
+        entry_data = memoryview(entries.tobytes())
+
+        # Fill in a preallocated buffer
+        result = bytearray(text_start + len(text))
+        struct.pack_into('>4sI', result, 0, b'NWRp', num_worlds)
+        result[8 : world_table_size] = world_offsets.astype('>u4').tobytes()
+        start = 0
+        for offset, size in zip(world_offsets.tolist(), self.world_sizes.tolist()):
+            struct.pack_into('>I', result, offset, size)
+            end = start + size * LEVEL_ENTRY_DTYPE.itemsize
+            result[offset + 4 : offset + 4 + end - start] = entry_data[start : end]
+            start = end
+        result[comments_offs : text_start] = comments
+        result[text_start:] = text
+
+        return bytes(result)
+
+
+def read_entry_table(data: Buffer) -> Optional[EntryTable]:
+    """Read every entry in file data into an EntryTable, or return None
+    if it isn't a LevelInfo.bin file"""
+    view = memoryview(data).cast('B')
+    if view[:4] != b'NWRp':
+        return None
+
+    num_worlds, = struct.unpack_from('>I', view, 4)
+    if 8 + num_worlds * 4 > len(view):
+        raise struct.error('world offsets extend past the end of the file')
+    world_offsets = numpy.frombuffer(view, '>u4', num_worlds, 8).tolist()
+
+    blocks = []
+    for world_offset in world_offsets:
+        num_entries, = struct.unpack_from('>I', view, world_offset)
+        entries_start = world_offset + 4
+        if entries_start + num_entries * LEVEL_ENTRY_DTYPE.itemsize > len(view):
+            raise struct.error('level entries extend past the end of the file')
+        blocks.append(numpy.frombuffer(view, LEVEL_ENTRY_DTYPE, num_entries, entries_start))
+
+    # (concatenate() switches to native byte order, so switch back)
+    entries = numpy.concatenate(blocks).astype(LEVEL_ENTRY_DTYPE) if blocks else numpy.zeros(0, LEVEL_ENTRY_DTYPE)
+    world_sizes = numpy.array([len(block) for block in blocks], numpy.int64)
+    world_index = numpy.repeat(numpy.arange(num_worlds), world_sizes)
+
+    # Decode the whole string pool at once, and slice each entry's text
+    # out of it
+    text_offsets = entries['text_offs'].astype(numpy.int64)
+    text_lengths = entries['text_len'].astype(numpy.int64)
+    if len(entries):
+        text_start = int(text_offsets.min())
+        text_end = int((text_offsets + text_lengths).max())
+    else:
+        text_start = text_end = 0
+    text_pool = bytes(view[text_start : text_end]).translate(TEXT_DECODE_TABLE)
+    text = [text_pool[offs : offs + length].decode('ascii')
+            for offs, length in zip((text_offsets - text_start).tolist(), text_lengths.tolist())]
+
+    # The comments are between the last world and the text
+    comments_offs = 8 + 4 * num_worlds + int((4 + world_sizes * LEVEL_ENTRY_DTYPE.itemsize).sum())
+    comments_end = text_start - 1 if len(entries) else find_null(view, comments_offs)
+    comments = str(view[comments_offs : comments_end], 'ascii')
+
+    return EntryTable(entries, world_index, world_sizes, text, comments)
+
+
+def from_data(data: Buffer) -> Optional[LevelInfoFile]:
+    """Equivalent to LevelInfoFile.from_data(), but decodes the levels
+    with vectorized operations"""
+    table = read_entry_table(data)
+    if table is None:
+        return None
+    if not len(table):
+        # The comments are found differently in files without entries
+        return LevelInfoFile.from_data(data)
+
+    entries = table.entries
+    is_header = table.is_world_header
+    is_level = ~is_header
+
+    # Create every level at once, from columns
+    flags = table.unpack_flags()
+    level_text = [text for text, level in zip(table.text, is_level.tolist()) if level]
+    levels = list(map(LevelInfo,
+        level_text,
+        (entries['file_name_w'][is_level].astype(numpy.int64) + 1).tolist(),
+        (entries['file_name_l'][is_level].astype(numpy.int64) + 1).tolist(),
+        entries['display_name_w'][is_level].tolist(),
+        entries['display_name_l'][is_level].tolist(),
+        *(flags[attr][is_level].tolist() for attr in FLAG_BITS)))
+
+    # Split them up into worlds
+    worlds = [WorldInfo() for _ in range(len(table.world_sizes))]
+    level_counts = numpy.bincount(table.world_index[is_level], minlength=len(worlds)).tolist()
+    start = 0
+    for world, count in zip(worlds, level_counts):
+        world.levels = levels[start : start + count]
+        start += count
+
+    # Fill in the world half headers (there are only a few)
+    for row in numpy.flatnonzero(is_header).tolist():
+        world = worlds[int(table.world_index[row])]
+        world.world_number = int(entries['display_name_w'][row])
+        if entries['display_name_l'][row] == 100:
+            world.has_left = True
+            world.name_left = table.text[row]
+        else:
+            world.has_right = True
+            world.name_right = table.text[row]
+
+    return LevelInfoFile(worlds, table.comments)
@@ -0,0 +1,197 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# level_info_profile.py
+# Opt-in instrumentation for finding out where time goes. Set the
+# LEVEL_INFO_PROFILE environment variable (or pass --profile) to a file
+# path, and the instrumented functions record their wall time and call
+# counts. When the program exits, a summary is printed, and the file is
+# written: a Chrome trace (viewable in chrome://tracing or Perfetto) if
+# its name ends with ".json", and a cProfile dump otherwise. Nothing is
+# instrumented unless profiling is turned on, so it costs nothing
+# normally. Like level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+import atexit
+import cProfile
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import types
+from typing import Callable, Iterable, List, Optional, Union
+
+import level_info
+from level_info import LevelInfoFile
+
+
+PROFILE_ENV_VAR = 'LEVEL_INFO_PROFILE'
+
+# Trace events stop being recorded after this many, so that a long
+# session can't use up all the memory. Call counts keep going.
+MAX_TRACE_EVENTS = 1000000
+
+
+class Profiler():
+    """Records the wall time and call count of instrumented functions"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.events = []  # Chrome trace events
+        self.stats = {}  # name -> [call count, total seconds, longest call]
+        self.finished = False
+
+        # cProfile only sees the thread it was started on (the GUI
+        # thread). The instrumented functions are timed on any thread.
+        self.cprofile = None
+        if not path.lower().endswith('.json'):
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """Record one call of an instrumented function"""
+        with self.lock:
+            stats = self.stats.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += end - start
+            stats[2] = max(stats[2], end - start)
+
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append({
+                    'name': name,
+                    'ph': 'X',
+                    'ts': (start - self.start_time) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                })
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Return a version of a function that records its calls"""
+        # Qt signals pass their arguments to every slot, and PyQt drops
+        # the ones a slot doesn't take. It can't see through the
+        # wrapper, so it has to do the same.
+        max_args = None
+        try:
+            params = inspect.signature(func).parameters.values()
+        except (TypeError, ValueError):
+            pass
+        else:
+            if not any(p.kind == p.VAR_POSITIONAL for p in params):
+                max_args = sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if max_args is not None:
+                args = args[:max_args]
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, start, time.perf_counter())
+
+        return wrapper
+
+    def instrument(self, cls: Union[type, types.ModuleType], names: Iterable[str]) -> None:
+        """Instrument some methods of a class (including classmethods and
+        staticmethods), or some functions of a module. This has to be done
+        before any signals are connected to them, and only affects callers
+        that look them up on the class or module."""
+        for attr in names:
+            name = f'{cls.__name__}.{attr}'
+            method = inspect.getattr_static(cls, attr)
+            if isinstance(method, classmethod):
+                setattr(cls, attr, classmethod(self.wrap(name, method.__func__)))
+            elif isinstance(method, staticmethod):
+                setattr(cls, attr, staticmethod(self.wrap(name, method.__func__)))
+            else:
+                setattr(cls, attr, self.wrap(name, method))
+
+    def summarize(self) -> List[str]:
+        """Return a table of the call counts and times, slowest first"""
+        lines = [f'{"":<44} {"calls":>8} {"total ms":>11} {"mean ms":>10} {"max ms":>10}']
+        with self.lock:
+            stats = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (count, total, longest) in stats:
+            lines.append(f'{name:<44} {count:>8} {total * 1000:>11.3f} {total / count * 1000:>10.3f} {longest * 1000:>10.3f}')
+        return lines
+
+    def finish(self) -> None:
+        """Stop profiling, print a summary and write the output file"""
+        if self.finished: return
+        self.finished = True
+
+        print(f'Profile ({self.path}):', file=sys.stderr)
+        for line in self.summarize():
+            print(f'  {line}', file=sys.stderr)
+
+        try:
+            if self.cprofile is not None:
+                self.cprofile.disable()
+                self.cprofile.dump_stats(self.path)
+            else:
+                with self.lock:
+                    trace = {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(trace, f)
+        except OSError as e:
+            print(f'The profile could not be saved: {e}', file=sys.stderr)
+
+
+# The running Profiler, if profiling is turned on
+profiler: Optional[Profiler] = None
+
+
+def start(path: str) -> Profiler:
+    """Turn profiling on, and instrument the codec. The output is written
+    when the program exits."""
+    global profiler
+    if profiler is None:
+        profiler = Profiler(path)
+        profiler.instrument(LevelInfoFile, ('from_data', 'save'))
+        # The command-line tools load files through these, which may use
+        # level_info_numpy instead of LevelInfoFile.from_data()
+        profiler.instrument(level_info, ('load_file', 'load_path'))
+        atexit.register(profiler.finish)
+    return profiler
+
+
+def start_from_args(argv: List[str]) -> Optional[Profiler]:
+    """Turn profiling on if "--profile PATH" is in the arguments
+    (removing it from them) or the environment variable is set"""
+    path = os.environ.get(PROFILE_ENV_VAR) or None
+    if '--profile' in argv:
+        i = argv.index('--profile')
+        if i + 1 < len(argv):
+            path = argv[i + 1]
+        del argv[i : i + 2]
+    return start(path) if path else None
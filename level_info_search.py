@@ -0,0 +1,233 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# level_info_search.py
+# Search index for finding levels and worlds in a LevelInfoFile. Like
+# level_info.py, this doesn't depend on Qt.
+
+
+################################################################
+################################################################
+
+
+import collections
+import re
+from typing import List, Set, Union
+
+from level_info import LevelInfo, WorldInfo
+from level_info_index import ObjectIndex
+
+
+# Flag names that can be used in "is:" and "not:" search terms
+FLAG_NAMES = {
+    'starcoins': 'in_star_coins_menu',
+    'normal': 'has_normal_exit',
+    'secret': 'has_secret_exit',
+    'right': 'is_right_side',
+}
+
+# Level numbers, such as "7-12", "07-12" or "07-12.arc"
+LEVEL_NUMBER_RE = re.compile(r'(\d+)-(\d+)(\.arc)?', re.IGNORECASE)
+
+# Length of the substrings that names are indexed by
+NGRAM_LENGTH = 3
+
+
+def get_ngrams(text: str) -> Set[str]:
+    """Return every NGRAM_LENGTH-character substring of some text"""
+    return {text[i : i + NGRAM_LENGTH] for i in range(len(text) - NGRAM_LENGTH + 1)}
+
+
+class SearchIndex():
+    """Index of the names, file numbers, display numbers and flags of
+    every level in a file (and the names of every world), so that
+    searches don't have to look at every level.
+
+    The index doesn't notice edits by itself. After changing a level or
+    world, call update(); after adding or removing one, call insert() or
+    remove() (see ObjectIndex for the order). Reordering doesn't affect
+    the index."""
+
+    def __init__(self, object_index: ObjectIndex):
+        self.file = object_index.file
+        self.object_index = object_index
+
+        # Like in ObjectIndex, everything is keyed by object id
+        self.keys = {}  # id -> the keys it's indexed under (see get_keys())
+
+        self.names = {}  # id -> lowercase name
+        self.ngrams = collections.defaultdict(set)  # substring -> ids
+        self.file_numbers = collections.defaultdict(set)  # (world, level) -> ids
+        self.display_numbers = collections.defaultdict(set)  # (world, level) -> ids
+        self.flags = collections.defaultdict(set)  # attribute name -> ids where it's True
+
+        for world in self.file.worlds:
+            self.add_world(world)
+
+    @staticmethod
+    def get_keys(obj: Union[LevelInfo, WorldInfo]) -> tuple:
+        """Return (name, file number, display number, flags) for a level,
+        or (name, None, None, ()) for a world"""
+        if isinstance(obj, WorldInfo):
+            names = []
+            if obj.has_left: names.append(obj.name_left)
+            if obj.has_right: names.append(obj.name_right)
+            return '\n'.join(names).lower(), None, None, ()
+
+        flags = tuple(attr for attr in FLAG_NAMES.values() if getattr(obj, attr))
+        return (obj.name.lower(),
+                (obj.file_world, obj.file_level),
+                (obj.display_world, obj.display_level),
+                flags)
+
+    def add(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Add one level or world (not including its levels)"""
+        key = id(obj)
+        self.keys[key] = name, file_number, display_number, flags = self.get_keys(obj)
+
+        self.names[key] = name
+        for ngram in get_ngrams(name):
+            self.ngrams[ngram].add(key)
+        if file_number is not None:
+            self.file_numbers[file_number].add(key)
+            self.display_numbers[display_number].add(key)
+        for attr in flags:
+            self.flags[attr].add(key)
+
+    def discard(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Remove one level or world (not including its levels)"""
+        key = id(obj)
+        if key not in self.keys: return
+        name, file_number, display_number, flags = self.keys.pop(key)
+
+        del self.names[key]
+        for ngram in get_ngrams(name):
+            self.ngrams[ngram].discard(key)
+        if file_number is not None:
+            self.file_numbers[file_number].discard(key)
+            self.display_numbers[display_number].discard(key)
+        for attr in flags:
+            self.flags[attr].discard(key)
+
+    def add_world(self, world: WorldInfo) -> None:
+        """Add a world and all of its levels"""
+        self.add(world)
+        for level in world.levels:
+            self.add(level)
+
+    def update(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Re-index a level or world after it's been edited"""
+        if self.get_keys(obj) != self.keys.get(id(obj)):
+            self.discard(obj)
+            self.add(obj)
+
+    def insert(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Add a world (and its levels) or a level that was inserted into
+        the file"""
+        if isinstance(obj, WorldInfo):
+            self.add_world(obj)
+        else:
+            self.add(obj)
+
+    def remove(self, obj: Union[LevelInfo, WorldInfo]) -> None:
+        """Remove a world (and its levels) or a level that was removed
+        from the file"""
+        self.discard(obj)
+        if isinstance(obj, WorldInfo):
+            for level in obj.levels:
+                self.discard(level)
+
+    def match_name(self, text: str) -> Set[int]:
+        """Return the ids of objects whose names contain some text"""
+        text = text.lower()
+        if len(text) < NGRAM_LENGTH:
+            # Too short to use the n-grams, but the lowercase names are
+            # still much faster to go through than the file itself
+            return {key for key, name in self.names.items() if text in name}
+
+        # Every n-gram of the text has to be in the name; check the
+        # rarest ones first
+        candidates = None
+        for ngram in sorted(get_ngrams(text), key=lambda ngram: len(self.ngrams.get(ngram, ()))):
+            ids = self.ngrams.get(ngram, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+
+        return {key for key in candidates if text in self.names[key]}
+
+    def match_term(self, term: str) -> Set[int]:
+        """Return the ids of objects that match one search term"""
+        prefix, _, value = term.partition(':')
+        prefix = prefix.lower()
+
+        if value and prefix in ('is', 'not'):
+            attr = FLAG_NAMES.get(value.lower())
+            if attr is None:
+                return set()
+            ids = self.flags.get(attr, set())
+            if prefix == 'is':
+                return set(ids)
+            return {key for key in self.object_index.parents if key not in ids}
+
+        if value and prefix in ('file', 'display'):
+            match = LEVEL_NUMBER_RE.fullmatch(value)
+            if match is None:
+                return set()
+            numbers = self.file_numbers if prefix == 'file' else self.display_numbers
+            return set(numbers.get((int(match[1]), int(match[2])), ()))
+
+        # "07-12.arc" is a filename; "07-12" can be either kind of number
+        match = LEVEL_NUMBER_RE.fullmatch(term)
+        if match is not None:
+            number = int(match[1]), int(match[2])
+            ids = set(self.file_numbers.get(number, ()))
+            if not match[3]:
+                ids |= self.display_numbers.get(number, set())
+            return ids | self.match_name(term)
+
+        return self.match_name(term)
+
+    def search(self, query: str) -> List[Union[LevelInfo, WorldInfo]]:
+        """Return the levels and worlds that match every term in a
+        query, in file order. Terms can be:
+
+            text          name contains the text
+            07-12         filename or display name is 7-12
+            07-12.arc     filename is 7-12
+            file:07-12    filename is 7-12
+            display:7-12  display name is 7-12
+            is:secret     has a secret exit (also: normal, starcoins, right)
+            not:secret    doesn't have a secret exit
+        """
+        matches = None
+        for term in query.split():
+            ids = self.match_term(term)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        if matches is None:
+            return []
+
+        return sorted((self.object_index.objects[key] for key in matches), key=self.object_index.get_sort_key)
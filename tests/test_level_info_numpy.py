@@ -0,0 +1,140 @@
+#!/usr/bin/python
+# -*- coding: latin-1 -*-
+
+# Level Info Editor - Edits NewerSMBW's LevelInfo.bin
+# Version 1.6
+# Copyright (C) 2013-2023 RoadrunnerWMC
+
+# This file is part of Level Info Editor.
+
+# Level Info Editor is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Level Info Editor is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Level Info Editor.  If not, see <http://www.gnu.org/licenses/>.
+
+# test_level_info_numpy.py
+# Checks that level_info.load_file() and load_path() give the same
+# result with and without NumPy.
+#
+# Usage:
+#   python -m unittest discover tests
+
+
+################################################################
+################################################################
+
+
+import os.path
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import level_info
+from level_info import LevelInfo, WorldInfo, LevelInfoFile
+
+try:
+    import level_info_numpy
+except ImportError:
+    level_info_numpy = None
+
+
+def make_file() -> LevelInfoFile:
+    """Create a small LevelInfoFile with a few of each kind of entry"""
+    file = LevelInfoFile(comments='Test file')
+    for w in range(3):
+        world = WorldInfo(
+            world_number=w + 1,
+            has_left=True,
+            has_right=bool(w % 2),
+            name_left=f'World {w + 1}',
+            name_right=(f'World {w + 1} Part 2' if w % 2 else ''))
+        for l in range(5):
+            level = LevelInfo(f'Level {w + 1}-{l + 1}', w + 1, l + 1, w + 1, l + 1)
+            level.flags = (0x0000, 0x0002, 0x0012, 0x0032, 0x0412)[l]
+            world.levels.append(level)
+        file.worlds.append(world)
+    return file
+
+
+class LoadFileTest(unittest.TestCase):
+    """Tests for level_info.load_file() and load_path()"""
+
+    def setUp(self) -> None:
+        self.file = make_file()
+        self.data = self.file.save()
+        with tempfile.NamedTemporaryFile('wb', suffix='.bin', delete=False) as f:
+            f.write(self.data)
+        self.path = f.name
+        self.addCleanup(os.remove, self.path)
+
+    def check_loads(self) -> None:
+        """Check that load_file() and load_path() read the test file,
+        and reject data that isn't a LevelInfo.bin file"""
+        self.assertEqual(level_info.load_file(self.data), self.file)
+        self.assertEqual(level_info.load_path(self.path), self.file)
+        self.assertIsNone(level_info.load_file(b'not a LevelInfo file'))
+
+    def test_without_numpy(self) -> None:
+        """Without NumPy, LevelInfoFile is used"""
+        # A None entry in sys.modules makes importing it raise ImportError
+        with mock.patch.dict(sys.modules, {'numpy': None, 'level_info_numpy': None}):
+            self.check_loads()
+
+    @unittest.skipIf(level_info_numpy is None, 'NumPy is not installed')
+    def test_with_numpy(self) -> None:
+        """With NumPy, level_info_numpy is used"""
+        with mock.patch.object(level_info_numpy, 'from_data', wraps=level_info_numpy.from_data) as from_data:
+            self.check_loads()
+        self.assertEqual(from_data.call_count, 3)
+
+
+@unittest.skipIf(level_info_numpy is None, 'NumPy is not installed')
+class NumpyFromDataTest(unittest.TestCase):
+    """Tests that level_info_numpy.from_data() matches
+    LevelInfoFile.from_data() on unusual files"""
+
+    def check_same(self, file: LevelInfoFile) -> None:
+        """Check that both decoders give the same result for a file"""
+        data = file.save()
+        self.assertEqual(level_info_numpy.from_data(data), LevelInfoFile.from_data(data))
+
+    def test_no_entries(self) -> None:
+        """Worlds with no halves or levels"""
+        self.check_same(LevelInfoFile([WorldInfo(), WorldInfo()], 'No entries'))
+        self.check_same(LevelInfoFile([], 'No worlds'))
+
+    def test_right_half_only(self) -> None:
+        """Worlds that only have a right half"""
+        file = LevelInfoFile(comments='Right halves')
+        for w in range(3):
+            world = WorldInfo(world_number=w + 1, has_right=True, name_right=f'World {w + 1} Part 2')
+            if w:
+                world.levels.append(LevelInfo(f'Level {w + 1}-1', w + 1, 1, w + 1, 1))
+            file.worlds.append(world)
+        self.check_same(file)
+
+    def test_truncated(self) -> None:
+        """Files cut off in the world offsets or the level entries"""
+        data = make_file().save()
+        for size in (4, 12, 20, 40, 100):
+            with self.subTest(size=size):
+                with self.assertRaises(struct.error):
+                    LevelInfoFile.from_data(data[:size])
+                with self.assertRaises(struct.error):
+                    level_info_numpy.from_data(data[:size])
+
+
+if __name__ == '__main__':
+    unittest.main()